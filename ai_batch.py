@@ -0,0 +1,138 @@
+import re
+import json
+
+import numpy as np
+import pandas as pd
+
+from niche_classifier import SEED_NICHES, SEED_STYLES, canonical_label
+from prompts import build_batch_label_prompt
+
+# ==========================================
+# BATCHED STRUCTURED AI LABELS
+# ==========================================
+# Many videos' compact metadata go into one Gemini request that must answer
+# with a JSON array matching RESPONSE_SCHEMA. Each item is validated on its
+# own: good items become per-video columns, malformed or missing ones are
+# re-asked one at a time. A 50-video scan costs 2 requests instead of 50.
+BATCH_SIZE = 25
+AI_COLUMNS = ['Hook Score', 'Pacing Score']
+RESPONSE_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "id": {"type": "string"},
+            "niche": {"type": "string", "enum": list(SEED_NICHES)},
+            "style": {"type": "string", "enum": list(SEED_STYLES)},
+            "hook_score": {"type": "number"},
+            "pacing_score": {"type": "number"},
+        },
+        "required": ["id", "niche", "style", "hook_score", "pacing_score"],
+    },
+}
+GENERATION_CONFIG = {"response_mime_type": "application/json", "response_schema": RESPONSE_SCHEMA}
+FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def ensure_ai_columns(df):
+    for col in AI_COLUMNS:
+        if col not in df.columns:
+            df[col] = np.nan
+    return df
+
+
+def compact_item(row):
+    """The few fields a label needs, kept short so ~25 videos fit in one prompt."""
+    tags = row['Tags'] if isinstance(row.get('Tags'), list) else []
+    return {
+        "id": row['Video ID'],
+        "title": row['Title'],
+        "tags": tags[:8],
+        "minutes": float(row.get('Duration', 0) or 0),
+        "views": int(row.get('Views', 0) or 0),
+        "engagement": round(float(row.get('Engagement', 0) or 0), 2),
+        "description": str(row.get('Description', '') or '')[:160],
+    }
+
+
+def _score(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value <= 10:
+        return None
+    return float(value)
+
+
+def validate_item(item):
+    """Cleaned label dict, or None if the item doesn't match the schema."""
+    if not isinstance(item, dict):
+        return None
+    niche, style = item.get("niche"), item.get("style")
+    hook, pacing = _score(item.get("hook_score")), _score(item.get("pacing_score"))
+    if not isinstance(niche, str) or not niche.strip() or not isinstance(style, str) or hook is None or pacing is None:
+        return None
+    niche = canonical_label(niche, SEED_NICHES)
+    if not niche:
+        return None
+    style = canonical_label(re.split(r"[/,]", style)[0], SEED_STYLES)
+    return {"niche": niche, "style": style, "hook_score": hook, "pacing_score": pacing}
+
+
+def parse_batch_response(text, expected_ids):
+    """(labels by video ID, IDs still missing). A reply that isn't a JSON array yields no labels."""
+    try:
+        data = json.loads(FENCE_RE.sub("", (text or "").strip()))
+    except ValueError:
+        data = None
+    if isinstance(data, dict):
+        data = data.get("items")
+    labels = {}
+    for item in data if isinstance(data, list) else []:
+        vid = item.get("id") if isinstance(item, dict) else None
+        clean = validate_item(item)
+        if vid in expected_ids and clean and vid not in labels:
+            labels[vid] = clean
+    return labels, [v for v in expected_ids if v not in labels]
+
+
+def label_batches(rows, generate_text, batch_size=BATCH_SIZE):
+    """Label every row with as few requests as possible.
+
+    generate_text(prompt) -> str. Returns (labels by video ID, failed IDs, requests made).
+    """
+    items = {r['Video ID']: compact_item(r) for _, r in rows.iterrows()}
+    ids = list(items)
+    labels, failed, requests = {}, [], 0
+    for start in range(0, len(ids), batch_size):
+        chunk = ids[start:start + batch_size]
+        got, missing = parse_batch_response(generate_text(build_batch_label_prompt([items[v] for v in chunk])), chunk)
+        requests += 1
+        if not got and len(chunk) > 1:
+            # The whole reply was unusable (timeout, truncated JSON): try the batch once more.
+            got, missing = parse_batch_response(generate_text(build_batch_label_prompt([items[v] for v in chunk])), chunk)
+            requests += 1
+            if not got:
+                failed.extend(chunk)
+                continue
+        labels.update(got)
+        for vid in missing:
+            got, _ = parse_batch_response(generate_text(build_batch_label_prompt([items[vid]])), [vid])
+            requests += 1
+            labels.update(got)
+            if vid not in got:
+                failed.append(vid)
+    return labels, failed, requests
+
+
+def apply_labels(df, labels):
+    """Write labels into df in place: niche/style replace the local guess, scores fill AI_COLUMNS."""
+    ensure_ai_columns(df)
+    if not labels:
+        return df
+    lab = pd.DataFrame.from_dict(labels, orient="index")
+    hit = df['Video ID'].isin(lab.index)
+    lab = lab.loc[df.loc[hit, 'Video ID']]
+    df.loc[hit, 'Main Niche'] = lab['niche'].to_numpy()
+    df.loc[hit, 'Content Style'] = lab['style'].to_numpy()
+    df.loc[hit, 'Niche Confidence'] = 1.0
+    df.loc[hit, 'Hook Score'] = lab['hook_score'].to_numpy()
+    df.loc[hit, 'Pacing Score'] = lab['pacing_score'].to_numpy()
+    return df
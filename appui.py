@@ -1,20 +1,45 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
-from googleapiclient.discovery import build
-from textblob import TextBlob
-from wordcloud import WordCloud
-from collections import Counter
-import google.generativeai as genai
-from youtube_transcript_api import YouTubeTranscriptApi
-import isodate
+
+from ai_batch import BATCH_SIZE, GENERATION_CONFIG, apply_labels, ensure_ai_columns, label_batches
+from channels import enrich_with_channels
+from charts import (
+    cluster_scatter_figure, publish_heatmap_figure, tag_cloud_figure, top_tags, views_histogram_figure,
+    virality_scatter_figure,
+)
+from clustering import cluster_frame, default_k
+from comments import TopK, ingest_comments, load_summary, summary_frame
+from export import FORMATS, export_file_reader
+from market import STATUS_OK, analyze_title_sentiment, fetch_market_data
+from model_router import SHARED_TTL, GeminiTimeout, configure as configure_gemini, generate, model_latency_frame
+from niche_classifier import classify_frame, low_confidence_rows, parse_ai_label, save_label
+from perf import annotate, latency_summary, run_spans, span, start_run
+from prompts import (
+    build_chat_prompt, build_forensic_prompt, build_niche_prompt, build_strategy_prompt, build_title_ideas_prompt
+)
+from publish_timing import TIMEZONES, age_adjusted_rank, best_slots, publish_heatmap
+from query_expansion import SEARCH_COST, affordable_searches, expand_market_data
+from resilience import CircuitOpen, breaker_states
+from shared_cache import shared_call
+from snapshots import append_ai_output, list_snapshots, load_snapshot, save_snapshot
+from table_engine import DURATION_BANDS, SORTABLE, TableIndex
+from thumb_features import attach_thumbnail_features, feature_correlations
+from thumbnails import attach_previews, cache_thumbnails, local_thumb
+from title_scorer import build_scorer, extract_titles, record_titles
+from transcript_index import index_stats
+from transcripts import (
+    fetch_segments, pacing_metrics, pacing_prompt_block, search_transcripts, segments_text, transcript_status
+)
+from virality import score_with_corpus
+from watch import recent_alerts
+from yt_client import youtube_client
 
 # ==========================================
 # 1. CONFIG & THEME
 # ==========================================
 st.set_page_config(page_title="YouTUBE AXE – AI Edition", page_icon="🪓", layout="wide")
+start_run()
 
 st.markdown("""
     <style>
@@ -119,8 +144,40 @@ if 'all_tags' not in st.session_state:
     st.session_state.all_tags = []
 if 'selected_title' not in st.session_state:
     st.session_state.selected_title = None
+if 'scan_query' not in st.session_state:
+    st.session_state.scan_query = ""
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []  # list of dicts: {"role": "user"/"bot", "content": str}
+if 'snapshot_id' not in st.session_state:
+    st.session_state.snapshot_id = None
+if 'strategy_text' not in st.session_state:
+    st.session_state.strategy_text = None
+if 'title_ideas' not in st.session_state:
+    st.session_state.title_ideas = None
+
+# ?snap=<id> restores a saved scan straight from disk: no YouTube or Gemini calls.
+snap_param = st.query_params.get("snap")
+if snap_param and snap_param != st.session_state.snapshot_id:
+    try:
+        with span("snapshot.load"):
+            snap_meta, snap_df, snap_ai = load_snapshot(snap_param)
+        for rec in snap_ai:
+            if rec['kind'] == 'labels':
+                apply_labels(snap_df, rec['content'])
+        st.session_state.df = attach_previews(snap_df)
+        st.session_state.all_tags = snap_meta['all_tags']
+        st.session_state.scan_query = snap_meta['query']
+        st.session_state.search_done = not snap_df.empty
+        st.session_state.selected_title = snap_df.iloc[0]['Title'] if not snap_df.empty else None
+        st.session_state.chat_history = [
+            {"role": rec['role'], "content": rec['content']} for rec in snap_ai if rec['kind'] == 'chat'
+        ]
+        strategies = [rec['content'] for rec in snap_ai if rec['kind'] == 'strategy']
+        st.session_state.strategy_text = strategies[-1] if strategies else None
+        st.session_state.snapshot_id = snap_param
+    except (ValueError, OSError):
+        st.warning(f"Snapshot '{snap_param}' not found on this server.")
+        st.session_state.snapshot_id = snap_param
 
 # ==========================================
 # 3. SIDEBAR (BRANDED)
@@ -139,13 +196,13 @@ with st.sidebar:
         api_key = st.text_input("🔑 YouTube API Key", type="password")
 
     if "GOOGLE_API_KEY" in st.secrets:
-        genai.configure(api_key=st.secrets["GOOGLE_API_KEY"])
+        configure_gemini(st.secrets["GOOGLE_API_KEY"])
         ai_enabled = True
         st.success("✅ GEMINI AI AGENT ACTIVE")
     else:
         gemini_key = st.text_input("✨ Gemini API Key", type="password")
         if gemini_key:
-            genai.configure(api_key=gemini_key)
+            configure_gemini(gemini_key)
             ai_enabled = True
         else:
             ai_enabled = False
@@ -155,6 +212,30 @@ with st.sidebar:
     country_code = st.selectbox("TARGET REGION", ["US", "IN", "GB", "CA", "AU"], index=0)
     rpm = st.slider("RPM CALIBRATOR ($)", 0.5, 20.0, 3.0)
     st.caption("RPM ~ rough revenue per 1000 views.")
+    expand_budget = st.slider("RELATED-QUERY BUDGET (quota units)", 0, 1000, 0, step=SEARCH_COST)
+    st.caption(f"Adds up to {affordable_searches(expand_budget)} related searches mined from the scan's tags and titles.")
+
+    st.divider()
+    if st.session_state.snapshot_id and st.session_state.search_done:
+        st.markdown(f"🔗 SNAPSHOT `{st.session_state.snapshot_id}`")
+        st.caption(f"Share this page URL (…?snap={st.session_state.snapshot_id}) to reopen this scan instantly.")
+    recent = list_snapshots(15)
+    if recent:
+        labels = {m['id']: f"{m['query']} · {m['region']} · {m['created'][:16]}" for m in recent}
+        pick = st.selectbox("RECENT SNAPSHOTS", list(labels), format_func=labels.get, index=None,
+                            placeholder="Reopen a past scan...")
+        if pick and pick != st.session_state.snapshot_id:
+            st.query_params["snap"] = pick
+            st.rerun()
+
+    alerts = recent_alerts(10)
+    if alerts:
+        with st.expander(f"🚨 WATCH ALERTS ({len(alerts)})"):
+            for a in alerts:
+                st.markdown(
+                    f"**{a['views_per_hour']:,} views/h** · [{a['title']}](https://www.youtube.com/watch?v={a['video_id']})"
+                )
+                st.caption(a['ts'])
 
     st.divider()
     if st.button("♻️ RESET SESSION"):
@@ -162,241 +243,132 @@ with st.sidebar:
         st.session_state.df = pd.DataFrame()
         st.session_state.all_tags = []
         st.session_state.selected_title = None
+        st.session_state.scan_query = ""
         st.session_state.chat_history = []
+        st.session_state.snapshot_id = None
+        st.session_state.strategy_text = None
+        st.query_params.clear()
         st.success("Session cleared.")
 
 # ==========================================
 # 4. CORE FUNCTIONS
 # ==========================================
-@st.cache_data(show_spinner=False)
-def get_market_data(api_key, query, region_code, rpm_value, max_results=50):
-    youtube = build('youtube', 'v3', developerKey=api_key)
-    search_req = youtube.search().list(
-        part="snippet",
-        q=query,
-        type="video",
-        regionCode=region_code,
-        maxResults=max_results,
-        order="viewCount"
-    ).execute()
-    video_ids = [item['id']['videoId'] for item in search_req.get('items', [])]
-    
-    if not video_ids:
-        return pd.DataFrame(), []
+SCAN_SHARED_TTL = 6 * 3600
 
-    stats_req = youtube.videos().list(
-        part="snippet,statistics,contentDetails",
-        id=",".join(video_ids)
-    ).execute()
-    
-    data, all_tags = [], []
-    for item in stats_req.get('items', []):
-        stats, snippet, content = item['statistics'], item['snippet'], item['contentDetails']
-        
-        views = int(stats.get('viewCount', 0))
-        likes = int(stats.get('likeCount', 0))
-        comments = int(stats.get('commentCount', 0))
-        tags = snippet.get('tags', [])
-        if tags:
-            all_tags.extend(tags)
-        
-        try:
-            duration_iso = content['duration']
-            duration_mins = round(isodate.parse_duration(duration_iso).total_seconds() / 60, 2)
-        except Exception:
-            duration_mins = 0
-        
-        thumb_url = snippet['thumbnails'].get(
-            'maxres',
-            snippet['thumbnails'].get('high', list(snippet['thumbnails'].values())[0])
-        )['url']
-        
-        engagement = round(((likes + comments) / views * 100) if views > 0 else 0, 2)
-        earnings = round((views / 1000) * rpm_value, 2)
-        virality_raw = (views * 0.5) + (likes * 50) + (comments * 100)
-        
-        data.append({
-            'Video ID': item['id'],
-            'Thumbnail': thumb_url,
-            'Title': snippet['title'],
-            'Views': views,
-            'Likes': likes,
-            'Comments': comments,
-            'Engagement': engagement,
-            'Earnings': earnings,
-            'Virality Raw': virality_raw,
-            'Link': f"https://www.youtube.com/watch?v={item['id']}",
-            'Published': snippet['publishedAt'][:10],
-            'Duration': duration_mins
-        })
-    
-    df = pd.DataFrame(data)
-    if not df.empty:
-        df['Virality Score'] = (df['Virality Raw'] / df['Virality Raw'].max()) * 100
-        df['Virality Score'] = df['Virality Score'].round(0)
+class PartialScan(Exception):
+    """Raised out of the cached scan so incomplete results are shown but never cached."""
+
+    def __init__(self, df, all_tags):
+        super().__init__("partial scan")
+        self.df, self.all_tags = df, all_tags
+
+def _is_partial(df):
+    return not df.empty and df['Fetch Status'].ne(STATUS_OK).any()
+
+def fetch_scan(api_key, query, region_code, rpm_value, max_results=50, expand_budget=0):
+    with youtube_client(api_key) as youtube:
+        df, all_tags = fetch_market_data(youtube, query, region_code, rpm_value, max_results)
+        df = enrich_with_channels(youtube, df)
+    if expand_budget and not df.empty:
+        with span("expansion", budget=expand_budget):
+            df, all_tags = expand_market_data(api_key, query, df, all_tags, region_code, rpm_value, max_results,
+                                              expand_budget)
     return df, all_tags
 
-def get_transcript_text(video_id):
-    try:
-        return " ".join([t['text'] for t in YouTubeTranscriptApi.get_transcript(video_id)])
-    except Exception:
-        return None
-
-def ai_forensic_audit(transcript, title, duration):
-    model = genai.GenerativeModel('gemini-1.0-pro') 
-    prompt = f"""
-    Act as a Senior YouTube Video Editor & Premiere Pro Expert.
-    Analyze this script density to reverse-engineer the editing timeline.
-
-    METADATA:
-    Title: {title}
-    Duration: {duration} minutes
-    Script (truncated): "{transcript[:8000]}..."
-
-    OUTPUT FORMAT (Strict Markdown):
-    ### ✂️ EDITING DIAGNOSTICS
-    * Pacing Style:
-    * Est. Cuts Per Minute:
-    * Editor Skill Level (1–10):
-    * Rhythm / Silence Usage:
-
-    ### 🧠 CONTENT & HOOK
-    * Hook Strength (0–10) & why
-    * Retention tactics used
-    * Drop-off risk moments
-
-    ### 🛠️ TECH STACK GUESS
-    * Likely Editing Software
-    * Likely Effects (J-cuts, speed ramps, masking, etc.)
-
-    ### 🎞️ TIMELINE BLUEPRINT
-    * 00:00 - Hook:
-    * Mid Section:
-    * Ending & CTA:
-
-    ### 🚀 UPGRADE RECOMMENDATIONS
-    * 3 edit changes to improve retention
-    * 3 ideas to repurpose into Shorts/Reels
-    """
-    return model.generate_content(prompt).text
-
-def analyze_title_sentiment(df):
-    if df.empty:
-        return df
-    sentiments = []
-    for t in df['Title']:
-        tb = TextBlob(t)
-        sentiments.append(tb.sentiment.polarity)
-    df = df.copy()
-    df['Sentiment'] = sentiments
-    df['Sentiment Label'] = pd.cut(
-        df['Sentiment'],
-        bins=[-1.0, -0.05, 0.05, 1.0],
-        labels=['Negative', 'Neutral', 'Positive']
+@st.cache_data(show_spinner=False)
+def get_market_data(api_key, query, region_code, rpm_value, max_results=50, expand_budget=0):
+    annotate(cache="miss")
+    # One replica scans a given query at a time; the others reuse its result. Partial
+    # scans are only handed to replicas already waiting, never kept.
+    df, all_tags = shared_call(
+        "youtube.scan", (query, region_code, rpm_value, max_results, expand_budget),
+        lambda: fetch_scan(api_key, query, region_code, rpm_value, max_results, expand_budget),
+        ttl=lambda result: 0 if _is_partial(result[0]) else SCAN_SHARED_TTL,
     )
-    return df
+    if _is_partial(df):
+        raise PartialScan(df, all_tags)
+    return df, all_tags
 
-def ai_niche_for_video(title, tags, description="", transcript=""):
-    """Classify niche of a single video using AI."""
-    model = genai.GenerativeModel('gemini-1.0-pro')
-    prompt = f"""
-    You are a YouTube niche classifier.
+def load_market_data(api_key, query, region_code, rpm_value, max_results=50, expand_budget=0):
+    try:
+        return get_market_data(api_key, query, region_code, rpm_value, max_results, expand_budget)
+    except PartialScan as e:
+        return e.df, e.all_tags
+
+def get_transcript_text(video_id):
+    return segments_text(fetch_segments(video_id))
 
-    Given this data, identify the primary niche + 2 sub-niches:
+def gemini_generate(task, prompt, tier=None, generation_config=None):
+    """Single entry point for Gemini calls: routed by task/prompt size, deadline-bound, timed with token usage."""
+    with span(f"gemini.{task}", cache="miss", prompt_chars=len(prompt)):
+        try:
+            text = shared_call(
+                "gemini", (task, tier, prompt, generation_config),
+                lambda: _gemini_text(task, prompt, tier, generation_config),
+                ttl=SHARED_TTL.get(task, 0),
+            )
+        except GeminiTimeout as e:
+            annotate(error="timeout")
+            return f"⚠️ {e} Try again in a moment."
+        except Exception as e:
+            annotate(error=type(e).__name__)
+            return f"⚠️ Gemini request failed ({type(e).__name__}). Try again in a moment."
+        return text
 
-    Title: {title}
-    Tags: {tags}
-    Description: {description[:500]}
-    Transcript snippet: {transcript[:1000]}
+def _gemini_text(task, prompt, tier, generation_config):
+    response, info = generate(task, prompt, tier, generation_config)
+    annotate(model=info['model'], tier=info['tier'], hedged=info['hedged'])
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None:
+        annotate(
+            prompt_tokens=getattr(usage, "prompt_token_count", None),
+            output_tokens=getattr(usage, "candidates_token_count", None)
+        )
+    return response.text
+
+def ai_forensic_audit(transcript, title, duration, pacing=None):
+    return gemini_generate("forensic_audit", build_forensic_prompt(transcript, title, duration, pacing))
+
+def ai_niche_for_video(title, tags, description="", transcript=""):
+    """Classify niche of a single video using AI."""
+    return gemini_generate("niche", build_niche_prompt(title, tags, description, transcript))
 
-    Return strictly in this markdown format:
+def ai_label_video(row, transcript=""):
+    """Gemini fallback: classify one row, remember the label for the local model."""
+    tags = row['Tags'] if isinstance(row.get('Tags'), list) else []
+    niche_text = ai_niche_for_video(
+        title=row['Title'],
+        tags=", ".join(tags),
+        description=row.get('Description', ''),
+        transcript=transcript
+    )
+    niche, style = parse_ai_label(niche_text)
+    if niche:
+        save_label(row['Video ID'], row['Title'], tags, row.get('Description', ''), niche, style)
+    return niche_text, niche, style
 
-    **Main Niche:** <one line>
-    **Sub Niches:** <comma separated>
-    **Audience Type:** <who is this mainly for?>
-    **Content Style:** <e.g. educational / storytelling / vlog / challenge / news / commentary>
-    """
-    return model.generate_content(prompt).text
+def ai_label_batch(rows):
+    """Label many videos in a few JSON-schema requests; labels also train the local model."""
+    labels, failed, requests = label_batches(
+        rows, lambda prompt: gemini_generate("batch_label", prompt, generation_config=GENERATION_CONFIG)
+    )
+    for _, r in rows[rows['Video ID'].isin(labels)].iterrows():
+        label = labels[r['Video ID']]
+        save_label(r['Video ID'], r['Title'], r['Tags'] if isinstance(r.get('Tags'), list) else [],
+                   r.get('Description', ''), label['niche'], label['style'])
+    return labels, failed, requests
 
 def ai_niche_strategy(df, query):
     if df.empty:
         return "No data available."
-    model = genai.GenerativeModel('gemini-1.0-pro')
-    sample = df.sort_values('Views', ascending=False).head(15)
-    rows = []
-    for _, r in sample.iterrows():
-        rows.append(f"- {r['Title']} | {r['Views']} views | {r['Duration']} mins | {r['Engagement']}% engagement")
-    meta_block = "\n".join(rows)
-    prompt = f"""
-    You are a YouTube Growth Consultant.
-
-    Topic / query scanned: "{query}"
-
-    Here are some of the top videos:
-    {meta_block}
-
-    Based on this, return a strategy in markdown:
-    - Overall niche summary
-    - Common patterns (length, titles, thumbnails, pacing)
-    - Recommended video lengths & formats for a new creator
-    - 5 advanced video ideas with angle + hook
-    - Suggested posting schedule for growth
-    """
-    return model.generate_content(prompt).text
+    return gemini_generate("strategy", build_strategy_prompt(df, query))
 
 def ai_title_ideas(base_idea, niche_desc):
-    model = genai.GenerativeModel('gemini-1.0-pro')
-    prompt = f"""
-    Act as a viral YouTube title copywriter.
-
-    Base idea: "{base_idea}"
-    Niche/channel description: "{niche_desc}"
-
-    Generate 8 viral title variations with:
-    - Curiosity
-    - Stakes or payoff
-    - Some emotion
-
-    Return in markdown with a short note under each about why it can work.
-    """
-    return model.generate_content(prompt).text
+    return gemini_generate("title_ideas", build_title_ideas_prompt(base_idea, niche_desc))
 
 def ai_chat_about_niche(question, df, query):
     """Chatbot that knows about this market and explains niche, strategy, video types, etc."""
-    model = genai.GenerativeModel('gemini-1.0-pro')
-    if df.empty:
-        context = "No videos scanned yet."
-    else:
-        # compress market into brief context
-        top = df.sort_values('Views', ascending=False).head(12)
-        ctx_rows = []
-        for _, r in top.iterrows():
-            ctx_rows.append(
-                f"- {r['Title']} | {r['Views']} views | {r['Duration']} mins | "
-                f"{r['Engagement']}% engagement | Virality {r['Virality Score']} | Sentiment {r.get('Sentiment Label','NA')}"
-            )
-        context = "\n".join(ctx_rows)
-
-    prompt = f"""
-    You are an AI YouTube Niche Analyst and Growth Mentor.
-
-    The user has scanned this topic: "{query}".
-
-    Here is a snapshot of top videos in this space:
-    {context}
-
-    The user asks: "{question}"
-
-    Answer like a smart YouTube consultant:
-    - Explain clearly in human language
-    - Use examples from the kind of videos in this niche
-    - If user asks about what niche this is, explain niche, audience, money potential
-    - If user asks about content ideas, give angles + hooks
-    - If user asks about how to grow, give step-by-step.
-
-    Reply in markdown.
-    """
-    return model.generate_content(prompt).text
+    return gemini_generate("chat", build_chat_prompt(question, df, query))
 
 # ==========================================
 # 5. HUD MODAL
@@ -404,18 +376,529 @@ def ai_chat_about_niche(question, df, query):
 @st.dialog("✂️ EDITING LAB: A.X.G PRO", width="large")
 def open_forensic_lab(vid, title, duration):
     st.markdown(f"### TARGET: {title}")
-    transcript = get_transcript_text(vid)
-    
-    if transcript:
+    segments = fetch_segments(vid)
+
+    if segments:
+        pacing = pacing_prompt_block(pacing_metrics(segments))
         with st.spinner("⚙️ REVERSE ENGINEERING EDITING TIMELINE..."):
-            analysis = ai_forensic_audit(transcript, title, duration)
+            analysis = ai_forensic_audit(segments_text(segments), title, duration, pacing)
         st.success("✅ BLUEPRINT EXTRACTED")
         st.markdown(analysis)
     else:
         st.error("⚠️ DATA CORRUPT: No Transcript available for deep editing analysis.")
 
 # ==========================================
-# 6. DASHBOARD UI
+# 6. TAB FRAGMENTS
+# ==========================================
+# Each tab is an st.fragment: its widgets rerun only that tab. State shared
+# between tabs lives in st.session_state (df, all_tags, scan_query,
+# selected_title, chat_history); anything that changes the scan itself calls
+# a full st.rerun() so every tab sees it.
+
+# TAB: DATABASE
+@st.fragment
+def database_tab(df, ai_enabled):
+    st.markdown("### 📂 Market Database")
+    ensure_ai_columns(df)
+    if st.session_state.get('table_index_src') is not df:
+        st.session_state.table_index = TableIndex(df)
+        st.session_state.table_index_src = df
+    index = st.session_state.table_index
+
+    f1, f2, f3, f4 = st.columns([1.2, 1, 1.4, 1.4])
+    with f1:
+        sort_by = st.selectbox("Sort by", SORTABLE, key="db_sort")
+        ascending = st.toggle("Ascending", key="db_asc")
+    with f2:
+        min_views = st.number_input("Min views", min_value=0, step=10_000, key="db_min_views")
+        max_views = st.number_input("Max views (0 = any)", min_value=0, step=10_000, key="db_max_views")
+    with f3:
+        bands = st.multiselect("Duration band", DURATION_BANDS, key="db_bands")
+        sentiments = st.multiselect("Sentiment", ['Positive', 'Neutral', 'Negative'], key="db_sentiment")
+    with f4:
+        contains = st.text_input("Tag / title contains", key="db_contains")
+        page_size = st.selectbox("Rows per page", [25, 50, 100, 250], index=1, key="db_page_size")
+
+    filters = dict(min_views=min_views, max_views=max_views, bands=bands, sentiments=sentiments, contains=contains)
+    total = index.count(**filters)
+    n_pages = max(1, -(-total // page_size))
+    if st.session_state.get("db_page", 1) > n_pages:
+        st.session_state.db_page = n_pages
+    page = st.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, key="db_page")
+    with span("table.query", rows=len(df), matches=total):
+        page_df, _ = index.query(sort_by, ascending, page=page, page_size=page_size, **filters)
+    st.caption(f"Showing {len(page_df)} of {total:,} matching videos ({len(df):,} scanned)")
+
+    columns = ['Preview', 'Title', 'Channel', 'Views', 'Channel Subs', 'Views / Sub', 'Outperformance', 'Duration',
+               'Virality Score', 'Engagement', 'Sentiment Label', 'Main Niche', 'Content Style', 'Niche Confidence',
+               'Hook Score', 'Pacing Score', 'Link']
+    if 'Fetch Status' in df.columns and df['Fetch Status'].ne(STATUS_OK).any():
+        columns.insert(2, 'Fetch Status')
+    if 'Found By' in df.columns:
+        columns.insert(2, 'Found By')
+    st.dataframe(
+        page_df[columns], 
+        column_config={
+            "Preview": st.column_config.ImageColumn("Preview"), 
+            "Virality Score": st.column_config.ProgressColumn("Score", min_value=0, max_value=100),
+            "Engagement": st.column_config.NumberColumn("Engagement %", format="%.2f"),
+            "Sentiment Label": st.column_config.TextColumn("Sentiment"),
+            "Niche Confidence": st.column_config.ProgressColumn("Niche Conf.", min_value=0, max_value=1),
+            "Channel Subs": st.column_config.NumberColumn("Subs", format="compact"),
+            "Outperformance": st.column_config.NumberColumn("vs Channel Avg", format="%.2fx"),
+            "Hook Score": st.column_config.ProgressColumn("Hook (AI)", min_value=0, max_value=10, format="%.1f"),
+            "Pacing Score": st.column_config.ProgressColumn("Pacing (AI)", min_value=0, max_value=10, format="%.1f"),
+            "Found By": st.column_config.ListColumn("Found By"),
+            "Link": st.column_config.LinkColumn("▶️ WATCH")
+        }, 
+        use_container_width=True,
+        height=600
+    )
+
+    if 'Found By' in df.columns:
+        with st.expander("🔭 QUERY COVERAGE"):
+            found = df[['Video ID', 'Found By']].explode('Found By')
+            only = found[~found['Video ID'].duplicated(keep=False)]
+            st.dataframe(
+                pd.DataFrame({
+                    "Videos": found['Found By'].value_counts(),
+                    "Only via this query": only['Found By'].value_counts(),
+                }).fillna(0).astype(int).rename_axis("Query"),
+                use_container_width=True
+            )
+
+    with st.expander("⬇️ EXPORT"):
+        e1, e2 = st.columns(2)
+        with e1:
+            export_fmt = st.radio("Format", list(FORMATS), horizontal=True, key="export_fmt")
+        with e2:
+            export_scope = st.radio("Rows", ["Filtered view", "Whole scan"], horizontal=True, key="export_scope")
+        # Rows are sliced chunk by chunk inside the writer, never copied as one frame.
+        export_rows = index.matching(sort_by, ascending, **filters) if export_scope == "Filtered view" else None
+        st.download_button(
+            f"Download {export_fmt.upper()}",
+            data=export_file_reader(df, export_fmt, st.session_state.scan_query, rows=export_rows),
+            file_name=f"{st.session_state.scan_query or 'scan'}{FORMATS[export_fmt][1]}",
+            mime=FORMATS[export_fmt][0],
+            key="export_download"
+        )
+
+    if ai_enabled:
+        unsure = low_confidence_rows(df)
+        unscored = df[df['Hook Score'].isna()]
+        b1, b2 = st.columns(2)
+        targets = None
+        with b1:
+            if not unsure.empty:
+                st.caption(f"{len(unsure)} videos have a low-confidence local niche label.")
+                if st.button(f"🧠 Resolve {len(unsure)} uncertain with Gemini"):
+                    targets = unsure
+        with b2:
+            if not unscored.empty:
+                st.caption(f"{len(unscored)} videos have no AI hook / pacing score yet.")
+                if st.button(f"🧠 AI-score {len(unscored)} videos (~{-(-len(unscored) // BATCH_SIZE)} requests)"):
+                    targets = unscored
+        if targets is not None:
+            with st.spinner(f"Asking Gemini about {len(targets)} videos in batches..."):
+                labels, failed, requests = ai_label_batch(targets)
+            apply_labels(df, labels)
+            append_ai_output(st.session_state.snapshot_id, "labels", labels)
+            st.session_state.df = df
+            st.session_state.table_index_src = None
+            st.session_state.label_report = f"Labelled {len(labels)} videos in {requests} requests" + (
+                f"; {len(failed)} could not be labelled." if failed else "."
+            )
+            st.rerun()
+        if st.session_state.get("label_report"):
+            st.caption(st.session_state.pop("label_report"))
+
+
+# TAB: EDITING LAB
+@st.fragment
+def editing_lab_tab(df, ai_enabled):
+    c1, c2 = st.columns([1, 1])
+
+    with c1:
+        st.markdown("### 🎯 TARGET ACQUISITION")
+        target = st.selectbox("Select Video:", df['Title'].tolist(), label_visibility="collapsed")
+        st.session_state.selected_title = target
+        row = df[df['Title'] == target].iloc[0]
+
+        st.image(local_thumb(row['Video ID'], row['Thumbnail']), use_container_width=True)
+
+        st.markdown(f"""
+        <div style='display: flex; justify-content: space-between; margin-top: 10px;'>
+            <div class='hud-card' style='flex:1; margin-right:5px;'>
+                <div class='hud-label'>DURATION</div>
+                <div class='hud-value'>{row['Duration']}m</div>
+            </div>
+            <div class='hud-card' style='flex:1; margin-left:5px;'>
+                <div class='hud-label'>VIRALITY</div>
+                <div class='hud-value'>{row['Virality Score']:.0f}</div>
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with c2:
+        st.markdown("### 🧬 FORENSIC TOOLS")
+        pacing = pacing_metrics(fetch_segments(row['Video ID']))
+        if pacing:
+            st.markdown("**⏱️ Pacing (from caption timestamps)**")
+            p1, p2, p3 = st.columns(3)
+            p1.metric("WPM", pacing['wpm'], f"{pacing['hook_wpm'] - pacing['wpm']:+.0f} in hook")
+            p2.metric("Pauses / min", pacing['pauses_per_min'])
+            p3.metric("Silence", f"{pacing['silence_pct']}%")
+            p1.metric("Segments / min", pacing['segments_per_min'])
+            p2.metric("Median segment", f"{pacing['segment_sec_p50']}s")
+            p3.metric("Hook triggers (30s)", pacing['hook_trigger_words'] + pacing['hook_questions'])
+            st.line_chart(pd.DataFrame({'WPM': pacing['wpm_timeline']}), height=160)
+        elif transcript_status(row['Video ID']) == "unknown":
+            st.caption("Couldn't reach the transcript service — it will be retried in a few minutes.")
+        else:
+            st.caption("No captions found for this video — pacing unavailable.")
+        st.info("AI Editor is ready to break down the timeline and edit style.")
+
+        if ai_enabled:
+            if st.button("🔍 RUN EDITING AUTOPSY", type="primary", use_container_width=True):
+                open_forensic_lab(row['Video ID'], row['Title'], row['Duration'])
+        else:
+            st.warning("AI MODULE OFFLINE")
+
+
+# TAB: TAG SPY
+@st.fragment
+def tag_spy_tab(df, ai_enabled):
+    c1, c2 = st.columns([1, 2])
+    with c1:
+        st.markdown("### 📋 SEO DATA")
+        tag_counts = top_tags(st.session_state.all_tags)
+        tags_text = ", ".join([t[0] for t in tag_counts]) if tag_counts else ""
+        st.text_area("Tags", tags_text, height=300)
+    with c2:
+        st.markdown("### ☁️ Tag Cloud")
+        if st.session_state.all_tags:
+            with span("matplotlib.tag_cloud"):
+                st.pyplot(tag_cloud_figure(tag_counts))
+        else:
+            st.info("No tags detected.")
+
+
+# TAB: ANALYTICS
+@st.fragment
+def analytics_tab(df, ai_enabled):
+    st.markdown("### 📊 Market Analytics")
+    a1, a2 = st.columns(2)
+    with a1:
+        st.subheader("Views Distribution")
+        with span("matplotlib.views_histogram"):
+            st.pyplot(views_histogram_figure(df))
+
+    with a2:
+        st.subheader("Virality vs Engagement")
+        with span("matplotlib.virality_scatter"):
+            st.pyplot(virality_scatter_figure(df))
+
+    st.subheader("Top 10 Videos by Virality")
+    top10 = df.sort_values('Virality Score', ascending=False).head(10)[
+        ['Title', 'Views', 'Virality Score', 'Engagement', 'Earnings']
+    ]
+    st.dataframe(top10, use_container_width=True)
+
+    st.subheader("Title Sentiment Breakdown")
+    st.write(df['Sentiment Label'].value_counts())
+
+    st.subheader("🕒 Upload Timing")
+    tz = st.selectbox("Time zone", TIMEZONES, key="publish_tz")
+    with span("timing.heatmap", rows=len(df)):
+        typical, counts = publish_heatmap(df, tz)
+    if counts.to_numpy().sum() == 0:
+        st.info("No publish times in this scan.")
+    else:
+        h1, h2 = st.columns([3, 1])
+        with h1:
+            st.caption("Typical views per day since publish, by upload weekday and hour")
+            with span("matplotlib.publish_heatmap"):
+                st.pyplot(publish_heatmap_figure(typical))
+        with h2:
+            st.caption("Best upload slots")
+            st.dataframe(best_slots(typical, counts), hide_index=True, use_container_width=True)
+
+    st.subheader("⏳ Age-Adjusted Ranking")
+    with span("timing.age_rank", rows=len(df)):
+        ranked = age_adjusted_rank(df)
+    if ranked.empty:
+        st.info("Not enough dated videos to fit views against age.")
+    else:
+        st.caption("Views against what a video of the same age typically has in this scan (lift > 1 = ahead of the curve)")
+        st.dataframe(
+            ranked.head(15),
+            column_config={
+                "Published": st.column_config.DatetimeColumn("Published", format="YYYY-MM-DD HH:mm"),
+                "Age-Adjusted Lift": st.column_config.NumberColumn("Lift", format="%.2fx"),
+            },
+            hide_index=True,
+            use_container_width=True,
+        )
+
+    st.subheader("🖼️ Thumbnail Style vs Performance")
+    thumb_corr = feature_correlations(df)
+    if thumb_corr.empty:
+        st.info("Not enough cached thumbnails to correlate visual features.")
+    else:
+        t1, t2 = st.columns([1, 1])
+        with t1:
+            st.caption("Spearman correlation of thumbnail features with performance")
+            st.dataframe(
+                thumb_corr.style.background_gradient(cmap='RdYlGn', vmin=-1, vmax=1),
+                use_container_width=True
+            )
+        with t2:
+            st.caption("Most common dominant colours")
+            st.write(df['Thumb Dominant'].value_counts().head(8))
+
+    st.subheader("🧩 Sub-Niche Clusters")
+    n_clusters = st.slider("Clusters", 2, 12, default_k(len(df)), key="n_clusters")
+    # Reruns of this fragment (strategy button, other sliders) reuse the clustering for the same scan and k.
+    cached = st.session_state.get('clusters')
+    if cached is None or cached[0] is not df or cached[1] != n_clusters:
+        with span("clustering.kmeans", rows=len(df), k=n_clusters):
+            cached = st.session_state.clusters = (df, n_clusters, cluster_frame(df, n_clusters))
+    sub_niche, cluster_report = cached[2]
+    if cluster_report.empty:
+        st.info("Not enough videos to split into sub-niches.")
+    else:
+        st.dataframe(
+            cluster_report,
+            column_config={
+                "Avg Engagement": st.column_config.NumberColumn("Avg Engagement %", format="%.2f"),
+                "Avg Duration": st.column_config.NumberColumn("Avg Duration (m)", format="%.1f"),
+                "Avg Virality": st.column_config.ProgressColumn("Avg Virality", min_value=0, max_value=100),
+            },
+            use_container_width=True
+        )
+        with span("matplotlib.cluster_scatter"):
+            st.pyplot(cluster_scatter_figure(df, sub_niche))
+
+    if ai_enabled:
+        st.subheader("🧠 AI Niche Strategy Summary")
+        if st.button("Generate Niche Strategy"):
+            with st.spinner("Analyzing niche pattern with AI..."):
+                st.session_state.strategy_text = ai_niche_strategy(df, st.session_state.scan_query)
+            append_ai_output(st.session_state.snapshot_id, "strategy", st.session_state.strategy_text)
+        if st.session_state.strategy_text:
+            st.markdown(st.session_state.strategy_text)
+
+
+# TAB: AI IDEAS
+@st.fragment
+def ai_ideas_tab(df, ai_enabled):
+    st.markdown("### 💡 AI Idea Lab – Titles & Concepts")
+    col_idea, col_niche = st.columns(2)
+    with col_idea:
+        base_idea = st.text_input("Your rough video idea", placeholder="e.g. 'AI will replace X in Dubai'")
+    with col_niche:
+        niche_desc = st.text_input("Your channel niche", placeholder="e.g. 'AI & Business in Dubai'")
+
+    if ai_enabled:
+        if st.button("⚡ Generate Title Pack"):
+            if not base_idea:
+                st.warning("Please enter a base idea.")
+            else:
+                with st.spinner("Summoning title wizard..."):
+                    st.session_state.title_ideas = ai_title_ideas(base_idea, niche_desc)
+        if st.session_state.title_ideas:
+            st.markdown(st.session_state.title_ideas)
+    else:
+        st.warning("AI MODULE OFFLINE – Add Gemini key in sidebar.")
+
+    # Local ranking: no API calls, so it also works with AI offline.
+    st.markdown("---")
+    st.subheader("🏁 Title Ranking vs This Market")
+    own = st.text_area("Score your own titles (one per line)", key="own_titles", height=120)
+    candidates = list(dict.fromkeys(extract_titles(st.session_state.title_ideas) + own.splitlines()))
+    with span("titles.fit", rows=len(df)):
+        scorer = build_scorer(df)
+    if scorer is None:
+        st.info("Need at least 10 scanned titles to rank against. Run a scan first.")
+    elif any(t.strip() for t in candidates):
+        with span("titles.score", titles=len(candidates)):
+            ranked = scorer.score(candidates)
+        st.caption(
+            f"Predicted views percentile against {scorer.n} scanned titles. "
+            "Feature columns show how many percentile points each signal adds or removes."
+        )
+        st.dataframe(
+            ranked,
+            column_config={
+                "Predicted Percentile": st.column_config.ProgressColumn("Predicted %ile", min_value=0, max_value=100,
+                                                                        format="%.0f"),
+            },
+            hide_index=True,
+            use_container_width=True,
+        )
+
+
+# TAB: AI NICHE CHATBOT
+@st.fragment
+def niche_chat_tab(df, ai_enabled):
+    st.markdown("### 🤖 AI Niche Chat – Ask Anything")
+    st.caption("Ask the AI about what niche this is, who the audience is, how to grow, what to post, etc.")
+
+    # Show chat history
+    for msg in st.session_state.chat_history:
+        if msg["role"] == "user":
+            st.markdown(
+                f"<div class='chat-user'><div class='chat-user-label'>You</div>{msg['content']}</div>",
+                unsafe_allow_html=True
+            )
+        else:
+            st.markdown(
+                f"<div class='chat-bot'><div class='chat-bot-label'>YouTube AXE AI</div>{msg['content']}</div>",
+                unsafe_allow_html=True
+            )
+
+    user_q = st.text_input("Ask the AI about this niche, videos, growth, etc.", key="chat_input")
+    col_send, col_clear = st.columns([1, 1])
+    with col_send:
+        send_clicked = st.button("Send")
+    with col_clear:
+        clear_chat = st.button("Clear Chat")
+
+    if clear_chat:
+        st.session_state.chat_history = []
+        st.rerun(scope="fragment")
+
+    if send_clicked and user_q:
+        st.session_state.chat_history.append({"role": "user", "content": user_q})
+        if not ai_enabled:
+            bot_reply = "⚠️ AI offline – please add a Gemini API key in the sidebar."
+        else:
+            with st.spinner("Thinking about this niche..."):
+                bot_reply = ai_chat_about_niche(user_q, df, st.session_state.scan_query)
+        st.session_state.chat_history.append({"role": "bot", "content": bot_reply})
+        append_ai_output(st.session_state.snapshot_id, "chat", user_q, role="user")
+        append_ai_output(st.session_state.snapshot_id, "chat", bot_reply, role="bot")
+        st.rerun(scope="fragment")
+
+
+# TAB: DEEP DIVE
+@st.fragment
+def deep_dive_tab(df, ai_enabled):
+    st.markdown("### 🎬 Deep Dive Player & Niche Breakdown")
+    if st.session_state.selected_title and st.session_state.selected_title in df['Title'].values:
+        vid_row = df[df['Title'] == st.session_state.selected_title].iloc[0]
+    else:
+        vid_row = df.iloc[0]
+
+    st.markdown("#### 🔎 Transcript Search")
+    stats = index_stats()
+    query = st.text_input(
+        "Search every fetched transcript",
+        key="transcript_query",
+        placeholder='e.g. iphone 15 or "link in the description"',
+        help=f"{stats['videos']:,} transcripts indexed. Quote words to search for an exact phrase."
+    )
+    jump = None
+    if query:
+        hits = search_transcripts(query)
+        if hits.empty:
+            st.info("No indexed transcript mentions that yet.")
+        else:
+            titles = dict(zip(df['Video ID'], df['Title']))
+            hits.insert(0, 'Title', hits['Video ID'].map(titles).fillna(hits['Video ID']))
+            st.caption(f"{len(hits)} hit(s) in {hits['Video ID'].nunique()} video(s) — pick a row to play from that moment.")
+            event = st.dataframe(
+                hits[['Title', 'Time', 'Snippet', 'Hits']], use_container_width=True, hide_index=True,
+                on_select="rerun", selection_mode="single-row", key="transcript_hits"
+            )
+            if event.selection.rows:
+                jump = hits.iloc[event.selection.rows[0]]
+
+    if jump is not None:
+        st.write(f"**Now playing:** {jump['Title']} @ {jump['Time']}")
+        st.video(f"https://www.youtube.com/watch?v={jump['Video ID']}", start_time=int(jump['Start (ms)'] // 1000))
+    else:
+        st.write(f"**Now playing:** {vid_row['Title']}")
+        st.video(vid_row['Link'])
+
+    st.markdown("#### 💬 Audience Reaction")
+    k1, k2, k3 = st.columns([1, 1, 1])
+    with k1:
+        top_n = st.number_input("Top N videos by views", min_value=1, max_value=50, value=5, key="comments_top_n")
+    with k2:
+        per_video = st.number_input("Comments per video", min_value=100, max_value=100_000, value=1000,
+                                    step=100, key="comments_per_video")
+    with k3:
+        st.write("")
+        fetch_selected = st.button("Fetch for this video")
+        fetch_top = st.button(f"Fetch for top {top_n}")
+    targets = []
+    if fetch_selected:
+        targets = [vid_row['Video ID']]
+    elif fetch_top:
+        targets = df.sort_values('Views', ascending=False)['Video ID'].head(top_n).tolist()
+    if targets:
+        if not api_key:
+            st.error("❌ KEYS MISSING – Add your YouTube API key in the sidebar.")
+        else:
+            with st.spinner(f"Streaming comments for {len(targets)} video(s)..."):
+                ingest_comments(api_key, targets, per_video)
+
+    summary = load_summary(vid_row['Video ID'])
+    if summary and summary['comments']:
+        n = summary['comments']
+        st.caption(
+            f"{n:,} comments read ({summary['status']}) • avg sentiment {summary['polarity_sum'] / n:+.2f} • "
+            f"{summary['positive'] / n:.0%} positive / {summary['negative'] / n:.0%} negative"
+            + (f" • stopped early ({summary['error']}), fetch again to resume" if summary.get('error') else "")
+        )
+        r1, r2 = st.columns(2)
+        with r1:
+            st.markdown("**Top recurring requests**")
+            st.dataframe(pd.DataFrame(TopK(counts=summary['requests']).most_common(10), columns=['Request', 'Mentions']),
+                         use_container_width=True, hide_index=True)
+        with r2:
+            st.markdown("**Top comment keywords**")
+            st.dataframe(pd.DataFrame(TopK(counts=summary['keywords']).most_common(10), columns=['Keyword', 'Comments']),
+                         use_container_width=True, hide_index=True)
+    elif summary and summary['status'] == 'disabled':
+        st.info("Comments are disabled for this video.")
+
+    audience = summary_frame(df['Video ID'])
+    if not audience.empty:
+        st.markdown("**Audience sentiment across ingested videos**")
+        audience = audience.merge(df[['Video ID', 'Title', 'Views']], on='Video ID').drop(columns=['Video ID'])
+        st.dataframe(audience, use_container_width=True, hide_index=True)
+
+    if ai_enabled:
+        st.markdown("#### 🔍 AI Niche Classification for This Video")
+        if st.button("Classify Niche for Selected Video"):
+            transcript = get_transcript_text(vid_row['Video ID'])
+            with st.spinner("Classifying niche with AI..."):
+                niche_text, _, _ = ai_label_video(vid_row, transcript or "")
+            st.markdown(niche_text)
+        else:
+            st.caption(
+                f"Local model: **{vid_row['Main Niche']}** · {vid_row['Content Style']} "
+                f"(confidence {vid_row['Niche Confidence']:.2f})"
+            )
+    else:
+        st.info("Add Gemini key to unlock AI niche classification.")
+
+
+TAB_NAMES = [
+    "📂 DATABASE",
+    "✂️ EDITING LAB",
+    "🕵️ TAG SPY",
+    "📊 ANALYTICS",
+    "💡 AI IDEAS",
+    "🤖 AI NICHE CHAT",
+    "🎬 DEEP DIVE"
+]
+TAB_RENDERERS = [database_tab, editing_lab_tab, tag_spy_tab, analytics_tab, ai_ideas_tab, niche_chat_tab, deep_dive_tab]
+
+# ==========================================
+# 7. DASHBOARD UI
 # ==========================================
 st.title("🪓 YouTUBE AXE – FULL AI")
 st.caption("AI-powered YouTube market scanner • niche detector • edit lab • strategy chatbot")
@@ -438,15 +921,47 @@ with c2:
             else:
                 with st.spinner('🛰️ CONNECTING TO SATELLITE...'):
                     try:
-                        df_raw, all_tags = get_market_data(api_key, query, country_code, rpm, 50)
+                        with span("youtube.get_market_data", cache="hit"):
+                            df_raw, all_tags = load_market_data(api_key, query, country_code, rpm, 50, expand_budget)
+                        expansion = df_raw.attrs.get('expansion', [])
+                        with span("virality.corpus_score"):
+                            df_raw = score_with_corpus(df_raw, country_code)
+                        with span("titles.record", rows=len(df_raw)):
+                            record_titles(df_raw, country_code)
                         df = analyze_title_sentiment(df_raw)
+                        with span("niche.classify", rows=len(df)):
+                            df = classify_frame(df)
+                        with span("thumbnails.fetch", rows=len(df)):
+                            cache_thumbnails(df)
+                        with span("thumbnails.features", rows=len(df)):
+                            df = attach_thumbnail_features(attach_previews(df))
                         st.session_state.df = df
                         st.session_state.all_tags = all_tags
+                        st.session_state.scan_query = query
                         st.session_state.search_done = not df.empty
                         st.session_state.selected_title = df.iloc[0]['Title'] if not df.empty else None
                         st.session_state.chat_history = []
+                        st.session_state.strategy_text = None
+                        st.session_state.title_ideas = None
                         if df.empty:
                             st.error("No videos found for this query.")
+                        else:
+                            with span("snapshot.save"):
+                                snap_id = save_snapshot(query, country_code, df, all_tags, top_tags(all_tags, 200))
+                            st.session_state.snapshot_id = snap_id
+                            st.query_params["snap"] = snap_id
+                            failed_queries = [e['query'] for e in expansion if e['error']]
+                            if failed_queries:
+                                st.warning(f"⚠️ Related searches failed: {', '.join(failed_queries)}. Scan again to retry.")
+                            incomplete = df[df['Fetch Status'].ne(STATUS_OK)]
+                            if not incomplete.empty:
+                                st.warning(
+                                    f"⚠️ {len(incomplete)} of {len(df)} videos came back incomplete "
+                                    f"({', '.join(incomplete['Fetch Status'].unique())}). "
+                                    "They are marked in the DATABASE 'Fetch Status' column; scan again to retry."
+                                )
+                    except CircuitOpen:
+                        st.error("⚠️ YouTube is failing right now, so calls are paused for a few seconds. Try again shortly.")
                     except Exception as e:
                         st.error(f"Error: {e}")
         else:
@@ -479,218 +994,37 @@ if st.session_state.search_done:
         )
     with m4:
         st.markdown(
-            f"<div class='hud-card'><div class='hud-label'>Max Virality</div>"
+            f"<div class='hud-card'><div class='hud-label'>Max Virality (vs {df['Corpus Size'].iloc[0]:,} videos)</div>"
             f"<div class='hud-value'>{df['Virality Score'].max():.0f}</div></div>",
             unsafe_allow_html=True
         )
 
     st.write("")
-    tabs = st.tabs([
-        "📂 DATABASE",
-        "✂️ EDITING LAB",
-        "🕵️ TAG SPY",
-        "📊 ANALYTICS",
-        "💡 AI IDEAS",
-        "🤖 AI NICHE CHAT",
-        "🎬 DEEP DIVE"
-    ])
-
-    # TAB 1: DATABASE
-    with tabs[0]:
-        st.markdown("### 📂 Market Database")
-        st.dataframe(
-            df[['Thumbnail', 'Title', 'Views', 'Duration', 'Virality Score', 'Engagement', 'Sentiment Label', 'Link']], 
-            column_config={
-                "Thumbnail": st.column_config.ImageColumn("Preview"), 
-                "Virality Score": st.column_config.ProgressColumn("Score", min_value=0, max_value=100),
-                "Engagement": st.column_config.NumberColumn("Engagement %", format="%.2f"),
-                "Sentiment Label": st.column_config.TextColumn("Sentiment"),
-                "Link": st.column_config.LinkColumn("▶️ WATCH")
-            }, 
-            use_container_width=True,
-            height=600
-        )
-
-    # TAB 2: EDITING LAB
-    with tabs[1]:
-        c1, c2 = st.columns([1, 1])
-        
-        with c1:
-            st.markdown("### 🎯 TARGET ACQUISITION")
-            target = st.selectbox("Select Video:", df['Title'].tolist(), label_visibility="collapsed")
-            st.session_state.selected_title = target
-            row = df[df['Title'] == target].iloc[0]
-            
-            st.image(row['Thumbnail'], use_container_width=True)
-            
-            st.markdown(f"""
-            <div style='display: flex; justify-content: space-between; margin-top: 10px;'>
-                <div class='hud-card' style='flex:1; margin-right:5px;'>
-                    <div class='hud-label'>DURATION</div>
-                    <div class='hud-value'>{row['Duration']}m</div>
-                </div>
-                <div class='hud-card' style='flex:1; margin-left:5px;'>
-                    <div class='hud-label'>VIRALITY</div>
-                    <div class='hud-value'>{row['Virality Score']:.0f}</div>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-
-        with c2:
-            st.markdown("### 🧬 FORENSIC TOOLS")
-            st.info("AI Editor is ready to break down the timeline and edit style.")
-            
-            if ai_enabled:
-                if st.button("🔍 RUN EDITING AUTOPSY", type="primary", use_container_width=True):
-                    open_forensic_lab(row['Video ID'], row['Title'], row['Duration'])
-            else:
-                st.warning("AI MODULE OFFLINE")
-
-    # TAB 3: TAG SPY
-    with tabs[2]:
-        c1, c2 = st.columns([1, 2])
-        with c1:
-            st.markdown("### 📋 SEO DATA")
-            tag_counts = Counter(st.session_state.all_tags).most_common(50)
-            tags_text = ", ".join([t[0] for t in tag_counts]) if tag_counts else ""
-            st.text_area("Tags", tags_text, height=300)
-        with c2:
-            st.markdown("### ☁️ Tag Cloud")
-            if st.session_state.all_tags:
-                wc = WordCloud(
-                    width=800, 
-                    height=400, 
-                    background_color='#000000', 
-                    colormap='Greens'
-                ).generate_from_frequencies(dict(tag_counts))
-                fig, ax = plt.subplots()
-                plt.imshow(wc, interpolation='bilinear')
-                plt.axis("off")
-                fig.patch.set_facecolor('#000000')
-                st.pyplot(fig)
-            else:
-                st.info("No tags detected.")
-
-    # TAB 4: ANALYTICS
-    with tabs[3]:
-        st.markdown("### 📊 Market Analytics")
-        a1, a2 = st.columns(2)
-        with a1:
-            st.subheader("Views Distribution")
-            fig, ax = plt.subplots()
-            sns.histplot(df['Views'], bins=20, ax=ax)
-            ax.set_xlabel("Views")
-            ax.set_ylabel("Count")
-            st.pyplot(fig)
-
-        with a2:
-            st.subheader("Virality vs Engagement")
-            fig2, ax2 = plt.subplots()
-            ax2.scatter(df['Virality Score'], df['Engagement'])
-            ax2.set_xlabel("Virality Score")
-            ax2.set_ylabel("Engagement %")
-            st.pyplot(fig2)
-
-        st.subheader("Top 10 Videos by Virality")
-        top10 = df.sort_values('Virality Score', ascending=False).head(10)[
-            ['Title', 'Views', 'Virality Score', 'Engagement', 'Earnings']
-        ]
-        st.dataframe(top10, use_container_width=True)
-
-        st.subheader("Title Sentiment Breakdown")
-        st.write(df['Sentiment Label'].value_counts())
-
-        if ai_enabled:
-            st.subheader("🧠 AI Niche Strategy Summary")
-            if st.button("Generate Niche Strategy"):
-                with st.spinner("Analyzing niche pattern with AI..."):
-                    strat = ai_niche_strategy(df, query)
-                st.markdown(strat)
-
-    # TAB 5: AI IDEAS
-    with tabs[4]:
-        st.markdown("### 💡 AI Idea Lab – Titles & Concepts")
-        col_idea, col_niche = st.columns(2)
-        with col_idea:
-            base_idea = st.text_input("Your rough video idea", placeholder="e.g. 'AI will replace X in Dubai'")
-        with col_niche:
-            niche_desc = st.text_input("Your channel niche", placeholder="e.g. 'AI & Business in Dubai'")
-        
-        if ai_enabled:
-            if st.button("⚡ Generate Title Pack"):
-                if not base_idea:
-                    st.warning("Please enter a base idea.")
-                else:
-                    with st.spinner("Summoning title wizard..."):
-                        ideas = ai_title_ideas(base_idea, niche_desc)
-                    st.markdown(ideas)
-        else:
-            st.warning("AI MODULE OFFLINE – Add Gemini key in sidebar.")
-
-    # TAB 6: AI NICHE CHATBOT
-    with tabs[5]:
-        st.markdown("### 🤖 AI Niche Chat – Ask Anything")
-        st.caption("Ask the AI about what niche this is, who the audience is, how to grow, what to post, etc.")
-        
-        # Show chat history
-        for msg in st.session_state.chat_history:
-            if msg["role"] == "user":
-                st.markdown(
-                    f"<div class='chat-user'><div class='chat-user-label'>You</div>{msg['content']}</div>",
-                    unsafe_allow_html=True
-                )
-            else:
-                st.markdown(
-                    f"<div class='chat-bot'><div class='chat-bot-label'>YouTube AXE AI</div>{msg['content']}</div>",
-                    unsafe_allow_html=True
-                )
-
-        user_q = st.text_input("Ask the AI about this niche, videos, growth, etc.", key="chat_input")
-        col_send, col_clear = st.columns([1, 1])
-        with col_send:
-            send_clicked = st.button("Send")
-        with col_clear:
-            clear_chat = st.button("Clear Chat")
-
-        if clear_chat:
-            st.session_state.chat_history = []
-            st.experimental_rerun()
-
-        if send_clicked and user_q:
-            st.session_state.chat_history.append({"role": "user", "content": user_q})
-            if not ai_enabled:
-                bot_reply = "⚠️ AI offline – please add a Gemini API key in the sidebar."
-            else:
-                with st.spinner("Thinking about this niche..."):
-                    bot_reply = ai_chat_about_niche(user_q, df, query)
-            st.session_state.chat_history.append({"role": "bot", "content": bot_reply})
-            st.experimental_rerun()
-
-    # TAB 7: DEEP DIVE
-    with tabs[6]:
-        st.markdown("### 🎬 Deep Dive Player & Niche Breakdown")
-        if st.session_state.selected_title and st.session_state.selected_title in df['Title'].values:
-            vid_row = df[df['Title'] == st.session_state.selected_title].iloc[0]
-        else:
-            vid_row = df.iloc[0]
-
-        st.write(f"**Now playing:** {vid_row['Title']}")
-        st.video(vid_row['Link'])
-
-        if ai_enabled:
-            st.markdown("#### 🔍 AI Niche Classification for This Video")
-            if st.button("Classify Niche for Selected Video"):
-                transcript = get_transcript_text(vid_row['Video ID'])
-                tags_subset = ", ".join(df[df['Video ID'] == vid_row['Video ID']].index.astype(str))
-                with st.spinner("Classifying niche with AI..."):
-                    niche_text = ai_niche_for_video(
-                        title=vid_row['Title'],
-                        tags=tags_subset,
-                        description="",  # could fetch from API if needed
-                        transcript=transcript or ""
-                    )
-                st.markdown(niche_text)
-        else:
-            st.info("Add Gemini key to unlock AI niche classification.")
+    tabs = st.tabs(TAB_NAMES, key="main_tab", on_change="rerun")
+    # Only the open tab runs; switching tabs triggers a rerun that renders the new one.
+    for tab, render in zip(tabs, TAB_RENDERERS):
+        with tab:
+            if tab.open:
+                render(df, ai_enabled)
 else:
     st.info("Enter a topic above and hit **INITIALIZE SCAN** to start the AI analysis.")
+
+# ==========================================
+# 8. PERFORMANCE PANEL
+# ==========================================
+with st.sidebar:
+    with st.expander("⏱️ PERFORMANCE", expanded=False):
+        spans = run_spans()
+        if spans:
+            top_level = sum(sp['ms'] for sp in spans if sp['depth'] == 0)
+            st.caption(f"This rerun: {top_level:,.0f} ms instrumented across {len(spans)} spans")
+            st.dataframe(pd.DataFrame(spans).drop(columns=['ts', 'run']), use_container_width=True, hide_index=True)
+        else:
+            st.caption("No instrumented work in this rerun.")
+        degraded = [b for b in breaker_states() if b['state'] != 'closed']
+        if degraded:
+            st.warning("Circuit open: " + ", ".join(f"{b['endpoint']} ({b['state']})" for b in degraded))
+        if st.checkbox("Show p50 / p95 from log", key="perf_show_log"):
+            st.dataframe(latency_summary(), use_container_width=True)
+            st.caption("Gemini latency per model (drives hedging)")
+            st.dataframe(model_latency_frame(), use_container_width=True)
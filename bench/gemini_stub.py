@@ -0,0 +1,115 @@
+"""Local stand-in for the Gemini generateContent REST endpoint.
+
+    python bench/gemini_stub.py --port 8790 --latency gemini-1.5-pro=4 gemini-1.5-flash=0.8
+
+Point the dashboard (or model_router) at it with
+
+    AXE_GEMINI_ENDPOINT=http://127.0.0.1:8790 streamlit run appui.py
+
+Each model answers after its configured latency (seconds, +-JITTER) so the
+router's deadlines and hedged requests can be exercised without a key.
+Replies echo the model name, return the text of bench/fixtures/gemini_niche.json
+for niche prompts, and a schema-shaped JSON array for batched label prompts.
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+PATH_RE = re.compile(r"/v1beta/models/([^/:]+):generateContent")
+DEFAULT_LATENCY = 0.5
+JITTER = 0.2
+
+
+def _niche_text():
+    try:
+        with open(os.path.join(FIXTURES, "gemini_niche.json"), encoding="utf-8") as f:
+            return json.load(f)["text"]
+    except (OSError, ValueError, KeyError):
+        return "**Main Niche:** Stub\n**Content Style:** educational"
+
+
+def _batch_reply(prompt):
+    items = json.loads(prompt[prompt.index("VIDEOS:") + len("VIDEOS:"):].strip())
+    return json.dumps([
+        {"id": it["id"], "niche": "Tech & Gadgets", "style": "educational",
+         "hook_score": round(random.uniform(0, 10), 1), "pacing_score": round(random.uniform(0, 10), 1)}
+        for it in items
+    ])
+
+
+def default_reply(model, prompt):
+    if "VIDEOS:" in prompt:
+        return _batch_reply(prompt)
+    if "Main Niche" in prompt:
+        return _niche_text()
+    return f"[{model}] stub reply to a {len(prompt)}-char prompt."
+
+
+def make_handler(latency, reply=default_reply):
+    """Request handler class answering generateContent with per-model latency."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            m = PATH_RE.search(self.path)
+            if not m:
+                self.send_error(404)
+                return
+            model = m.group(1)
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            prompt = "".join(p.get("text", "") for c in body.get("contents", []) for p in c.get("parts", []))
+            delay = latency.get(model, latency.get("*", DEFAULT_LATENCY))
+            time.sleep(max(0.0, delay * random.uniform(1 - JITTER, 1 + JITTER)))
+            text = reply(model, prompt)
+            payload = json.dumps({
+                "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP", "index": 0}],
+                "usageMetadata": {"promptTokenCount": len(prompt) // 4, "candidatesTokenCount": len(text) // 4,
+                                  "totalTokenCount": (len(prompt) + len(text)) // 4},
+            }).encode("utf-8")
+            try:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # client gave up (deadline / hedge won)
+
+    return Handler
+
+
+def serve(port=8790, latency=None, reply=default_reply, background=True):
+    """Start the stub; returns the server (call .shutdown() to stop)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency or {}, reply))
+    server.daemon_threads = True
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    else:
+        server.serve_forever()
+    return server
+
+
+def parse_latency(pairs):
+    out = {}
+    for pair in pairs or []:
+        model, _, seconds = pair.partition("=")
+        out[model if seconds else "*"] = float(seconds or model)
+    return out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--latency", nargs="*", help="model=seconds pairs; a bare number sets the default")
+    args = parser.parse_args()
+    print(f"Gemini stub on http://127.0.0.1:{args.port}", file=sys.stderr)
+    serve(args.port, parse_latency(args.latency), background=False)
@@ -0,0 +1,267 @@
+"""Concurrent-session load test for appui.py.
+
+    python bench/load_test.py                                  # 1, 2, 4, 8 sessions
+    python bench/load_test.py --sessions 4 16 --rounds 2 --think 0.2
+    python bench/load_test.py --max-p95-ms 1500               # exit 1 if any level's p95 is over
+
+Every simulated session is a Streamlit AppTest driving the real script
+through an analyst's click path: load, scan a query, visit every tab, pick
+a few videos in EDITING LAB, ask the niche chat a question. AppTest swaps
+process-wide Streamlit state on every run, so each session gets its own
+process; they are released together and share DATA_DIR and the SQLite
+shared cache the way replicas do, and compete for the same CPUs. YouTube
+and Gemini are the local stubs in bench/ (latency set with
+--youtube-latency and --gemini-latency), thumbnails come from the YouTube
+stub and transcripts are pre-seeded, so no keys or network are needed.
+
+For each session count it reports p50/p95/p99/max rerun latency, CPU summed
+over the session processes (100% = one core), peak RSS per session and in
+total, and writes bench/results/load_latest.json. The capacity line is the
+largest session count whose p95 stayed under --max-p95-ms.
+"""
+import os
+import sys
+import json
+import time
+import random
+import resource
+import argparse
+import tempfile
+import platform
+import multiprocessing as mp
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+APP = os.path.join(ROOT, "appui.py")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+SESSIONS = [1, 2, 4, 8]
+QUERIES = ["minecraft survival", "dubai ai business", "iphone review", "crypto news", "budget travel",
+           "home workout", "easy recipe", "gaming challenge"]
+CHAT_QUESTION = "What niche is this and what should a new creator post first?"
+# AppTest replays a click inside a fragment as a full rerun, where st.rerun(scope="fragment")
+# raises after the handler has done its work. The real server reruns just the fragment.
+FULL_RERUN_ARTIFACT = 'scope="fragment" can only be specified'
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sessions", type=int, nargs="+", default=SESSIONS, help="concurrent session counts to run")
+    ap.add_argument("--rounds", type=int, default=1, help="click paths per session at each level")
+    ap.add_argument("--think", type=float, default=0.5, help="mean pause between clicks, seconds")
+    ap.add_argument("--videos", type=int, default=3, help="videos picked in EDITING LAB per round")
+    ap.add_argument("--youtube-latency", nargs="*", default=["search=0.4", "videos=0.15", "channels=0.1"],
+                    help="endpoint=seconds pairs for the YouTube stub")
+    ap.add_argument("--gemini-latency", nargs="*", default=["1.0"], help="model=seconds pairs for the Gemini stub")
+    ap.add_argument("--youtube-port", type=int, default=8791)
+    ap.add_argument("--gemini-port", type=int, default=8790)
+    ap.add_argument("--timeout", type=float, default=180, help="per-rerun AppTest timeout, seconds")
+    ap.add_argument("--max-p95-ms", type=float, help="fail (exit 1) when a level's p95 rerun latency is above this")
+    ap.add_argument("--out", default=os.path.join(RESULTS_DIR, "load_latest.json"))
+    return ap.parse_args()
+
+
+def setup_environment(args):
+    """Fresh data dir, stubs started and pointed at; must run before appui's modules are imported."""
+    os.environ.setdefault("AXE_DATA_DIR", tempfile.mkdtemp(prefix="axe_load_"))
+    os.environ["AXE_YOUTUBE_ENDPOINT"] = f"http://127.0.0.1:{args.youtube_port}"
+    os.environ["AXE_GEMINI_ENDPOINT"] = f"http://127.0.0.1:{args.gemini_port}"
+    # Deprecation chatter and bare-mode warnings from N sessions drown the report; errors are collected per step.
+    os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "critical")
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, BENCH_DIR)
+    import gemini_stub
+    import youtube_stub
+
+    youtube_stub.serve(args.youtube_port, youtube_stub.parse_latency(args.youtube_latency))
+    gemini_stub.serve(args.gemini_port, gemini_stub.parse_latency(args.gemini_latency))
+    seed_transcripts(youtube_stub.video_ids())
+
+
+def seed_transcripts(video_ids):
+    """Cached captions for two thirds of the stub's videos (the rest have none), as after a warm backfill."""
+    from storage import data_path
+
+    words = "you never guess why this works so watch what happens next today it is insane".split()
+    for i, vid in enumerate(video_ids):
+        rng = random.Random(vid)
+        segments, t = [], 0.0
+        if i % 3:
+            for _ in range(rng.randint(80, 240)):
+                dur = rng.uniform(1.0, 4.5)
+                segments.append({"text": " ".join(rng.choices(words, k=rng.randint(3, 12))), "start": round(t, 2),
+                                 "duration": round(dur, 2)})
+                t += dur + rng.choice([0.0, 0.1, 0.4, 1.8])
+        with open(data_path("transcripts", f"{vid}.json"), "w", encoding="utf-8") as f:
+            json.dump(segments, f)
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10  # bytes on macOS, KB on Linux
+
+
+class Session:
+    """One simulated analyst; every rerun's wall time goes to `timings` as (step, seconds, error or None)."""
+
+    def __init__(self, index, args):
+        from streamlit.testing.v1 import AppTest
+
+        self.index, self.args, self.timings = index, args, []
+        self.rng = random.Random(index)
+        self.at = AppTest.from_file(APP, default_timeout=args.timeout)
+        self.at.secrets["YOUTUBE_API_KEY"] = "stub"
+        self.at.secrets["GOOGLE_API_KEY"] = "stub"
+
+    def _rerun(self, step, widget=None):
+        time.sleep(self.rng.expovariate(1 / self.args.think) if self.args.think > 0 else 0)
+        t0 = time.perf_counter()
+        error = None
+        try:
+            (widget or self.at).run()
+            errors = [e.message for e in self.at.exception if FULL_RERUN_ARTIFACT not in e.message]
+            error = errors[0] if errors else None
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        self.timings.append((step, time.perf_counter() - t0, error))
+
+    def click_path(self, round_no):
+        at = self.at
+        self._rerun("load")
+        query = QUERIES[(self.index + round_no) % len(QUERIES)]
+        next(t for t in at.text_input if t.label == "TARGET VECTOR").set_value(query)
+        self._rerun("scan", next(b for b in at.button if b.label == "🚀 INITIALIZE SCAN").click())
+        if "df" not in at.session_state or at.session_state["df"].empty:
+            return
+        for tab in [t.label for t in at.tabs]:
+            at.session_state["main_tab"] = tab
+            self._rerun(f"tab {tab}")
+            if "EDITING LAB" in tab:
+                titles = at.session_state["df"]["Title"].tolist()
+                for title in self.rng.sample(titles, min(self.args.videos, len(titles))):
+                    self._rerun("select video", next(s for s in at.selectbox if s.label == "Select Video:")
+                                .set_value(title))
+            elif "CHAT" in tab:
+                at.text_input(key="chat_input").input(CHAT_QUESTION)
+                self._rerun("chat", next(b for b in at.button if b.label == "Send").click())
+
+    def run(self):
+        for round_no in range(self.args.rounds):
+            try:
+                self.click_path(round_no)
+            except Exception as e:  # a widget the path expected wasn't rendered
+                self.timings.append(("click path", 0.0, f"{type(e).__name__}: {e}"))
+
+
+def _session_process(index, args, ready, go, out):
+    sys.path.insert(0, ROOT)
+    from streamlit.logger import set_log_level
+
+    # Untimed warm-up so the first measured rerun is a new session, not this process importing the app.
+    Session(index, args).at.run()
+    # Only now does every streamlit logger exist; app exceptions are counted per step, not printed N times.
+    set_log_level("critical")
+    session = Session(index, args)
+    ready.put(index)
+    go.wait()
+    cpu_start = time.process_time()
+    session.run()
+    out.put({"timings": session.timings, "cpu_s": time.process_time() - cpu_start, "rss_mb": peak_rss_mb()})
+
+
+def percentile_ms(values, q):
+    return round(float(np.percentile(values, q)) * 1000, 1) if values else None
+
+
+def run_level(n, args):
+    """Start n session processes, release them together and collect their reruns."""
+    ctx = mp.get_context("spawn")
+    ready, out, go = ctx.Queue(), ctx.Queue(), ctx.Event()
+    procs = [ctx.Process(target=_session_process, args=(i, args, ready, go, out), daemon=True) for i in range(n)]
+    for p in procs:
+        p.start()
+    for _ in procs:
+        ready.get(timeout=args.timeout)
+    wall_start = time.perf_counter()
+    go.set()
+    reports = [out.get(timeout=args.timeout * 20) for _ in procs]
+    wall = time.perf_counter() - wall_start
+    for p in procs:
+        p.join()
+
+    timings = [t for r in reports for t in r["timings"]]
+    seconds = [s for step, s, _ in timings if step != "click path"]
+    steps, errors = {}, {}
+    for step, s, error in timings:
+        steps.setdefault(step, []).append(s)
+        if error:
+            key = f"{step}: {error[:160]}"
+            errors[key] = errors.get(key, 0) + 1
+    rss = [r["rss_mb"] for r in reports]
+    return {
+        "sessions": n,
+        "reruns": len(seconds),
+        "errors": sum(errors.values()),
+        "error_samples": errors,
+        "p50_ms": percentile_ms(seconds, 50),
+        "p95_ms": percentile_ms(seconds, 95),
+        "p99_ms": percentile_ms(seconds, 99),
+        "max_ms": percentile_ms(seconds, 100),
+        "wall_s": round(wall, 2),
+        "cpu_pct": round(sum(r["cpu_s"] for r in reports) / wall * 100, 1),
+        "rss_per_session_mb": round(float(np.mean(rss)), 1),
+        "rss_total_mb": round(float(np.sum(rss)), 1),
+        "steps_p95_ms": {k: percentile_ms(v, 95) for k, v in sorted(steps.items())},
+    }
+
+
+def main():
+    args = parse_args()
+    setup_environment(args)
+
+    levels = []
+    print(f"{'sessions':>8} {'reruns':>7} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} "
+          f"{'cpu %':>7} {'MB/sess':>8} {'MB total':>9}")
+    for n in args.sessions:
+        r = run_level(n, args)
+        levels.append(r)
+        print(f"{r['sessions']:>8} {r['reruns']:>7} {r['errors']:>6} {r['p50_ms']:>9} {r['p95_ms']:>9} "
+              f"{r['p99_ms']:>9} {r['max_ms']:>9} {r['cpu_pct']:>7} {r['rss_per_session_mb']:>8} "
+              f"{r['rss_total_mb']:>9}")
+
+    slowest = levels[-1]["steps_p95_ms"]
+    print(f"p95 by step at {levels[-1]['sessions']} sessions:")
+    for step, ms in sorted(slowest.items(), key=lambda kv: -kv[1]):
+        print(f"    {ms:>9} ms  {step}")
+
+    capacity = None
+    if args.max_p95_ms:
+        within = [r["sessions"] for r in levels if r["p95_ms"] is not None and r["p95_ms"] <= args.max_p95_ms]
+        capacity = max(within) if within else 0
+        print(f"capacity: {capacity} concurrent sessions with p95 <= {args.max_p95_ms:.0f} ms")
+    result = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "node": platform.node(),
+            "cpus": os.cpu_count(),
+            "args": {k: v for k, v in vars(args).items() if k != "out"},
+        },
+        "levels": levels,
+        "capacity": capacity,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump(result, f, indent=1)
+    failed = [r for r in levels if r["errors"] or (args.max_p95_ms and r["p95_ms"] > args.max_p95_ms)]
+    for r in failed:
+        print(f"FAIL at {r['sessions']} sessions: p95 {r['p95_ms']} ms, {r['errors']} errors")
+        for error, count in r["error_samples"].items():
+            print(f"    {count}x {error}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
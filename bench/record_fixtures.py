@@ -0,0 +1,98 @@
+"""Record the API responses the benchmark suite replays.
+
+    python bench/record_fixtures.py --live "AI News"   # needs YOUTUBE_API_KEY / GOOGLE_API_KEY
+    python bench/record_fixtures.py --synthetic        # offline, API-shaped stand-ins
+"""
+import os
+import sys
+import json
+import random
+import argparse
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORDS = (
+    "ai money gaming minecraft recipe travel dubai iphone review challenge vlog news crypto workout "
+    "story how to make build best ever million hours secret truth explained beginners pro"
+).split()
+
+GEMINI_NICHE_TEXT = """**Main Niche:** AI & Software
+**Sub Niches:** AI tools, productivity, side hustles
+**Audience Type:** Young professionals curious about automation
+**Content Style:** educational / commentary
+"""
+
+
+def _dump(name, payload):
+    os.makedirs(FIXTURES, exist_ok=True)
+    with open(os.path.join(FIXTURES, name), "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=1)
+
+
+def synthetic(n=50, seed=7):
+    rng = random.Random(seed)
+    items = []
+    for i in range(n):
+        vid = "".join(rng.choice("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_") for _ in range(11))
+        views = rng.randint(10_000, 50_000_000)
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 10))).title()
+        items.append({
+            "kind": "youtube#video",
+            "id": vid,
+            "snippet": {
+                "publishedAt": f"202{rng.randint(0, 5)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T"
+                               f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00Z",
+                "channelId": "UC" + vid * 2,
+                "title": title,
+                "description": " ".join(rng.choice(WORDS) for _ in range(60)),
+                "thumbnails": {
+                    size: {"url": f"https://i.ytimg.com/vi/{vid}/{size}default.jpg", "width": w, "height": h}
+                    for size, w, h in [("medium", 320, 180), ("high", 480, 360), ("maxres", 1280, 720)]
+                },
+                "tags": [rng.choice(WORDS) + " " + rng.choice(WORDS) for _ in range(rng.randint(0, 15))],
+            },
+            "contentDetails": {"duration": f"PT{rng.randint(0, 2)}H{rng.randint(0, 59)}M{rng.randint(1, 59)}S"},
+            "statistics": {
+                "viewCount": str(views),
+                "likeCount": str(views // rng.randint(20, 80)),
+                "commentCount": str(views // rng.randint(200, 2000)),
+            },
+        })
+    _dump("youtube_search.json", {"items": [{"id": {"kind": "youtube#video", "videoId": it["id"]}} for it in items]})
+    _dump("youtube_videos.json", {"items": items})
+    _dump("gemini_niche.json", {"text": GEMINI_NICHE_TEXT})
+
+
+def live(query, region="US"):
+    from googleapiclient.discovery import build
+    import google.generativeai as genai
+    from prompts import build_niche_prompt
+
+    youtube = build('youtube', 'v3', developerKey=os.environ["YOUTUBE_API_KEY"])
+    search = youtube.search().list(
+        part="snippet", q=query, type="video", regionCode=region, maxResults=50, order="viewCount"
+    ).execute()
+    ids = [item['id']['videoId'] for item in search.get('items', [])]
+    videos = youtube.videos().list(part="snippet,statistics,contentDetails", id=",".join(ids)).execute()
+    _dump("youtube_search.json", search)
+    _dump("youtube_videos.json", videos)
+
+    genai.configure(api_key=os.environ["GOOGLE_API_KEY"])
+    first = videos["items"][0]["snippet"]
+    text = genai.GenerativeModel('gemini-1.0-pro').generate_content(
+        build_niche_prompt(first["title"], ", ".join(first.get("tags", [])), first.get("description", ""))
+    ).text
+    _dump("gemini_niche.json", {"text": text})
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--live", metavar="QUERY")
+    ap.add_argument("--synthetic", action="store_true")
+    args = ap.parse_args()
+    if args.live:
+        live(args.live)
+    else:
+        synthetic()
@@ -0,0 +1,171 @@
+"""Offline microbenchmarks for the dashboard's hot paths.
+
+    python bench/run_bench.py                      # run, write bench/results/latest.json, compare to baseline
+    python bench/run_bench.py --save-baseline      # run and store the result as bench/baseline.json
+    python bench/run_bench.py --sizes 50 500       # subset of corpus sizes
+    python bench/run_bench.py --check              # CI gate: also exits 1 when there is no baseline
+
+Replays the recorded responses in bench/fixtures (see record_fixtures.py),
+scaled up to each size, so no API keys or network are needed. Exits 1 when a
+case's median is slower than the baseline by more than --threshold. Baselines
+are machine-specific and not committed; without --check a missing one is
+only reported.
+"""
+import os
+import sys
+import json
+import time
+import copy
+import platform
+import argparse
+import statistics
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+# Keep corpus sketches / label caches written during the run out of the real data dir.
+os.environ.setdefault("AXE_DATA_DIR", tempfile.mkdtemp(prefix="axe_bench_"))
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+from charts import tag_cloud_figure, top_tags, views_histogram_figure, virality_scatter_figure
+from clustering import cluster_frame
+from market import analyze_title_sentiment, parse_video_items
+from niche_classifier import classify_frame, parse_ai_label
+from prompts import build_chat_prompt, build_forensic_prompt, build_strategy_prompt
+from publish_timing import age_adjusted_rank, publish_heatmap
+
+SIZES = [50, 500, 5000, 50000]
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+# Tiny cases are noisy; ignore regressions smaller than this in absolute terms.
+MIN_DELTA_S = 0.002
+
+
+def load_fixture(name):
+    with open(os.path.join(BENCH_DIR, "fixtures", name), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def scaled_items(items, n):
+    """Repeat recorded items up to n, giving every copy a unique video ID."""
+    out = []
+    for i in range(n):
+        item = copy.deepcopy(items[i % len(items)])
+        item['id'] = f"{item['id']}_{i}"
+        out.append(item)
+    return out
+
+
+def _figure(builder):
+    def run(*args):
+        plt.close(builder(*args))
+    return run
+
+
+def cases(n, items, gemini_text):
+    """(name, fn, args) for one corpus size; setup work happens here, not in the timed call."""
+    scaled = scaled_items(items, n)
+    df, all_tags = parse_video_items(scaled, 3.0)
+    df['Virality Score'] = (df['Virality Raw'] / df['Virality Raw'].max() * 100).round(0)
+    scored = analyze_title_sentiment(df)
+    transcript = " ".join(scored['Description'].head(50))
+    return [
+        ("parse_video_items", parse_video_items, (scaled, 3.0)),
+        ("analyze_title_sentiment", analyze_title_sentiment, (df,)),
+        ("top_tags", top_tags, (all_tags,)),
+        ("tag_cloud_figure", _figure(tag_cloud_figure), (top_tags(all_tags),)),
+        ("views_histogram_figure", _figure(views_histogram_figure), (df,)),
+        ("virality_scatter_figure", _figure(virality_scatter_figure), (df,)),
+        ("classify_frame", classify_frame, (df,)),
+        ("cluster_frame", cluster_frame, (df,)),
+        ("publish_heatmap", publish_heatmap, (df, "America/New_York")),
+        ("age_adjusted_rank", age_adjusted_rank, (df,)),
+        ("build_strategy_prompt", build_strategy_prompt, (df, "bench")),
+        ("build_chat_prompt", build_chat_prompt, ("what niche is this?", scored, "bench")),
+        ("build_forensic_prompt", build_forensic_prompt, (transcript, df['Title'].iloc[0], 12.5)),
+        ("parse_ai_label", parse_ai_label, (gemini_text,)),
+    ]
+
+
+def time_case(fn, args, repeat):
+    fn(*args)  # warm caches / lazy imports
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(*args)
+        runs.append(time.perf_counter() - t0)
+    return {"median_s": statistics.median(runs), "best_s": min(runs), "runs": len(runs)}
+
+
+def run(sizes, only=None):
+    items = load_fixture("youtube_videos.json")["items"]
+    gemini_text = load_fixture("gemini_niche.json")["text"]
+    results = {}
+    for n in sizes:
+        repeat = 7 if n <= 500 else 3 if n <= 5000 else 1
+        for name, fn, args in cases(n, items, gemini_text):
+            if only and name not in only:
+                continue
+            key = f"{name}@{n}"
+            results[key] = time_case(fn, args, repeat)
+            print(f"{key:<36} {results[key]['median_s'] * 1000:10.2f} ms")
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "node": platform.node(),
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold):
+    regressions = []
+    for key, cur in current["results"].items():
+        base = baseline["results"].get(key)
+        if not base:
+            continue
+        ratio = cur["median_s"] / max(base["median_s"], 1e-9)
+        if ratio > 1 + threshold and cur["median_s"] - base["median_s"] > MIN_DELTA_S:
+            regressions.append((key, base["median_s"], cur["median_s"], ratio))
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    ap.add_argument("--only", nargs="+", help="case names to run")
+    ap.add_argument("--out", default=os.path.join(RESULTS_DIR, "latest.json"))
+    ap.add_argument("--baseline", default=BASELINE)
+    ap.add_argument("--save-baseline", action="store_true")
+    ap.add_argument("--check", action="store_true", help="fail when there is no baseline to compare against")
+    ap.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown ratio (0.25 = 25%%)")
+    args = ap.parse_args()
+
+    current = run(args.sizes, args.only)
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump(current, f, indent=1)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=1)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --save-baseline on the reference machine to create one")
+        return 1 if args.check else 0
+    with open(args.baseline) as f:
+        regressions = compare(current, json.load(f), args.threshold)
+    for key, base, cur, ratio in regressions:
+        print(f"REGRESSION {key}: {base * 1000:.2f} ms -> {cur * 1000:.2f} ms ({ratio:.2f}x)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
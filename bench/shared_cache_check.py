@@ -0,0 +1,116 @@
+"""Multi-process check of shared_cache.shared_call.
+
+    python bench/shared_cache_check.py                 # 8 worker processes per scenario
+    python bench/shared_cache_check.py --workers 16
+
+Each scenario starts worker processes against one fresh SQLite cache file,
+the way several Streamlit replicas would share a volume:
+
+  single-flight   every worker asks for the same key at once; the slow call
+                  must run exactly once and every worker must get its result
+  owner-crash     the first owner dies mid-call; its lease lapses and exactly
+                  one waiter takes over
+  owner-error     the first owner raises; nothing is cached and one waiter
+                  makes the call itself
+  distinct-keys   every worker uses its own key; all of them run in parallel
+
+Exits 1 if any scenario fails.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import multiprocessing as mp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CALL_SECONDS = 0.5
+LEASE = 1.0
+
+
+def _count(path):
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        return sum(1 for _ in f)
+
+
+def _worker(cache, calls, scenario, index, start_at, out):
+    os.environ["AXE_SHARED_CACHE"] = cache
+    import shared_cache
+
+    def slow_call():
+        with open(calls, "a") as f:
+            f.write(f"{os.getpid()}\n")
+        first = _count(calls) == 1
+        if scenario == "owner-crash" and first:
+            os._exit(3)  # killed mid-call: no release, the lease has to lapse
+        if scenario == "owner-error" and first:
+            raise RuntimeError("backend said no")
+        time.sleep(CALL_SECONDS)
+        return {"pid": os.getpid(), "payload": "x" * 1000}
+
+    key = ("key", index) if scenario == "distinct-keys" else ("key",)
+    time.sleep(max(0.0, start_at - time.time()))
+    t0 = time.perf_counter()
+    try:
+        value = shared_cache.shared_call("check", key, slow_call, ttl=60, lease=LEASE)
+        out.put((index, value["pid"], time.perf_counter() - t0, None))
+    except Exception as e:
+        out.put((index, None, time.perf_counter() - t0, type(e).__name__))
+
+
+def run_scenario(scenario, workers):
+    tmp = tempfile.mkdtemp(prefix="axe_shared_")
+    cache, calls = os.path.join(tmp, "cache.db"), os.path.join(tmp, "calls.log")
+    ctx = mp.get_context("spawn")
+    out = ctx.Queue()
+    start_at = time.time() + 2.0  # let every interpreter finish importing first
+    procs = [ctx.Process(target=_worker, args=(cache, calls, scenario, i, start_at, out)) for i in range(workers)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(60)
+    results = []
+    while not out.empty():
+        results.append(out.get())
+    crashed = sum(p.exitcode == 3 for p in procs)
+    return results, _count(calls), crashed
+
+
+def check(scenario, results, calls, crashed, workers):
+    ok_results = [r for r in results if r[3] is None]
+    errors = [r for r in results if r[3] is not None]
+    producers = {r[1] for r in ok_results}
+    if scenario == "single-flight":
+        return calls == 1 and len(ok_results) == workers and len(producers) == 1
+    if scenario == "owner-crash":
+        return crashed == 1 and calls == 2 and len(ok_results) == workers - 1 and len(producers) == 1
+    if scenario == "owner-error":
+        return calls == 2 and len(errors) == 1 and len(ok_results) == workers - 1 and len(producers) == 1
+    if scenario == "distinct-keys":
+        slowest = max(r[2] for r in ok_results) if ok_results else float("inf")
+        return calls == workers and len(ok_results) == workers and slowest < CALL_SECONDS * 3
+    raise ValueError(scenario)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--workers", type=int, default=8)
+    args = ap.parse_args()
+    failed = 0
+    for scenario in ["single-flight", "owner-crash", "owner-error", "distinct-keys"]:
+        results, calls, crashed = run_scenario(scenario, args.workers)
+        passed = check(scenario, results, calls, crashed, args.workers)
+        waits = sorted(r[2] for r in results)
+        print(f"{scenario:<14} {'ok  ' if passed else 'FAIL'} calls={calls} answered={len(results)} "
+              f"crashed={crashed} p50={waits[len(waits) // 2] * 1000 if waits else 0:.0f}ms "
+              f"max={waits[-1] * 1000 if waits else 0:.0f}ms")
+        failed += not passed
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""Local stand-in for the YouTube Data API v3 endpoints the dashboard calls.
+
+    python bench/youtube_stub.py --port 8791 --latency search=0.4 videos=0.15 channels=0.1
+
+Point the dashboard (or yt_client) at it with
+
+    AXE_YOUTUBE_ENDPOINT=http://127.0.0.1:8791 streamlit run appui.py
+
+search, videos, channels and commentThreads answer after their configured
+latency (seconds, +-JITTER) with items built from bench/fixtures. Every
+query maps to a stable pseudo-random slice of UNIVERSE_SIZE videos, so
+different queries overlap the way real niches do. Thumbnail URLs point back
+at the stub, which serves small generated JPEGs.
+"""
+import io
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import copy
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+PATH_RE = re.compile(r"/youtube/v3/(search|videos|channels|commentThreads)$")
+THUMB_RE = re.compile(r"/thumb/([\w-]+)\.jpg$")
+UNIVERSE_SIZE = 400
+DEFAULT_LATENCY = 0.1
+JITTER = 0.2
+
+_fixture = None
+
+
+def _videos():
+    global _fixture
+    if _fixture is None:
+        with open(os.path.join(FIXTURES, "youtube_videos.json"), encoding="utf-8") as f:
+            _fixture = json.load(f)["items"]
+    return _fixture
+
+
+def video_ids():
+    """Every video ID the stub can return, in a stable order."""
+    items = _videos()
+    return [f"{items[k % len(items)]['id'][:7]}{k:04d}" for k in range(UNIVERSE_SIZE)]
+
+
+def _item(video_id, base_url):
+    k = int(video_id[-4:])
+    item = copy.deepcopy(_videos()[k % len(_videos())])
+    item["id"] = video_id
+    # Spread the shared fixture stats so each copy ranks differently.
+    scale = 0.2 + (zlib.crc32(video_id.encode()) % 1000) / 250
+    for key, value in item.get("statistics", {}).items():
+        item["statistics"][key] = str(int(int(value) * scale))
+    thumb = {"url": f"{base_url}/thumb/{video_id}.jpg", "width": 480, "height": 360}
+    item["snippet"]["thumbnails"] = {"high": thumb, "medium": thumb}
+    return item
+
+
+def search_items(query, max_results, base_url):
+    ids = video_ids()
+    rng = random.Random(zlib.crc32(query.lower().encode("utf-8")))
+    picked = rng.sample(range(len(ids)), min(max_results, len(ids)))
+    out = []
+    for k in picked:
+        snippet = _item(ids[k], base_url)["snippet"]
+        out.append({"kind": "youtube#searchResult", "id": {"kind": "youtube#video", "videoId": ids[k]},
+                    "snippet": snippet})
+    return out
+
+
+def _channel(channel_id):
+    h = zlib.crc32(channel_id.encode())
+    return {
+        "id": channel_id,
+        "snippet": {"title": f"Channel {channel_id[-4:]}", "publishedAt": f"201{h % 10}-0{h % 9 + 1}-15T00:00:00Z"},
+        "statistics": {"subscriberCount": str(1000 + h % 5_000_000), "videoCount": str(20 + h % 800),
+                       "viewCount": str(100_000 + h % 900_000_000)},
+    }
+
+
+def _thumbnail(video_id):
+    from PIL import Image
+
+    h = zlib.crc32(video_id.encode())
+    img = Image.new("RGB", (480, 360), (h & 255, (h >> 8) & 255, (h >> 16) & 255))
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", quality=70)
+    return buf.getvalue()
+
+
+def make_handler(latency, port):
+    """Request handler class answering the Data API endpoints with per-endpoint latency."""
+    base_url = f"http://127.0.0.1:{port}"
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, payload, content_type="application/json"):
+            try:
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            thumb = THUMB_RE.search(url.path)
+            if thumb:
+                self._send(_thumbnail(thumb.group(1)), "image/jpeg")
+                return
+            m = PATH_RE.search(url.path)
+            if not m:
+                self.send_error(404)
+                return
+            endpoint, q = m.group(1), {k: v[0] for k, v in parse_qs(url.query).items()}
+            delay = latency.get(endpoint, latency.get("*", DEFAULT_LATENCY))
+            time.sleep(max(0.0, delay * random.uniform(1 - JITTER, 1 + JITTER)))
+            if endpoint == "search":
+                items = search_items(q.get("q", ""), int(q.get("maxResults", 5)), base_url)
+            elif endpoint == "videos":
+                known = set(video_ids())
+                items = [_item(v, base_url) for v in q.get("id", "").split(",") if v in known]
+            elif endpoint == "channels":
+                items = [_channel(c) for c in q.get("id", "").split(",") if c]
+            else:
+                items = []
+            self._send(json.dumps({"kind": f"youtube#{endpoint}ListResponse", "items": items}).encode("utf-8"))
+
+    return Handler
+
+
+def serve(port=8791, latency=None, background=True):
+    """Start the stub; returns the server (call .shutdown() to stop)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency or {}, port))
+    server.daemon_threads = True
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    else:
+        server.serve_forever()
+    return server
+
+
+def parse_latency(pairs):
+    out = {}
+    for pair in pairs or []:
+        endpoint, _, seconds = pair.partition("=")
+        out[endpoint if seconds else "*"] = float(seconds or endpoint)
+    return out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8791)
+    parser.add_argument("--latency", nargs="*", help="endpoint=seconds pairs; a bare number sets the default")
+    args = parser.parse_args()
+    print(f"YouTube stub on http://127.0.0.1:{args.port}", file=sys.stderr)
+    serve(args.port, parse_latency(args.latency), background=False)
@@ -0,0 +1,131 @@
+import os
+import json
+import time
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from market import STATUS_OK
+from perf import span
+from resilience import call_with_retry
+from storage import data_path
+
+# ==========================================
+# CHANNEL ENRICHMENT
+# ==========================================
+# Distinct channel IDs from a scan are looked up in 50-ID channels().list
+# batches (1 quota unit each). Results are cached in-process and in
+# DATA_DIR/channels.json for CHANNEL_TTL seconds, so repeat scans of a niche
+# usually cost no channel quota at all. Channels the API doesn't return
+# (terminated or hidden) are cached as misses for the same TTL, so their rows
+# get empty channel columns without counting as a failed fetch. A batch that
+# keeps failing is skipped and its rows are marked STATUS_NO_CHANNEL.
+STATUS_NO_CHANNEL = "channel stats unavailable"
+CHANNEL_COLUMNS = ['Channel Subs', 'Channel Videos', 'Channel Age (days)', 'Channel Avg Views', 'Views / Sub',
+                   'Outperformance']
+CHANNEL_TTL = 24 * 3600
+BATCH = 50
+CACHE_FILE = "channels.json"
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _load_cache():
+    global _cache
+    if _cache is None:
+        path = data_path(CACHE_FILE)
+        try:
+            with open(path, encoding="utf-8") as f:
+                _cache = json.load(f)
+        except (OSError, ValueError):
+            _cache = {}
+    return _cache
+
+
+def _save_cache(ttl, now):
+    for c in [c for c, entry in _cache.items() if now - entry.get("fetched_at", 0) > ttl]:
+        del _cache[c]
+    path = data_path(CACHE_FILE)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(_cache, f)
+    os.replace(tmp, path)
+
+
+def _parse_channel(item, now):
+    stats, snippet = item.get('statistics', {}), item.get('snippet', {})
+    hidden = stats.get('hiddenSubscriberCount', False)
+    return {
+        "fetched_at": now,
+        "title": snippet.get('title', ''),
+        "subs": None if hidden else int(stats.get('subscriberCount', 0)),
+        "videos": int(stats.get('videoCount', 0)),
+        "views": int(stats.get('viewCount', 0)),
+        "published": snippet.get('publishedAt'),
+    }
+
+
+def fetch_channels(youtube, channel_ids, ttl=CHANNEL_TTL):
+    """Channel stats for the given IDs, hitting the API only for missing/stale ones.
+
+    IDs the API didn't return map to {"missing": True}; IDs whose batch
+    failed are left out.
+    """
+    now = time.time()
+    with _cache_lock:
+        cache = _load_cache()
+        wanted = list(dict.fromkeys(c for c in channel_ids if c))
+        stale = [c for c in wanted if now - cache.get(c, {}).get("fetched_at", 0) > ttl]
+    for start in range(0, len(stale), BATCH):
+        batch = stale[start:start + BATCH]
+        with span("youtube.channels.list", quota=1, ids=len(batch)) as sp:
+            try:
+                resp = call_with_retry("youtube.channels", youtube.channels().list(
+                    part="snippet,statistics", id=",".join(batch), maxResults=BATCH
+                ).execute)
+            except Exception as e:
+                sp["failed"] = type(e).__name__
+                continue
+        with _cache_lock:
+            for c in batch:
+                cache[c] = {"fetched_at": now, "missing": True}
+            for item in resp.get('items', []):
+                cache[item['id']] = _parse_channel(item, now)
+    with _cache_lock:
+        # Taken before pruning: a stale entry whose refresh failed is still better than nothing.
+        found = {c: cache[c] for c in wanted if c in cache}
+        if stale:
+            _save_cache(ttl, now)
+    return found
+
+
+def enrich_with_channels(youtube, df):
+    """Join channel size/age onto each video row plus views-per-subscriber outperformance."""
+    if df.empty or 'Channel ID' not in df.columns:
+        return df
+    known = fetch_channels(youtube, df['Channel ID'].unique().tolist())
+    if 'Fetch Status' in df.columns:
+        failed = df['Fetch Status'].eq(STATUS_OK) & ~df['Channel ID'].isin(list(known))
+        df = df.assign(**{'Fetch Status': df['Fetch Status'].mask(failed, STATUS_NO_CHANNEL)})
+    info = {c: entry for c, entry in known.items() if not entry.get("missing")}
+    ch = pd.DataFrame.from_dict(info, orient='index')
+    if ch.empty:
+        return df.assign(**{c: np.nan for c in CHANNEL_COLUMNS if c not in df.columns})
+    now = datetime.now(timezone.utc)
+    published = pd.to_datetime(ch['published'], utc=True, errors='coerce')
+    ch = pd.DataFrame({
+        'Channel ID': ch.index,
+        'Channel Subs': ch['subs'].astype('float64'),
+        'Channel Videos': ch['videos'],
+        'Channel Age (days)': (now - published).dt.days,
+        'Channel Avg Views': ch['views'] / ch['videos'].clip(lower=1),
+    })
+    df = df.drop(columns=[c for c in ch.columns if c != 'Channel ID' and c in df.columns]).merge(ch, on='Channel ID', how='left')
+    df['Views / Sub'] = (df['Views'] / df['Channel Subs'].where(df['Channel Subs'] > 0)).round(2)
+    # >1 means the video beat the channel's own lifetime average per upload.
+    df['Outperformance'] = (df['Views'] / df['Channel Avg Views'].where(df['Channel Avg Views'] > 0)).round(2)
+    df['Channel Avg Views'] = np.round(df['Channel Avg Views'], 0)
+    return df
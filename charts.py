@@ -0,0 +1,64 @@
+from collections import Counter
+
+import matplotlib.pyplot as plt
+import seaborn as sns
+from wordcloud import WordCloud
+
+# ==========================================
+# CHART BUILDERS
+# ==========================================
+# Figures for TAG SPY and ANALYTICS. They return matplotlib figures and never
+# touch Streamlit, so the same code is timed by the benchmark suite.
+
+
+def top_tags(all_tags, n=50):
+    return Counter(all_tags).most_common(n)
+
+
+def tag_cloud_figure(tag_counts):
+    wc = WordCloud(
+        width=800,
+        height=400,
+        background_color='#000000',
+        colormap='Greens'
+    ).generate_from_frequencies(dict(tag_counts))
+    fig, ax = plt.subplots()
+    ax.imshow(wc, interpolation='bilinear')
+    ax.axis("off")
+    fig.patch.set_facecolor('#000000')
+    return fig
+
+
+def views_histogram_figure(df):
+    fig, ax = plt.subplots()
+    sns.histplot(df['Views'], bins=20, ax=ax)
+    ax.set_xlabel("Views")
+    ax.set_ylabel("Count")
+    return fig
+
+
+def virality_scatter_figure(df):
+    fig, ax = plt.subplots()
+    ax.scatter(df['Virality Score'], df['Engagement'])
+    ax.set_xlabel("Virality Score")
+    ax.set_ylabel("Engagement %")
+    return fig
+
+
+def cluster_scatter_figure(df, sub_niche):
+    fig, ax = plt.subplots()
+    for name, grp in df.groupby(sub_niche, sort=False):
+        ax.scatter(grp['Duration'], grp['Views'], label=name, s=18)
+    ax.set_xlabel("Duration (mins)")
+    ax.set_ylabel("Views")
+    ax.set_yscale("log")
+    ax.legend(fontsize=6)
+    return fig
+
+
+def publish_heatmap_figure(typical):
+    fig, ax = plt.subplots(figsize=(10, 3.2))
+    sns.heatmap(typical, cmap='Greens', linewidths=0.3, cbar_kws={"label": "Views / day"}, ax=ax)
+    ax.set_xlabel("Upload hour")
+    ax.set_ylabel("")
+    return fig
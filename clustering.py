@@ -0,0 +1,155 @@
+import numpy as np
+import pandas as pd
+
+from text_features import N_FEATURES, hashed_triplets, frame_token_lists, token_hash
+
+# ==========================================
+# SUB-NICHE CLUSTERING
+# ==========================================
+# TF-IDF hashed tokens are folded into a small dense space (signed feature
+# hashing) and joined with z-scored performance metrics, then grouped with
+# k-means. Above MINIBATCH_ABOVE rows we switch to mini-batch k-means so a
+# 5k+ corpus still clusters in well under a second.
+TEXT_DIMS = 256
+METRIC_WEIGHT = 0.5
+MINIBATCH_ABOVE = 2000
+
+
+def default_k(n_rows):
+    return int(np.clip(round(np.sqrt(n_rows / 2)), 2, 8))
+
+
+def _feature_matrix(df):
+    token_lists = frame_token_lists(df)
+    rows, cols, weights = hashed_triplets(token_lists)
+    n = len(df)
+    doc_freq = np.bincount(np.unique(rows * N_FEATURES + cols) % N_FEATURES, minlength=N_FEATURES)
+    idf = np.log((1 + n) / (1 + doc_freq)) + 1.0
+    tfidf = weights * idf[cols]
+
+    sign = np.where((cols // TEXT_DIMS) % 2, -1.0, 1.0)
+    text = np.bincount(
+        rows * TEXT_DIMS + cols % TEXT_DIMS, weights=sign * tfidf, minlength=n * TEXT_DIMS
+    ).reshape(n, TEXT_DIMS).astype(np.float32)
+    text /= np.maximum(np.linalg.norm(text, axis=1, keepdims=True), 1e-9)
+
+    metrics = np.column_stack([
+        np.log1p(df['Views'].to_numpy(dtype=np.float64)),
+        df['Engagement'].to_numpy(dtype=np.float64),
+        np.log1p(df['Duration'].to_numpy(dtype=np.float64)),
+        df['Virality Score'].to_numpy(dtype=np.float64),
+    ])
+    metrics = (metrics - metrics.mean(axis=0)) / np.maximum(metrics.std(axis=0), 1e-9)
+    metrics *= METRIC_WEIGHT / np.sqrt(metrics.shape[1])
+
+    X = np.hstack([text, metrics.astype(np.float32)])
+    return X, token_lists, (rows, cols, tfidf)
+
+
+def _sq_dists(X, C):
+    return (X * X).sum(axis=1)[:, None] - 2.0 * X @ C.T + (C * C).sum(axis=1)[None, :]
+
+
+def _center_sums(X, labels, k):
+    onehot = np.zeros((len(labels), k), dtype=X.dtype)
+    onehot[np.arange(len(labels)), labels] = 1.0
+    return onehot.T @ X, onehot.sum(axis=0)
+
+
+def _kmeans_pp(X, k, rng):
+    centers = [X[rng.integers(len(X))]]
+    d2 = ((X - centers[0]) ** 2).sum(axis=1)
+    for _ in range(1, k):
+        total = d2.sum()
+        idx = rng.choice(len(X), p=d2 / total) if total > 0 else rng.integers(len(X))
+        centers.append(X[idx])
+        d2 = np.minimum(d2, ((X - X[idx]) ** 2).sum(axis=1))
+    return np.array(centers)
+
+
+def kmeans(X, k, n_iter=25, seed=0):
+    """Lloyd's k-means, fully vectorized over rows."""
+    rng = np.random.default_rng(seed)
+    C = _kmeans_pp(X, k, rng)
+    labels = np.full(len(X), -1)
+    for _ in range(n_iter):
+        new = _sq_dists(X, C).argmin(axis=1)
+        if np.array_equal(new, labels):
+            break
+        labels = new
+        sums, counts = _center_sums(X, labels, k)
+        filled = counts > 0
+        C[filled] = sums[filled] / counts[filled, None]
+    return labels, C
+
+
+def minibatch_kmeans(X, k, batch_size=512, n_iter=60, seed=0):
+    """Sculley-style mini-batch k-means with per-center learning rates."""
+    rng = np.random.default_rng(seed)
+    sample = X[rng.choice(len(X), size=min(len(X), batch_size * 4), replace=False)]
+    C = _kmeans_pp(sample, k, rng)
+    seen = np.zeros(k, dtype=np.float32)
+    for _ in range(n_iter):
+        batch = X[rng.integers(len(X), size=batch_size)]
+        nearest = _sq_dists(batch, C).argmin(axis=1)
+        sums, counts = _center_sums(batch, nearest, k)
+        seen += counts
+        hit = counts > 0
+        eta = counts[hit] / seen[hit]
+        C[hit] = (1 - eta)[:, None] * C[hit] + eta[:, None] * (sums[hit] / counts[hit, None])
+    return _sq_dists(X, C).argmin(axis=1), C
+
+
+def _top_terms(labels, k, token_lists, triplets, n_terms=3):
+    rows, cols, tfidf = triplets
+    # Reverse map hashed columns to a readable token (last writer wins on collisions).
+    names = {}
+    for toks in token_lists:
+        for tok, _ in toks:
+            names[token_hash(tok)] = tok[4:] if tok.startswith("tag:") else tok
+    per_cluster = np.bincount(
+        labels[rows] * N_FEATURES + cols, weights=tfidf, minlength=k * N_FEATURES
+    ).reshape(k, N_FEATURES)
+    overall = per_cluster.sum(axis=0) / max(len(labels), 1)
+    sizes = np.bincount(labels, minlength=k)[:, None]
+    lift = per_cluster / np.maximum(sizes, 1) - overall
+    out = []
+    for c in range(k):
+        top = np.argsort(lift[c])[::-1]
+        terms = []
+        for col in top:
+            if lift[c, col] <= 0 or len(terms) == n_terms:
+                break
+            name = names.get(int(col))
+            if name and name not in terms:
+                terms.append(name)
+        out.append(" / ".join(terms) or f"cluster {c + 1}")
+    # Clusters sharing top terms would merge in the report; number every copy.
+    dupes = {name for name in out if out.count(name) > 1}
+    return [f"{name} #{c + 1}" if name in dupes else name for c, name in enumerate(out)]
+
+
+def cluster_frame(df, k=None):
+    """Return (labels Series, per-cluster report DataFrame) for a market DataFrame."""
+    if len(df) < 3:
+        return pd.Series(["all"] * len(df), index=df.index), pd.DataFrame()
+    k = min(k or default_k(len(df)), len(df))
+    X, token_lists, triplets = _feature_matrix(df)
+    if len(df) > MINIBATCH_ABOVE:
+        labels, _ = minibatch_kmeans(X, k)
+    else:
+        labels, _ = kmeans(X, k)
+    names = np.asarray(_top_terms(labels, k, token_lists, triplets), dtype=object)
+    sub = pd.Series(names[labels], index=df.index, name='Sub-Niche')
+
+    report = df.assign(**{'Sub-Niche': sub}).groupby('Sub-Niche', observed=True).agg(
+        Videos=('Views', 'size'),
+        **{
+            'Median Views': ('Views', 'median'),
+            'Total Views': ('Views', 'sum'),
+            'Avg Engagement': ('Engagement', 'mean'),
+            'Avg Duration': ('Duration', 'mean'),
+            'Avg Virality': ('Virality Score', 'mean'),
+        }
+    ).sort_values('Median Views', ascending=False).round(2)
+    return sub, report
@@ -0,0 +1,200 @@
+import os
+import re
+import json
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from googleapiclient.errors import HttpError
+from textblob import TextBlob
+
+from perf import span
+from resilience import call_with_retry
+from storage import data_path, append_jsonl
+from text_features import tokenize
+from yt_client import youtube_client
+
+# ==========================================
+# COMMENT INGESTION
+# ==========================================
+# commentThreads().list is paged 100 at a time. Each page is appended to
+# DATA_DIR/comments/<id>.jsonl, scored, folded into a running summary and
+# dropped, so memory stays flat even for 100k+ comment videos. Keyword and
+# request counts use bounded Misra-Gries counters. Ingestion resumes from the
+# saved page token.
+PAGE_SIZE = 100
+TOPK_CAPACITY = 500
+COMMENT_WORKERS = 4
+
+REQUEST_RE = re.compile(
+    r"\b(?:please\s+(?:make|do)|can\s+you\s+(?:make|do)|could\s+you\s+(?:make|do)|make\s+a\s+video\s+(?:on|about)|"
+    r"do\s+a\s+video\s+(?:on|about)|next\s+video\s+(?:on|about|should\s+be)|tutorial\s+on|part\s+2\s+(?:on|of))"
+    r"\s+((?:[\w'#+-]+\s*){1,6})",
+    re.IGNORECASE,
+)
+
+
+class TopK:
+    """Misra-Gries heavy hitters: at most `capacity` counters, whatever the stream length."""
+
+    def __init__(self, capacity=TOPK_CAPACITY, counts=None):
+        self.capacity = capacity
+        self.counts = dict(counts or {})
+
+    def update(self, counter):
+        for key, n in counter.items():
+            if key in self.counts or len(self.counts) < self.capacity:
+                self.counts[key] = self.counts.get(key, 0) + n
+                continue
+            dec = min(n, min(self.counts.values()))
+            self.counts = {k: v - dec for k, v in self.counts.items() if v > dec}
+            if n > dec:
+                self.counts[key] = n - dec
+
+    def most_common(self, n=10):
+        return Counter(self.counts).most_common(n)
+
+
+def _summary_path(video_id):
+    return data_path("comments", f"{video_id}.summary.json")
+
+
+def load_summary(video_id):
+    path = _summary_path(video_id)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_summary(video_id, summary):
+    path = _summary_path(video_id)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(summary, f)
+    os.replace(tmp, path)
+
+
+def _new_summary(video_id):
+    return {
+        "video_id": video_id, "status": "partial", "next_page": None, "comments": 0, "likes": 0,
+        "polarity_sum": 0.0, "positive": 0, "neutral": 0, "negative": 0, "keywords": {}, "requests": {},
+    }
+
+
+def request_phrases(text):
+    """Normalised 'please make X' style asks found in one comment."""
+    return [" ".join(tokenize(m.group(1))[:5]) for m in REQUEST_RE.finditer(text or "") if tokenize(m.group(1))]
+
+
+@lru_cache(maxsize=20000)
+def _polarity(text):
+    # Short stock comments ("first", "great video") repeat a lot; scoring them once is a free win.
+    return TextBlob(text).sentiment.polarity
+
+
+def _fold_page(summary, texts, likes, keywords, requests):
+    polarity = [_polarity(t) for t in texts]
+    summary["comments"] += len(texts)
+    summary["likes"] += sum(likes)
+    summary["polarity_sum"] += sum(polarity)
+    summary["positive"] += sum(p > 0.05 for p in polarity)
+    summary["negative"] += sum(p < -0.05 for p in polarity)
+    summary["neutral"] += sum(-0.05 <= p <= 0.05 for p in polarity)
+    keywords.update(Counter(tok for t in texts for tok in set(tokenize(t))))
+    requests.update(Counter(p for t in texts for p in request_phrases(t)))
+
+
+def _comments_disabled(error):
+    """True only for the 403 YouTube sends when the owner turned comments off (not quota or auth)."""
+    details = error.error_details if isinstance(error.error_details, list) else []
+    reasons = {d.get("reason") for d in details if isinstance(d, dict)}
+    return "commentsDisabled" in reasons or b"commentsDisabled" in (error.content or b"")
+
+
+def ingest_video_comments(youtube, video_id, max_comments=2000):
+    """Stream up to max_comments more comments for one video to disk; returns the updated summary."""
+    summary = load_summary(video_id) or _new_summary(video_id)
+    if summary["status"] in ("complete", "disabled"):
+        return summary
+    keywords = TopK(counts=summary["keywords"])
+    requests = TopK(counts=summary["requests"])
+    fetched = 0
+    raw_path = data_path("comments", f"{video_id}.jsonl")
+    while fetched < max_comments:
+        try:
+            with span("youtube.commentThreads.list", quota=1):
+                resp = call_with_retry("youtube.commentThreads", youtube.commentThreads().list(
+                    part="snippet",
+                    videoId=video_id,
+                    maxResults=PAGE_SIZE,
+                    order="relevance",
+                    textFormat="plainText",
+                    pageToken=summary["next_page"] or None
+                ).execute)
+        except HttpError as e:
+            if e.resp.status == 403 and _comments_disabled(e):
+                summary["status"] = "disabled"
+                break
+            # Quota, auth and other refusals are temporary; keep the page token and retry next time.
+            summary["error"] = f"HTTP {e.resp.status}"
+            break
+        except Exception as e:
+            # Keep what was read; the saved page token resumes from here next time.
+            summary["error"] = type(e).__name__
+            break
+        rows = []
+        for item in resp.get("items", []):
+            top = item["snippet"]["topLevelComment"]["snippet"]
+            rows.append({
+                "id": item["id"],
+                "text": top.get("textDisplay", ""),
+                "likes": int(top.get("likeCount", 0)),
+                "published": top.get("publishedAt"),
+                "replies": int(item["snippet"].get("totalReplyCount", 0)),
+            })
+        append_jsonl(raw_path, rows)
+        with span("comments.analyze", rows=len(rows)):
+            _fold_page(summary, [r["text"] for r in rows], [r["likes"] for r in rows], keywords, requests)
+        fetched += len(rows)
+        summary.pop("error", None)
+        summary["next_page"] = resp.get("nextPageToken")
+        summary["keywords"], summary["requests"] = keywords.counts, requests.counts
+        _save_summary(video_id, summary)
+        if not summary["next_page"]:
+            summary["status"] = "complete"
+            break
+    _save_summary(video_id, summary)
+    return summary
+
+
+def ingest_comments(api_key, video_ids, max_comments=2000, workers=COMMENT_WORKERS):
+    """Ingest several videos with bounded concurrency; each worker leases its own pooled client."""
+    def one(vid):
+        with youtube_client(api_key) as youtube:
+            return ingest_video_comments(youtube, vid, max_comments)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(one, video_ids))
+
+
+def summary_frame(video_ids):
+    """One row per video that has been ingested: volume, audience sentiment, top ask."""
+    import pandas as pd
+
+    rows = []
+    for vid in video_ids:
+        s = load_summary(vid)
+        if not s:
+            continue
+        n = max(s["comments"], 1)
+        top_req = TopK(counts=s["requests"]).most_common(1)
+        rows.append({
+            "Video ID": vid,
+            "Comments Read": s["comments"],
+            "Audience Sentiment": round(s["polarity_sum"] / n, 3),
+            "Positive %": round(s["positive"] / n * 100, 1),
+            "Negative %": round(s["negative"] / n * 100, 1),
+            "Top Request": top_req[0][0] if top_req else "",
+            "Status": s["status"],
+        })
+    return pd.DataFrame(rows)
@@ -0,0 +1,146 @@
+import os
+import time
+import tempfile
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.ipc as pa_ipc
+import pyarrow.parquet as pq
+
+from storage import data_path
+
+# ==========================================
+# STREAMING EXPORT
+# ==========================================
+# Frames are converted to Arrow one row-group at a time and handed straight
+# to a Parquet / Arrow IPC / CSV writer, so building an export never holds
+# more than one chunk's extra copy in memory. The schema comes from the whole
+# frame, so a column that is empty in the first chunk still gets its real
+# type. st.download_button serves bytes from memory, so the finished file is
+# read back once and deleted. Inline thumbnail data URIs are dropped.
+CHUNK_ROWS = 50_000
+# Leftovers from interrupted downloads older than this are removed on the next export.
+STALE_SECONDS = 3600
+DROP_COLUMNS = ['Preview']
+FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+    "arrow": ("application/vnd.apache.arrow.file", ".arrow"),
+    "csv": ("text/csv", ".csv"),
+}
+
+
+def iter_chunks(df, chunk_rows=CHUNK_ROWS):
+    """Yield row slices of a DataFrame (or pass through an iterable of frames)."""
+    if hasattr(df, "iloc"):
+        for start in range(0, len(df), chunk_rows):
+            yield df.iloc[start:start + chunk_rows]
+    else:
+        yield from df
+
+
+def export_schema(df, fmt):
+    """Arrow schema for the whole frame: object columns typed from their first non-null value."""
+    df = df.drop(columns=[c for c in DROP_COLUMNS if c in df.columns])
+    fields = []
+    for name, field in zip(df.columns, pa.Schema.from_pandas(df.head(0), preserve_index=False)):
+        col = df[name]
+        if col.dtype == object:
+            first = col.first_valid_index()
+            value = None if first is None else col.loc[first]
+            if value is None or (fmt == "csv" and isinstance(value, list)):
+                field = field.with_type(pa.string())
+            else:
+                field = field.with_type(pa.array([value]).type)
+        fields.append(field)
+    return pa.schema(fields)
+
+
+def _to_batch(chunk, fmt, schema=None):
+    chunk = chunk.drop(columns=[c for c in DROP_COLUMNS if c in chunk.columns])
+    if fmt == "csv":
+        # CSV has no list type: flatten tag lists to "a|b|c".
+        lists = [c for c in chunk.columns if chunk[c].map(lambda v: isinstance(v, list)).any()]
+        if lists:
+            chunk = chunk.assign(**{c: chunk[c].map(lambda v: "|".join(v) if isinstance(v, list) else v) for c in lists})
+    if schema is not None:
+        return pa.RecordBatch.from_pandas(chunk, schema=schema, preserve_index=False)
+    return pa.RecordBatch.from_pandas(chunk, preserve_index=False)
+
+
+def write_export(frames, fmt, path, chunk_rows=CHUNK_ROWS, schema=None):
+    """Stream frames to path in the given format; returns rows written.
+
+    Without a schema, a DataFrame's is taken from the whole frame and an
+    iterable of frames uses the first chunk's.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown export format: {fmt}")
+    if schema is None and hasattr(frames, "iloc"):
+        schema = export_schema(frames, fmt)
+    writer, rows = None, 0
+    tmp = path + ".part"
+    try:
+        for chunk in iter_chunks(frames, chunk_rows):
+            if chunk.empty:
+                continue
+            batch = _to_batch(chunk, fmt, schema)
+            if writer is None:
+                schema = batch.schema
+                if fmt == "parquet":
+                    writer = pq.ParquetWriter(tmp, schema, compression="zstd")
+                elif fmt == "arrow":
+                    writer = pa_ipc.new_file(tmp, schema)
+                else:
+                    writer = pa_csv.CSVWriter(tmp, schema)
+            if fmt == "parquet":
+                writer.write_batch(batch, row_group_size=chunk_rows)
+            else:
+                writer.write_batch(batch)
+            rows += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        open(tmp, "wb").close()
+    os.replace(tmp, path)
+    return rows
+
+
+def _prune_exports(directory, now):
+    for entry in os.scandir(directory):
+        try:
+            if now - entry.stat().st_mtime > STALE_SECONDS:
+                os.remove(entry.path)
+        except OSError:
+            pass  # another session's download finished and removed it first
+
+
+def export_path(name, fmt):
+    """A fresh, unique file in DATA_DIR/exports; stale leftovers are cleared first."""
+    directory = os.path.dirname(data_path("exports", "_"))
+    _prune_exports(directory, time.time())
+    safe = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in name)[:60] or "scan"
+    fd, path = tempfile.mkstemp(prefix=safe + "_", suffix=FORMATS[fmt][1], dir=directory)
+    os.close(fd)
+    return path
+
+
+def row_chunks(df, rows, chunk_rows=CHUNK_ROWS):
+    """Frames for a subset of positional rows, sliced one chunk at a time."""
+    for start in range(0, len(rows), chunk_rows):
+        yield df.iloc[rows[start:start + chunk_rows]]
+
+
+def export_file_reader(df, fmt, name, rows=None):
+    """Callable for st.download_button: writes the export on click, returns its bytes, deletes the file."""
+    def build():
+        path = export_path(name, fmt)
+        try:
+            write_export(df if rows is None else row_chunks(df, rows), fmt, path, schema=export_schema(df, fmt))
+            with open(path, "rb") as f:
+                return f.read()
+        finally:
+            for leftover in (path, path + ".part"):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+    return build
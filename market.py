@@ -0,0 +1,178 @@
+import time
+import pandas as pd
+import isodate
+from textblob import TextBlob
+
+from perf import record, span
+from resilience import call_with_retry
+
+# ==========================================
+# MARKET DATA
+# ==========================================
+# Pure functions behind the scan: they take an API client or raw API
+# responses, so they can be reused outside Streamlit (benchmarks, workers).
+# Detail lookups run in batches of DETAIL_BATCH; a batch that still fails
+# after retries becomes placeholder rows built from the search snippet with
+# 'Fetch Status' set, instead of failing the scan.
+DETAIL_BATCH = 50
+STATUS_OK = "ok"
+STATUS_NO_DETAILS = "details unavailable"
+
+
+def parse_published(values):
+    """UTC datetime64 from publishedAt strings; also accepts legacy 'YYYY-MM-DD' values."""
+    return pd.to_datetime(values, utc=True, errors='coerce', format='ISO8601')
+
+
+def search_videos(youtube, query, region_code, max_results=50):
+    with span("youtube.search.list", quota=100):
+        search_req = call_with_retry("youtube.search", youtube.search().list(
+            part="snippet",
+            q=query,
+            type="video",
+            regionCode=region_code,
+            maxResults=max_results,
+            order="viewCount"
+        ).execute)
+    return search_req.get('items', [])
+
+
+def search_video_ids(youtube, query, region_code, max_results=50):
+    return [item['id']['videoId'] for item in search_videos(youtube, query, region_code, max_results)]
+
+
+def fetch_detail_batch(youtube, batch):
+    """(items, failed IDs) for one videos().list call of up to DETAIL_BATCH IDs."""
+    with span("youtube.videos.list", quota=1, ids=len(batch)) as sp:
+        try:
+            stats_req = call_with_retry("youtube.videos", youtube.videos().list(
+                part="snippet,statistics,contentDetails",
+                id=",".join(batch)
+            ).execute)
+        except Exception as e:
+            sp["failed"] = type(e).__name__
+            return [], list(batch)
+    return stats_req.get('items', []), []
+
+
+def fetch_video_items(youtube, video_ids):
+    """videos().list items for every ID, plus the IDs whose batch could not be fetched."""
+    items, failed = [], []
+    for start in range(0, len(video_ids), DETAIL_BATCH):
+        got, missed = fetch_detail_batch(youtube, video_ids[start:start + DETAIL_BATCH])
+        items.extend(got)
+        failed.extend(missed)
+    return items, failed
+
+
+def placeholder_rows(search_items):
+    """Rows for videos whose details failed: title, thumbnail and channel from the search snippet only."""
+    rows = []
+    for item in search_items:
+        vid, snippet = item['id']['videoId'], item.get('snippet', {})
+        thumbs = snippet.get('thumbnails', {})
+        thumb = thumbs.get('high', thumbs.get('medium', next(iter(thumbs.values()), {"url": ""})))
+        rows.append({
+            'Video ID': vid, 'Thumbnail': thumb['url'], 'Title': snippet.get('title', vid),
+            'Views': 0, 'Likes': 0, 'Comments': 0, 'Engagement': 0.0, 'Earnings': 0.0, 'Virality Raw': 0.0,
+            'Link': f"https://www.youtube.com/watch?v={vid}", 'Published': snippet.get('publishedAt'),
+            'Duration': 0, 'Tags': [], 'Description': snippet.get('description', ''),
+            'Channel ID': snippet.get('channelId', ''), 'Channel': snippet.get('channelTitle', ''),
+            'Fetch Status': STATUS_NO_DETAILS,
+        })
+    df = pd.DataFrame(rows)
+    if not df.empty:
+        df['Published'] = parse_published(df['Published'])
+    return df
+
+
+def parse_video_items(items, rpm_value):
+    """Turn videos().list items into the market DataFrame + flat tag list."""
+    t_start, t_durations = time.perf_counter(), 0.0
+    data, all_tags = [], []
+    for item in items:
+        stats, snippet, content = item['statistics'], item['snippet'], item['contentDetails']
+
+        views = int(stats.get('viewCount', 0))
+        likes = int(stats.get('likeCount', 0))
+        comments = int(stats.get('commentCount', 0))
+        tags = snippet.get('tags', [])
+        if tags:
+            all_tags.extend(tags)
+
+        t0 = time.perf_counter()
+        try:
+            duration_iso = content['duration']
+            duration_mins = round(isodate.parse_duration(duration_iso).total_seconds() / 60, 2)
+        except Exception:
+            duration_mins = 0
+        t_durations += time.perf_counter() - t0
+
+        # 'high' (480x360) is plenty once downscaled; maxres is 1280x720 and mostly wasted bytes.
+        thumb_url = snippet['thumbnails'].get(
+            'high',
+            snippet['thumbnails'].get('medium', list(snippet['thumbnails'].values())[0])
+        )['url']
+
+        engagement = round(((likes + comments) / views * 100) if views > 0 else 0, 2)
+        earnings = round((views / 1000) * rpm_value, 2)
+        virality_raw = (views * 0.5) + (likes * 50) + (comments * 100)
+
+        data.append({
+            'Video ID': item['id'],
+            'Thumbnail': thumb_url,
+            'Title': snippet['title'],
+            'Views': views,
+            'Likes': likes,
+            'Comments': comments,
+            'Engagement': engagement,
+            'Earnings': earnings,
+            'Virality Raw': virality_raw,
+            'Link': f"https://www.youtube.com/watch?v={item['id']}",
+            'Published': snippet['publishedAt'],
+            'Duration': duration_mins,
+            'Tags': tags,
+            'Description': snippet.get('description', ''),
+            'Channel ID': snippet.get('channelId', ''),
+            'Channel': snippet.get('channelTitle', ''),
+            'Fetch Status': STATUS_OK
+        })
+
+    df = pd.DataFrame(data)
+    if not df.empty:
+        df['Published'] = parse_published(df['Published'])
+    record("parse.durations", t_durations, rows=len(data))
+    record("parse.video_items", time.perf_counter() - t_start, rows=len(data))
+    return df, all_tags
+
+
+def fetch_market_data(youtube, query, region_code, rpm_value, max_results=50):
+    search_items = search_videos(youtube, query, region_code, max_results)
+    video_ids = [item['id']['videoId'] for item in search_items]
+    if not video_ids:
+        return pd.DataFrame(), []
+    items, failed = fetch_video_items(youtube, video_ids)
+    df, all_tags = parse_video_items(items, rpm_value)
+    if failed:
+        failed = set(failed)
+        missing = placeholder_rows([it for it in search_items if it['id']['videoId'] in failed])
+        df = pd.concat([df, missing], ignore_index=True)
+    return df, all_tags
+
+
+def analyze_title_sentiment(df):
+    if df.empty:
+        return df
+    sentiments = []
+    with span("textblob.sentiment", rows=len(df)):
+        for t in df['Title']:
+            tb = TextBlob(t)
+            sentiments.append(tb.sentiment.polarity)
+    df = df.copy()
+    df['Sentiment'] = sentiments
+    df['Sentiment Label'] = pd.cut(
+        df['Sentiment'],
+        bins=[-1.0, -0.05, 0.05, 1.0],
+        labels=['Negative', 'Neutral', 'Positive']
+    )
+    return df
@@ -0,0 +1,184 @@
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+import google.generativeai as genai
+
+from perf import read_spans, record
+from resilience import call_with_retry
+
+# ==========================================
+# GEMINI MODEL ROUTING
+# ==========================================
+# Every Gemini call goes through generate(): the task and prompt size pick a
+# model tier and a deadline, the call runs on a worker thread, and if the
+# primary model is still busy past its own observed p95 the same prompt is
+# sent to the next faster tier; whichever answers first wins. Per-model
+# latencies are kept in memory (seeded from the perf log) and appended to the
+# log as "gemini.model" spans. Each model also has its own retry budget and
+# circuit breaker (resilience.py), so a degraded model fails fast and the
+# hedge tier takes over. AXE_GEMINI_ENDPOINT points the client at a
+# local stub such as bench/gemini_stub.py.
+TIERS = {
+    "fast": os.environ.get("AXE_GEMINI_FAST", "gemini-1.5-flash-8b"),
+    "standard": os.environ.get("AXE_GEMINI_STANDARD", "gemini-1.5-flash"),
+    "deep": os.environ.get("AXE_GEMINI_DEEP", "gemini-1.5-pro"),
+}
+TIER_ORDER = ["fast", "standard", "deep"]
+# task -> (tier, deadline in seconds)
+ROUTES = {
+    "niche": ("fast", 10),
+    "title_ideas": ("standard", 20),
+    "batch_label": ("standard", 45),
+    "chat": ("standard", 30),
+    "strategy": ("deep", 45),
+    "forensic_audit": ("deep", 60),
+}
+DEFAULT_ROUTE = ("standard", 30)
+# task -> seconds a reply is shared with other replicas (shared_cache.py); 0 for tasks
+# where asking again should give a fresh answer, which still de-duplicates in-flight calls.
+SHARED_TTL = {
+    "niche": 7 * 86400,
+    "batch_label": 7 * 86400,
+    "strategy": 86400,
+    "forensic_audit": 7 * 86400,
+    "title_ideas": 0,
+    "chat": 0,
+}
+SHORT_PROMPT_CHARS = 1500
+LONG_PROMPT_CHARS = 20000
+EXTRA_SECONDS_PER_10K = 5
+HEDGE_FRACTION = 0.5  # hedge point while a model has too few samples for a p95
+MIN_SAMPLES = 20
+WINDOW = 200
+LATENCY_STAGE = "gemini.model"
+
+
+class GeminiTimeout(TimeoutError):
+    pass
+
+
+_pool = ThreadPoolExecutor(max_workers=int(os.environ.get("AXE_GEMINI_WORKERS", "8")), thread_name_prefix="gemini")
+_latency = {}
+_lock = threading.Lock()
+_seeded = False
+
+
+def configure(api_key):
+    endpoint = os.environ.get("AXE_GEMINI_ENDPOINT")
+    if endpoint:
+        genai.configure(api_key=api_key, transport="rest", client_options={"api_endpoint": endpoint})
+    else:
+        genai.configure(api_key=api_key)
+
+
+def route(task, prompt_chars):
+    """(primary tier, hedge tier or None, deadline seconds) for one call."""
+    tier, deadline = ROUTES.get(task, DEFAULT_ROUTE)
+    i = TIER_ORDER.index(tier)
+    if prompt_chars < SHORT_PROMPT_CHARS and i > 0:
+        i -= 1
+    if prompt_chars > LONG_PROMPT_CHARS:
+        deadline += (prompt_chars - LONG_PROMPT_CHARS) / 10000 * EXTRA_SECONDS_PER_10K
+    return TIER_ORDER[i], (TIER_ORDER[i - 1] if i > 0 else None), deadline
+
+
+def _seed():
+    global _seeded
+    with _lock:
+        if _seeded:
+            return
+        _seeded = True
+        for rec in read_spans():
+            if rec.get("stage") == LATENCY_STAGE and rec.get("outcome") == "ok":
+                _latency.setdefault(rec["model"], deque(maxlen=WINDOW)).append(rec["ms"] / 1000)
+
+
+def observe(model, seconds):
+    with _lock:
+        _latency.setdefault(model, deque(maxlen=WINDOW)).append(seconds)
+
+
+def p95(model):
+    _seed()
+    with _lock:
+        samples = list(_latency.get(model, ()))
+    return float(np.percentile(samples, 95)) if len(samples) >= MIN_SAMPLES else None
+
+
+def _call(task, tier, prompt, timeout, generation_config=None):
+    model = TIERS[tier]
+    t0 = time.perf_counter()
+    end = time.monotonic() + timeout
+
+    def attempt():
+        response = genai.GenerativeModel(model).generate_content(
+            prompt, generation_config=generation_config,
+            request_options={"timeout": max(end - time.monotonic(), 0.1)}
+        )
+        response.text  # raises here, on the worker, if the reply was blocked
+        return response
+
+    try:
+        response = call_with_retry(f"gemini.{model}", attempt, attempts=3, budget=timeout)
+    except Exception as e:
+        record(LATENCY_STAGE, time.perf_counter() - t0, model=model, tier=tier, task=task,
+               outcome="error", error=type(e).__name__)
+        raise
+    seconds = time.perf_counter() - t0
+    # Recorded even when the other leg already won, so slow tails still count toward p95.
+    observe(model, seconds)
+    record(LATENCY_STAGE, seconds, model=model, tier=tier, task=task, outcome="ok")
+    return response
+
+
+def generate(task, prompt, tier=None, generation_config=None):
+    """Routed, deadline-bound generate_content; returns (response, info). Raises GeminiTimeout."""
+    primary, hedge, deadline = route(task, len(prompt))
+    if tier:
+        primary, hedge = tier, None
+    t0 = time.perf_counter()
+    end = t0 + deadline
+    hedge_at = p95(TIERS[primary]) or deadline * HEDGE_FRACTION
+    pending = {_pool.submit(_call, task, primary, prompt, deadline, generation_config): primary}
+    error = None
+    hedged = False
+
+    while pending:
+        now = time.perf_counter()
+        timeout = end - now
+        if hedge and not hedged:
+            timeout = min(timeout, t0 + hedge_at - now)
+        done, _ = wait(pending, timeout=max(timeout, 0), return_when=FIRST_COMPLETED)
+        for fut in done:
+            leg = pending.pop(fut)
+            try:
+                response = fut.result()
+            except Exception as e:
+                error = e
+                continue
+            return response, {"model": TIERS[leg], "tier": leg, "hedged": hedged,
+                              "seconds": round(time.perf_counter() - t0, 3)}
+        now = time.perf_counter()
+        if now >= end:
+            break
+        # Hedge once: on the primary passing its p95, or straight away if it failed.
+        if hedge and not hedged and (now - t0 >= hedge_at or not pending):
+            pending[_pool.submit(_call, task, hedge, prompt, end - now, generation_config)] = hedge
+            hedged = True
+
+    if error is not None and not pending:
+        raise error
+    raise GeminiTimeout(f"Gemini gave no answer for '{task}' within {deadline:g}s.")
+
+
+def model_latency_frame():
+    """Calls / p50 / p95 per model from the in-memory window."""
+    _seed()
+    with _lock:
+        rows = [(m, len(s), *np.percentile(list(s), [50, 95])) for m, s in _latency.items() if s]
+    return pd.DataFrame(rows, columns=["model", "calls", "p50 s", "p95 s"]).round(2).set_index("model")
@@ -0,0 +1,196 @@
+import os
+import re
+import numpy as np
+
+from storage import data_path, append_jsonl, read_jsonl
+from text_features import N_FEATURES, video_tokens, hashed_triplets, frame_token_lists
+
+# ==========================================
+# OFFLINE NICHE CLASSIFIER
+# ==========================================
+# Multinomial naive Bayes over hashed title/tag/description tokens.
+# Trained from a small seed lexicon plus every label Gemini (or a human) has
+# produced so far, stored in niche_labels.jsonl. Labels are mapped onto the
+# seed classes (case, "&"/"/" spelling, lexicon words) and unknown ones are
+# dropped, so free-text answers can't splinter the model into one-example
+# classes. To teach it a new niche, add it to SEED_NICHES.
+LABELS_FILE = "niche_labels.jsonl"
+LOW_CONFIDENCE = 0.55
+
+SEED_NICHES = {
+    "Tech & Gadgets": "tech technology gadget smartphone iphone android laptop pc review unboxing setup apple samsung",
+    "AI & Software": "ai chatgpt gpt openai gemini llm machine learning automation software coding programming python app",
+    "Gaming": "gaming gameplay minecraft fortnite gta roblox playthrough walkthrough speedrun gamer ps5 xbox nintendo",
+    "Finance & Investing": "money finance investing stocks crypto bitcoin trading passive income wealth budget rich",
+    "Business & Entrepreneurship": "business entrepreneur startup dropshipping ecommerce marketing sales agency side hustle ceo",
+    "Education": "learn explained lesson course class history math physics chemistry biology study exam",
+    "Health & Fitness": "workout fitness gym exercise diet weight loss muscle yoga health nutrition",
+    "Food & Cooking": "recipe cooking food kitchen chef eat eating restaurant street food baking",
+    "Travel": "travel trip tour city country visit hotel vacation dubai journey abroad",
+    "Music": "music song lyrics cover remix album live concert beat rap singer",
+    "Beauty & Fashion": "makeup beauty skincare fashion outfit style hair haul",
+    "Comedy & Entertainment": "funny comedy prank meme skit entertainment try not laugh",
+    "News & Politics": "news breaking update politics election government war world report",
+    "Sports": "football soccer cricket nba basketball highlights match goal sport ufc",
+    "Science & Space": "science space nasa universe planet experiment physics rocket",
+    "Automotive": "car cars supercar engine drive driving racing bike motorcycle",
+}
+
+SEED_STYLES = {
+    "educational": "how to tutorial explained guide learn tips step beginners course lesson",
+    "storytelling": "story true story journey how i became life history untold",
+    "vlog": "vlog day in my life routine daily week with me",
+    "challenge": "challenge 24 hours survive last to leave vs extreme",
+    "news": "news breaking update announced report latest today",
+    "commentary": "reaction react review opinion honest truth about exposed rant",
+}
+
+MAIN_NICHE_RE = re.compile(r"\*\*Main Niche:\*\*\s*(.+)")
+CONTENT_STYLE_RE = re.compile(r"\*\*Content Style:\*\*\s*(.+)")
+
+LABEL_TOKEN_RE = re.compile(r"[a-z0-9]+")
+LABEL_STOPWORDS = {"and", "the", "of", "for", "content", "videos", "video"}
+
+_model_cache = {}
+
+
+def _label_tokens(text):
+    return {t for t in LABEL_TOKEN_RE.findall(text.lower()) if t not in LABEL_STOPWORDS}
+
+
+def canonical_label(label, seeds):
+    """The seed class a free-text label means, or "" if it matches none unambiguously.
+
+    Words of the class name count double, words of its lexicon once.
+    """
+    toks = _label_tokens(label or "")
+    if not toks:
+        return ""
+    scores = {}
+    for name, lexicon in seeds.items():
+        score = 2 * len(toks & _label_tokens(name)) + len(toks & set(lexicon.split()))
+        if score:
+            scores[name] = score
+    if not scores:
+        return ""
+    best = max(scores.values())
+    winners = [name for name, score in scores.items() if score == best]
+    return winners[0] if len(winners) == 1 else ""
+
+
+def _labels_path():
+    return data_path(LABELS_FILE)
+
+
+def load_labels():
+    """Cached labels (seed lexicon excluded) as a list of dicts."""
+    return list(read_jsonl(_labels_path()))
+
+
+def save_label(video_id, title, tags, description, main_niche, content_style, source="gemini"):
+    """Persist one label (mapped onto the seed classes) so the next model build learns from it."""
+    main_niche = canonical_label(main_niche, SEED_NICHES)
+    content_style = canonical_label(content_style, SEED_STYLES)
+    if not main_niche and not content_style:
+        return
+    append_jsonl(_labels_path(), [{
+        "video_id": video_id,
+        "title": title,
+        "tags": list(tags or []),
+        "description": (description or "")[:1000],
+        "main_niche": main_niche,
+        "content_style": content_style,
+        "source": source,
+    }])
+
+
+def parse_ai_label(text):
+    """Pull Main Niche / Content Style out of the ai_niche_for_video markdown."""
+    niche = MAIN_NICHE_RE.search(text or "")
+    style = CONTENT_STYLE_RE.search(text or "")
+    niche = niche.group(1).strip() if niche else ""
+    # Gemini often lists several styles; the first one is the primary style.
+    style = re.split(r"[/,]", style.group(1))[0].strip().lower() if style else ""
+    return niche, style
+
+
+def _fit(token_lists, labels, alpha=0.1):
+    classes = sorted(set(labels))
+    if not classes:
+        return None
+    class_idx = np.array([classes.index(c) for c in labels], dtype=np.int64)
+    rows, cols, weights = hashed_triplets(token_lists)
+    counts = np.bincount(
+        class_idx[rows] * N_FEATURES + cols, weights=weights, minlength=len(classes) * N_FEATURES
+    ).reshape(len(classes), N_FEATURES)
+    log_prob = np.log(counts + alpha) - np.log(counts.sum(axis=1, keepdims=True) + alpha * N_FEATURES)
+    # Seed lexicons are single documents, so a uniform prior keeps them from being drowned out.
+    prior = np.full(len(classes), -np.log(len(classes)))
+    return {"classes": classes, "log_prob": log_prob.astype(np.float32), "prior": prior}
+
+
+def build_models():
+    """Fit the niche and style models from seeds + cached labels (memoised on file mtime)."""
+    path = _labels_path()
+    mtime = os.path.getmtime(path) if os.path.exists(path) else 0
+    if _model_cache.get("mtime") == mtime:
+        return _model_cache["models"]
+
+    niche_docs = [video_tokens(kw) for kw in SEED_NICHES.values()]
+    niche_labels = list(SEED_NICHES.keys())
+    style_docs = [video_tokens(kw) for kw in SEED_STYLES.values()]
+    style_labels = list(SEED_STYLES.keys())
+    for rec in load_labels():
+        toks = video_tokens(rec.get("title", ""), rec.get("tags"), rec.get("description", ""))
+        # Older files hold free-text labels; map them the same way save_label() does.
+        niche = canonical_label(rec.get("main_niche"), SEED_NICHES)
+        style = canonical_label(rec.get("content_style"), SEED_STYLES)
+        if niche:
+            niche_docs.append(toks)
+            niche_labels.append(niche)
+        if style:
+            style_docs.append(toks)
+            style_labels.append(style)
+
+    models = {"niche": _fit(niche_docs, niche_labels), "style": _fit(style_docs, style_labels)}
+    _model_cache.update(mtime=mtime, models=models)
+    return models
+
+
+def _predict(model, rows, cols, weights, n_docs):
+    token_scores = model["log_prob"][:, cols] * weights
+    scores = np.column_stack([np.bincount(rows, weights=ts, minlength=n_docs) for ts in token_scores])
+    scores = scores.reshape(n_docs, -1) + model["prior"]
+    scores -= scores.max(axis=1, keepdims=True)
+    probs = np.exp(scores)
+    probs /= probs.sum(axis=1, keepdims=True)
+    best = probs.argmax(axis=1)
+    labels = np.asarray(model["classes"], dtype=object)[best]
+    conf = probs[np.arange(n_docs), best]
+    # Videos with no usable tokens get no opinion at all.
+    has_tokens = np.bincount(rows, minlength=n_docs) > 0
+    conf = np.where(has_tokens, conf, 0.0)
+    return labels, conf
+
+
+def classify_frame(df):
+    """Add Main Niche / Content Style / Niche Confidence columns to a market DataFrame."""
+    if df.empty:
+        return df
+    models = build_models()
+    rows, cols, weights = hashed_triplets(frame_token_lists(df))
+    df = df.copy()
+    niche, niche_conf = _predict(models["niche"], rows, cols, weights, len(df))
+    style, style_conf = _predict(models["style"], rows, cols, weights, len(df))
+    # Token-less rows would otherwise get the prior's argmax; leave them blank.
+    df['Main Niche'] = np.where(niche_conf > 0, niche, "")
+    df['Content Style'] = np.where(style_conf > 0, style, "")
+    df['Niche Confidence'] = np.round(niche_conf, 2)
+    return df
+
+
+def low_confidence_rows(df, threshold=LOW_CONFIDENCE):
+    """Rows the local model is unsure about and should be sent to Gemini."""
+    if df.empty or 'Niche Confidence' not in df.columns:
+        return df.iloc[0:0]
+    return df[df['Niche Confidence'] < threshold]
@@ -0,0 +1,121 @@
+import os
+import time
+import itertools
+import threading
+from contextlib import contextmanager
+
+from storage import FileLock, data_path, append_jsonl, read_jsonl
+
+# ==========================================
+# STAGE TIMING
+# ==========================================
+# Lightweight spans around external calls and heavy stages. Spans recorded
+# during a Streamlit rerun are kept for the sidebar performance panel and
+# every span is appended to perf/spans.jsonl for p50/p95 aggregation. Once the
+# log passes MAX_LOG_BYTES it is rotated to spans.jsonl.1 (replacing the older
+# one), so readers never see more than two files' worth:
+#
+#     python perf.py            # latency table per stage from the log
+LOG_FILE = ("perf", "spans.jsonl")
+MAX_LOG_BYTES = 8 * 2 ** 20
+ROTATE_CHECK_EVERY = 200
+
+_local = threading.local()
+_emitted = itertools.count(1)
+
+
+def start_run(run_id=None):
+    """Begin a new rerun: spans recorded on this thread go to a fresh list."""
+    _local.spans = []
+    _local.stack = []
+    _local.run_id = run_id or f"{time.time():.3f}"
+
+
+def run_spans():
+    return list(getattr(_local, "spans", []))
+
+
+def _emit(stage, seconds, attrs):
+    rec = {"ts": round(time.time(), 3), "run": getattr(_local, "run_id", None), "stage": stage,
+           "ms": round(seconds * 1000, 2), "depth": len(getattr(_local, "stack", ())), **attrs}
+    if hasattr(_local, "spans"):
+        _local.spans.append(rec)
+    try:
+        path = data_path(*LOG_FILE)
+        append_jsonl(path, [rec])
+        if next(_emitted) % ROTATE_CHECK_EVERY == 0 and os.path.getsize(path) > MAX_LOG_BYTES:
+            _rotate(path)
+    except OSError:
+        pass
+    return rec
+
+
+def _rotate(path):
+    with FileLock(path):
+        # Another process may have rotated while we waited for the lock.
+        if os.path.exists(path) and os.path.getsize(path) > MAX_LOG_BYTES:
+            os.replace(path, path + ".1")
+
+
+def read_spans():
+    """Span records from the rotated log and the current one, oldest first."""
+    path = data_path(*LOG_FILE)
+    yield from read_jsonl(path + ".1")
+    yield from read_jsonl(path)
+
+
+@contextmanager
+def span(stage, **attrs):
+    """Time a block. Attributes can be added from inside via annotate()."""
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    stack.append(attrs)
+    t0 = time.perf_counter()
+    try:
+        yield attrs
+    except Exception as e:
+        attrs["error"] = type(e).__name__
+        raise
+    finally:
+        stack.pop()
+        _emit(stage, time.perf_counter() - t0, attrs)
+
+
+def annotate(**attrs):
+    """Attach attributes (token counts, cache=miss, ...) to the innermost open span."""
+    stack = getattr(_local, "stack", None)
+    if stack:
+        stack[-1].update(attrs)
+
+
+def record(stage, seconds, **attrs):
+    """Record a pre-measured duration, e.g. time accumulated across a loop."""
+    return _emit(stage, seconds, attrs)
+
+
+def latency_summary(path=None, last=50000):
+    """p50/p95/max latency and call count per stage from the span log."""
+    import pandas as pd
+
+    recs = list(read_jsonl(path) if path else read_spans())[-last:]
+    if not recs:
+        return pd.DataFrame()
+    df = pd.DataFrame(recs)
+    out = df.groupby("stage")["ms"].agg(
+        calls="size",
+        p50=lambda s: s.quantile(0.5),
+        p95=lambda s: s.quantile(0.95),
+        max="max",
+    ).round(1)
+    if "cache" in df.columns:
+        hits = df.assign(hit=df["cache"].eq("hit")).groupby("stage")["hit"].mean()
+        out["cache hit %"] = (hits * 100).round(0).where(df.groupby("stage")["cache"].count() > 0)
+    return out.sort_values("p95", ascending=False)
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    with pd.option_context("display.width", 160, "display.max_rows", 200):
+        print(latency_summary())
@@ -0,0 +1,163 @@
+import json
+
+from niche_classifier import SEED_NICHES, SEED_STYLES
+
+# ==========================================
+# PROMPT BUILDERS
+# ==========================================
+# Prompt text for every Gemini helper, kept free of Streamlit and of the
+# Gemini client so it can be timed and inspected on its own.
+
+
+def build_forensic_prompt(transcript, title, duration, pacing=None):
+    # Measured pacing replaces most of the raw script; the opening is kept for hook context.
+    if pacing:
+        script = f'Pacing (measured from caption timestamps):\n{pacing}\n    Opening script: "{transcript[:1200]}..."'
+    else:
+        script = f'Script (truncated): "{transcript[:8000]}..."'
+    return f"""
+    Act as a Senior YouTube Video Editor & Premiere Pro Expert.
+    Analyze this script density to reverse-engineer the editing timeline.
+
+    METADATA:
+    Title: {title}
+    Duration: {duration} minutes
+    {script}
+
+    OUTPUT FORMAT (Strict Markdown):
+    ### ✂️ EDITING DIAGNOSTICS
+    * Pacing Style:
+    * Est. Cuts Per Minute:
+    * Editor Skill Level (1–10):
+    * Rhythm / Silence Usage:
+
+    ### 🧠 CONTENT & HOOK
+    * Hook Strength (0–10) & why
+    * Retention tactics used
+    * Drop-off risk moments
+
+    ### 🛠️ TECH STACK GUESS
+    * Likely Editing Software
+    * Likely Effects (J-cuts, speed ramps, masking, etc.)
+
+    ### 🎞️ TIMELINE BLUEPRINT
+    * 00:00 - Hook:
+    * Mid Section:
+    * Ending & CTA:
+
+    ### 🚀 UPGRADE RECOMMENDATIONS
+    * 3 edit changes to improve retention
+    * 3 ideas to repurpose into Shorts/Reels
+    """
+
+
+def build_niche_prompt(title, tags, description="", transcript=""):
+    return f"""
+    You are a YouTube niche classifier.
+
+    Given this data, identify the primary niche + 2 sub-niches:
+
+    Title: {title}
+    Tags: {tags}
+    Description: {description[:500]}
+    Transcript snippet: {transcript[:1000]}
+
+    Return strictly in this markdown format:
+
+    **Main Niche:** <one line>
+    **Sub Niches:** <comma separated>
+    **Audience Type:** <who is this mainly for?>
+    **Content Style:** <e.g. educational / storytelling / vlog / challenge / news / commentary>
+    """
+
+
+def build_batch_label_prompt(items):
+    return f"""
+    You are a YouTube niche classifier and retention analyst.
+
+    For EVERY video below return one JSON object with:
+    - "id": the video's id, copied exactly
+    - "niche": exactly one of {" / ".join(SEED_NICHES)}
+    - "style": exactly one of {" / ".join(SEED_STYLES)}
+    - "hook_score": 0-10, how strongly the title/packaging hooks a viewer
+    - "pacing_score": 0-10, expected edit pace (0 = slow and calm, 10 = rapid cuts)
+
+    Reply with a JSON array only, no markdown, one object per video, in the same order.
+
+    VIDEOS:
+    {json.dumps(items, ensure_ascii=False)}
+    """
+
+
+def build_strategy_prompt(df, query):
+    sample = df.sort_values('Views', ascending=False).head(15)
+    rows = []
+    for _, r in sample.iterrows():
+        rows.append(f"- {r['Title']} | {r['Views']} views | {r['Duration']} mins | {r['Engagement']}% engagement")
+    meta_block = "\n".join(rows)
+    return f"""
+    You are a YouTube Growth Consultant.
+
+    Topic / query scanned: "{query}"
+
+    Here are some of the top videos:
+    {meta_block}
+
+    Based on this, return a strategy in markdown:
+    - Overall niche summary
+    - Common patterns (length, titles, thumbnails, pacing)
+    - Recommended video lengths & formats for a new creator
+    - 5 advanced video ideas with angle + hook
+    - Suggested posting schedule for growth
+    """
+
+
+def build_title_ideas_prompt(base_idea, niche_desc):
+    return f"""
+    Act as a viral YouTube title copywriter.
+
+    Base idea: "{base_idea}"
+    Niche/channel description: "{niche_desc}"
+
+    Generate 8 viral title variations with:
+    - Curiosity
+    - Stakes or payoff
+    - Some emotion
+
+    Return in markdown with a short note under each about why it can work.
+    """
+
+
+def build_chat_prompt(question, df, query):
+    if df.empty:
+        context = "No videos scanned yet."
+    else:
+        # compress market into brief context
+        top = df.sort_values('Views', ascending=False).head(12)
+        ctx_rows = []
+        for _, r in top.iterrows():
+            ctx_rows.append(
+                f"- {r['Title']} | {r['Views']} views | {r['Duration']} mins | "
+                f"{r['Engagement']}% engagement | Virality {r['Virality Score']} | Sentiment {r.get('Sentiment Label','NA')}"
+            )
+        context = "\n".join(ctx_rows)
+
+    return f"""
+    You are an AI YouTube Niche Analyst and Growth Mentor.
+
+    The user has scanned this topic: "{query}".
+
+    Here is a snapshot of top videos in this space:
+    {context}
+
+    The user asks: "{question}"
+
+    Answer like a smart YouTube consultant:
+    - Explain clearly in human language
+    - Use examples from the kind of videos in this niche
+    - If user asks about what niche this is, explain niche, audience, money potential
+    - If user asks about content ideas, give angles + hooks
+    - If user asks about how to grow, give step-by-step.
+
+    Reply in markdown.
+    """
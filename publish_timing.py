@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+from market import STATUS_OK
+
+# ==========================================
+# PUBLISH TIMING
+# ==========================================
+# 'Published' is a UTC datetime64 column, so age, views per day since
+# publish, the weekday x hour upload heatmap and the age-adjusted ranking are
+# whole-column arithmetic plus one bincount over the 168 upload slots. A
+# 50k-video frame answers "when do uploads in this niche do best" in well
+# under a second.
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+SLOTS = 7 * 24
+# A video published minutes ago would otherwise get an absurd views/day.
+MIN_AGE_DAYS = 1 / 24
+MIN_SLOT_VIDEOS = 2
+# Heatmap time zones offered for the sidebar's target regions.
+TIMEZONES = ['UTC', 'America/New_York', 'America/Los_Angeles', 'America/Toronto', 'Europe/London', 'Asia/Kolkata',
+             'Asia/Dubai', 'Australia/Sydney']
+
+
+def _usable(df):
+    if df.empty or 'Published' not in df.columns:
+        return df.iloc[0:0]
+    ok = df['Published'].notna()
+    if 'Fetch Status' in df.columns:
+        ok &= df['Fetch Status'].eq(STATUS_OK)
+    return df[ok]
+
+
+def age_days(published, now=None):
+    now = now if now is not None else pd.Timestamp.now(tz='UTC')
+    return np.maximum((now - published).dt.total_seconds().to_numpy() / 86400, MIN_AGE_DAYS)
+
+
+def views_per_day(df, now=None):
+    """Lifetime views divided by days since publish, as a float array aligned with df."""
+    return df['Views'].to_numpy(dtype=np.float64) / age_days(df['Published'], now)
+
+
+def publish_heatmap(df, tz='UTC', now=None):
+    """(typical views/day, video count) as 7x24 frames by local upload weekday and hour.
+
+    "Typical" is the geometric mean, so one breakout video doesn't paint its
+    whole slot; slots with fewer than MIN_SLOT_VIDEOS uploads are NaN.
+    """
+    rows = _usable(df)
+    local = rows['Published'].dt.tz_convert(tz)
+    slot = local.dt.weekday.to_numpy() * 24 + local.dt.hour.to_numpy()
+    counts = np.bincount(slot, minlength=SLOTS)
+    sums = np.bincount(slot, weights=np.log1p(views_per_day(rows, now)), minlength=SLOTS)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        typical = np.expm1(sums / counts)
+    typical[counts < MIN_SLOT_VIDEOS] = np.nan
+    return (
+        pd.DataFrame(np.round(typical, 0).reshape(7, 24), index=WEEKDAYS, columns=range(24)),
+        pd.DataFrame(counts.reshape(7, 24), index=WEEKDAYS, columns=range(24)),
+    )
+
+
+def best_slots(typical, counts, n=5):
+    """Top n upload slots by typical views/day."""
+    flat = typical.stack().dropna().sort_values(ascending=False).head(n)
+    return pd.DataFrame({
+        'Weekday': flat.index.get_level_values(0),
+        'Hour': [f"{h:02d}:00" for h in flat.index.get_level_values(1)],
+        'Typical Views / Day': flat.to_numpy(),
+        'Videos': [int(counts.at[d, h]) for d, h in flat.index],
+    })
+
+
+def age_adjusted_rank(df, now=None):
+    """Videos ranked by views against what their age predicts.
+
+    Expected views come from a log-log fit of views on age over the whole
+    frame, so a week-old video with 50k views can outrank a 5-year-old one
+    with 2M. 'Age-Adjusted Lift' is actual / expected.
+    """
+    rows = _usable(df)
+    if len(rows) < 3:
+        return pd.DataFrame()
+    age = age_days(rows['Published'], now)
+    views = rows['Views'].to_numpy(dtype=np.float64)
+    log_age, log_views = np.log(age), np.log1p(views)
+    if np.ptp(log_age) > 0:
+        slope, intercept = np.polyfit(log_age, log_views, 1)
+    else:
+        slope, intercept = 0.0, log_views.mean()
+    expected = np.maximum(np.expm1(intercept + slope * log_age), 1.0)
+    out = pd.DataFrame({
+        'Title': rows['Title'].to_numpy(),
+        'Channel': rows['Channel'].to_numpy() if 'Channel' in rows.columns else '',
+        'Published': rows['Published'].reset_index(drop=True),
+        'Age (days)': np.round(age, 1),
+        'Views': views.astype(np.int64),
+        'Views / Day': np.round(views / age, 0),
+        'Expected Views': np.round(expected, 0),
+        'Age-Adjusted Lift': np.round(views / expected, 2),
+    })
+    return out.sort_values('Age-Adjusted Lift', ascending=False, ignore_index=True)
@@ -0,0 +1,167 @@
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from channels import enrich_with_channels
+from market import DETAIL_BATCH, STATUS_OK, fetch_detail_batch, parse_video_items, placeholder_rows, search_videos
+from perf import span
+from text_features import tokenize
+from yt_client import POOL_SIZE, youtube_client
+
+# ==========================================
+# RELATED-QUERY EXPANSION
+# ==========================================
+# A scan only covers the literal query. related_queries() mines the scan for
+# adjacent phrasings: multi-word tags that co-occur with the query's own tags
+# and title bigrams/trigrams shared by several videos, weighted by views.
+# expand_market_data() runs as many of those searches as the quota budget
+# allows, concurrently (one pooled client per search), drops video IDs the
+# scan or an earlier search already has, fetches details for the rest in
+# parallel 50-ID batches and appends them. 'Found By' lists every query that
+# returned a video.
+SEARCH_COST = 100
+# Expected per-search spend on top of the search itself: one videos().list and one channels().list batch.
+DETAIL_COST = 2
+MAX_RELATED = 8
+MIN_VIDEOS = 2
+MAX_QUERY_WORDS = 4
+
+
+def _phrase_key(phrase):
+    return frozenset(tokenize(phrase))
+
+
+def related_queries(df, query, n=MAX_RELATED):
+    """Up to n [{query, source, videos, score}] mined from the scan's tags and titles."""
+    if df.empty or n <= 0:
+        return []
+    ok = df['Fetch Status'].eq(STATUS_OK) if 'Fetch Status' in df.columns else pd.Series(True, index=df.index)
+    rows = df[ok]
+    weight = np.log1p(rows['Views'].to_numpy(dtype=np.float64))
+    query_terms = set(tokenize(query))
+
+    # Tags: views-weighted video count, doubled where the tag co-occurs with one mentioning the query.
+    tag_videos, tag_views, seed_videos = Counter(), Counter(), np.zeros(len(rows), bool)
+    for i, tags in enumerate(rows['Tags']):
+        clean = {str(t).strip().lower() for t in (tags if isinstance(tags, (list, np.ndarray)) else []) if str(t).strip()}
+        if any(query_terms & set(tokenize(t)) for t in clean):
+            seed_videos[i] = True
+        for t in clean:
+            tag_videos[t] += 1
+            tag_views[t] += weight[i] * (2 if seed_videos[i] else 1)
+    # Titles: bigrams and trigrams, counted once per video.
+    gram_videos, gram_views = Counter(), Counter()
+    for i, title in enumerate(rows['Title']):
+        toks = tokenize(title)
+        grams = {" ".join(toks[j:j + k]) for k in (2, 3) for j in range(len(toks) - k + 1)}
+        for g in grams:
+            gram_videos[g] += 1
+            gram_views[g] += weight[i]
+
+    query_key = _phrase_key(query)
+    candidates = []
+    for source, videos, views in (("tags", tag_videos, tag_views), ("titles", gram_videos, gram_views)):
+        for phrase, count in videos.items():
+            words = phrase.split()
+            key = _phrase_key(phrase)
+            if count < MIN_VIDEOS or len(key) < 2 or len(words) > MAX_QUERY_WORDS or key <= query_key:
+                continue
+            candidates.append({"query": phrase, "source": source, "videos": count, "score": round(views[phrase], 1)})
+    candidates.sort(key=lambda c: -c["score"])
+
+    picked, seen = [], []
+    for c in candidates:
+        key = _phrase_key(c["query"])
+        # Skip reorderings, sub- and super-phrases of a phrase already picked.
+        if any(key <= s or s <= key for s in seen):
+            continue
+        seen.append(key)
+        picked.append(c)
+        if len(picked) == n:
+            break
+    return picked
+
+
+def affordable_searches(budget):
+    return max(0, min(MAX_RELATED, int(budget // (SEARCH_COST + DETAIL_COST))))
+
+
+def _search(api_key, query, region_code, max_results):
+    with youtube_client(api_key) as youtube:
+        return search_videos(youtube, query, region_code, max_results)
+
+
+def _details(api_key, batch):
+    with youtube_client(api_key) as youtube:
+        return fetch_detail_batch(youtube, batch)
+
+
+def expand_market_data(api_key, query, df, all_tags, region_code, rpm_value, max_results=50, budget=500):
+    """(merged df, merged tags) with related-query results appended.
+
+    df.attrs['expansion'] holds one report dict per query: source, results,
+    new videos and any error.
+    """
+    df = df.copy()
+    df['Found By'] = [[query] for _ in range(len(df))]
+    related = related_queries(df, query, affordable_searches(budget))
+    report = [{"query": query, "source": "scan", "results": len(df), "new videos": len(df), "error": ""}]
+    if not related:
+        df.attrs['expansion'] = report
+        return df, all_tags
+
+    with span("expansion.search", queries=len(related)):
+        with ThreadPoolExecutor(max_workers=min(len(related), POOL_SIZE)) as pool:
+            futures = [pool.submit(_search, api_key, r["query"], region_code, max_results) for r in related]
+        results = []
+        for r, fut in zip(related, futures):
+            try:
+                results.append(fut.result())
+            except Exception as e:
+                results.append(e)
+
+    # Dedupe across the scan and every expanded search before spending detail quota.
+    found_by, snippets, order = defaultdict(list), {}, []
+    known = set(df['Video ID'])
+    for r, items in zip(related, results):
+        entry = {"query": r["query"], "source": r["source"], "results": 0, "new videos": 0, "error": ""}
+        report.append(entry)
+        if isinstance(items, Exception):
+            entry["error"] = type(items).__name__
+            continue
+        entry["results"] = len(items)
+        for item in items:
+            vid = item['id']['videoId']
+            found_by[vid].append(r["query"])
+            if vid in known:
+                continue
+            known.add(vid)
+            snippets[vid] = item
+            order.append(vid)
+            entry["new videos"] += 1
+
+    hit = df['Video ID'].isin(found_by)
+    df.loc[hit, 'Found By'] = pd.Series([[query] + found_by[v] for v in df.loc[hit, 'Video ID']],
+                                        index=df.index[hit], dtype=object)
+    if not order:
+        df.attrs['expansion'] = report
+        return df, all_tags
+
+    batches = [order[i:i + DETAIL_BATCH] for i in range(0, len(order), DETAIL_BATCH)]
+    with span("expansion.details", ids=len(order), batches=len(batches)):
+        with ThreadPoolExecutor(max_workers=min(len(batches), POOL_SIZE)) as pool:
+            fetched = list(pool.map(lambda b: _details(api_key, b), batches))
+    items = [it for got, _ in fetched for it in got]
+    failed = {vid for _, miss in fetched for vid in miss}
+    extra, extra_tags = parse_video_items(items, rpm_value)
+    if failed:
+        extra = pd.concat([extra, placeholder_rows([snippets[v] for v in order if v in failed])], ignore_index=True)
+    with youtube_client(api_key) as youtube:
+        extra = enrich_with_channels(youtube, extra)
+    extra['Found By'] = [found_by[v] for v in extra['Video ID']]
+
+    merged = pd.concat([df, extra], ignore_index=True)
+    merged.attrs['expansion'] = report
+    return merged, list(all_tags) + extra_tags
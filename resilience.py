@@ -0,0 +1,159 @@
+import time
+import random
+import socket
+import threading
+
+from perf import annotate, record
+
+# ==========================================
+# RETRIES & CIRCUIT BREAKERS
+# ==========================================
+# Every outbound call (YouTube endpoints, transcripts, each Gemini model) goes
+# through call_with_retry(endpoint, fn). Throttling and server errors are
+# retried with full-jitter exponential backoff inside a time budget; each
+# endpoint has a circuit breaker that, after FAILURE_THRESHOLD calls in a row
+# have used up their retries, fails fast for COOL_DOWN seconds and then lets
+# one probe call through. Only an HTTP answer counts as the backend working:
+# local errors (bad input, a reply that doesn't parse) leave it untouched.
+# Callers catch the final exception and mark the affected rows instead of
+# aborting the whole scan.
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+ATTEMPTS = 4
+BASE_DELAY = 0.5
+MAX_DELAY = 8.0
+BUDGET = 20.0
+FAILURE_THRESHOLD = 5
+COOL_DOWN = 30.0
+
+
+class CircuitOpen(Exception):
+    """Raised without calling the backend while its breaker is open."""
+
+
+def status_of(exc):
+    """HTTP status carried by a googleapiclient / google.api_core / requests exception, if any."""
+    resp = getattr(exc, "resp", None)
+    if resp is not None and getattr(resp, "status", None):
+        return int(resp.status)
+    code = getattr(exc, "code", None)
+    if isinstance(code, int):
+        return code
+    response = getattr(exc, "response", None)
+    if response is not None and getattr(response, "status_code", None):
+        return int(response.status_code)
+    return None
+
+
+def is_retryable(exc):
+    if isinstance(exc, CircuitOpen):
+        return False
+    status = status_of(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    # No status: dropped connections and timeouts are transient too.
+    return isinstance(exc, (ConnectionError, TimeoutError, socket.timeout)) or \
+        type(exc).__name__ in ("ConnectionError", "Timeout", "ReadTimeout", "ConnectTimeout", "ServerNotFoundError")
+
+
+def _retry_after(exc):
+    resp = getattr(exc, "resp", None)
+    try:
+        return float(resp.get("retry-after")) if resp is not None else None
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+class CircuitBreaker:
+    """closed -> open after `threshold` consecutive failed calls -> half-open after `cool_down`."""
+
+    def __init__(self, name, threshold=FAILURE_THRESHOLD, cool_down=COOL_DOWN):
+        self.name = name
+        self.threshold = threshold
+        self.cool_down = cool_down
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.cool_down else "open"
+
+    def allow(self):
+        """"closed" or "probe" if a call may go out, None while open."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return "closed"
+            if state == "half-open" and not self.probing:
+                self.probing = True
+                return "probe"
+            return None
+
+    def success(self):
+        with self._lock:
+            self.failures, self.opened_at, self.probing = 0, None, False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.probing or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self.probing = False
+
+    def release(self):
+        """End a probe that proved nothing either way, so the next call can probe."""
+        with self._lock:
+            self.probing = False
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker(endpoint):
+    with _breakers_lock:
+        b = _breakers.get(endpoint)
+        if b is None:
+            b = _breakers[endpoint] = CircuitBreaker(endpoint)
+        return b
+
+
+def breaker_states():
+    """[{endpoint, state, failures}] for every endpoint seen so far."""
+    with _breakers_lock:
+        items = list(_breakers.items())
+    return [{"endpoint": name, "state": b.state, "failures": b.failures} for name, b in sorted(items)]
+
+
+def call_with_retry(endpoint, fn, attempts=ATTEMPTS, budget=BUDGET, retry_on=is_retryable):
+    """fn() with backoff on transient errors, guarded by the endpoint's circuit breaker."""
+    b = breaker(endpoint)
+    start = time.monotonic()
+    for attempt in range(attempts):
+        allowed = b.allow()
+        if not allowed:
+            annotate(circuit="open")
+            raise CircuitOpen(f"{endpoint} is failing; skipping calls for up to {b.cool_down:.0f}s.")
+        try:
+            result = fn()
+        except Exception as e:
+            if not retry_on(e):
+                if status_of(e) is not None:
+                    b.success()  # the backend answered; the request itself was bad
+                elif allowed == "probe":
+                    b.release()
+                raise
+            delay = _retry_after(e) or random.uniform(0, min(MAX_DELAY, BASE_DELAY * 2 ** attempt))
+            # One failure per call, once its retries are spent; a failed probe re-opens at once.
+            if allowed == "probe" or attempt == attempts - 1 or time.monotonic() - start + delay > budget:
+                b.failure()
+                raise
+            annotate(retries=attempt + 1)
+            record(f"retry.{endpoint}", delay, attempt=attempt + 1, status=status_of(e), error=type(e).__name__)
+            time.sleep(delay)
+            continue
+        b.success()
+        return result
@@ -0,0 +1,212 @@
+import os
+import time
+import uuid
+import pickle
+import random
+import sqlite3
+import hashlib
+import threading
+
+from perf import annotate
+from storage import data_path
+
+# ==========================================
+# SHARED CACHE & SINGLE-FLIGHT
+# ==========================================
+# st.cache_data is per process, so replicas behind a load balancer each pay
+# for the same scan or prompt. shared_call(namespace, key, fn) puts a cache
+# shared by every process using the same backend in front of fn, plus a
+# lease so only one process runs fn for a key while the others poll for its
+# result. The owner renews its lease while fn runs; if it dies the lease
+# lapses and a waiter takes over. Exceptions are never cached, so after a
+# failure the next waiter makes the call itself. A result served from the
+# shared cache also marks the enclosing span cache="hit", so perf's cache hit
+# % counts it alongside st.cache_data hits.
+#
+# The default backend is SQLite in WAL mode at AXE_SHARED_CACHE (default
+# DATA_DIR/shared_cache.db; "off" disables sharing). WAL relies on shared
+# memory, so every replica must reach the file through the same host's
+# filesystem (a shared local volume, not NFS). MemoryBackend is the
+# in-process stand-in; any object with the same five methods can be
+# installed with set_backend().
+CACHE_ENV = "AXE_SHARED_CACHE"
+CACHE_FILE = "shared_cache.db"
+LEASE = 15.0
+POLL = 0.05
+MAX_POLL = 0.25
+WAIT = 180.0
+# Results with ttl 0 are still kept this long so callers already waiting on the flight get them.
+HANDOFF = 5.0
+PURGE_EVERY = 200
+
+
+class SqliteBackend:
+    """Entries and leases in one SQLite file; safe across threads and processes."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        self._conn()  # create the schema up front
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB, expires REAL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, owner TEXT, until REAL)")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT value FROM entries WHERE key = ? AND expires > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl):
+        conn, now = self._conn(), time.time()
+        conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?)", (key, value, now + ttl))
+        self._writes += 1
+        if self._writes % PURGE_EVERY == 0:
+            conn.execute("DELETE FROM entries WHERE expires <= ?", (now,))
+
+    def acquire(self, key, owner, lease):
+        """Take the lease if nobody holds it or the holder's lease has lapsed."""
+        now = time.time()
+        cur = self._conn().execute(
+            "INSERT INTO leases VALUES (?, ?, ?) ON CONFLICT(key) DO UPDATE "
+            "SET owner = excluded.owner, until = excluded.until WHERE leases.until < ?",
+            (key, owner, now + lease, now),
+        )
+        return cur.rowcount == 1
+
+    def renew(self, key, owner, lease):
+        self._conn().execute("UPDATE leases SET until = ? WHERE key = ? AND owner = ?",
+                             (time.time() + lease, key, owner))
+
+    def release(self, key, owner):
+        self._conn().execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner))
+
+
+class MemoryBackend:
+    """Single-process stand-in with the same interface as SqliteBackend."""
+
+    def __init__(self):
+        self.entries, self.leases = {}, {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value, expires = self.entries.get(key, (None, 0))
+            return value if expires > time.time() else None
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self.entries[key] = (value, time.time() + ttl)
+
+    def acquire(self, key, owner, lease):
+        with self._lock:
+            held = self.leases.get(key)
+            if held and held[1] >= time.time():
+                return False
+            self.leases[key] = (owner, time.time() + lease)
+            return True
+
+    def renew(self, key, owner, lease):
+        with self._lock:
+            if self.leases.get(key, (None,))[0] == owner:
+                self.leases[key] = (owner, time.time() + lease)
+
+    def release(self, key, owner):
+        with self._lock:
+            if self.leases.get(key, (None,))[0] == owner:
+                del self.leases[key]
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def set_backend(backend):
+    """Install a backend (None disables sharing); returns the previous one."""
+    global _backend
+    with _backend_lock:
+        previous, _backend = _backend, backend
+    return previous
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            setting = os.environ.get(CACHE_ENV, "")
+            if setting == "off":
+                return None
+            _backend = SqliteBackend(setting or data_path(CACHE_FILE))
+        return _backend
+
+
+def cache_key(namespace, key):
+    return namespace + ":" + hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+
+
+class _Renewer(threading.Thread):
+    def __init__(self, backend, key, owner, lease):
+        super().__init__(daemon=True, name="shared-cache-lease")
+        self.args = (backend, key, owner, lease)
+        self.done = threading.Event()
+
+    def run(self):
+        backend, key, owner, lease = self.args
+        while not self.done.wait(lease / 3):
+            backend.renew(key, owner, lease)
+
+
+def _run_as_owner(backend, key, owner, fn, ttl, lease):
+    renewer = _Renewer(backend, key, owner, lease)
+    renewer.start()
+    try:
+        value = fn()
+        seconds = ttl(value) if callable(ttl) else ttl
+        backend.set(key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), max(seconds, HANDOFF))
+        return value
+    finally:
+        renewer.done.set()
+        backend.release(key, owner)
+
+
+def shared_call(namespace, key, fn, ttl=3600, lease=LEASE, wait=WAIT):
+    """fn() at most once per key across processes; everyone else gets the stored result.
+
+    ttl is seconds (or value -> seconds) to keep the result; 0 only hands
+    it to callers already waiting on the same flight.
+    """
+    backend = get_backend()
+    if backend is None:
+        return fn()
+    key = cache_key(namespace, key)
+    owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    start, delay, waited = time.monotonic(), POLL, False
+    while True:
+        blob = backend.get(key)
+        if blob is not None:
+            annotate(shared="wait" if waited else "hit", cache="hit")
+            return pickle.loads(blob)
+        if backend.acquire(key, owner, lease):
+            # The previous owner may have stored the value and released between our get() and acquire().
+            blob = backend.get(key)
+            if blob is not None:
+                backend.release(key, owner)
+                annotate(shared="wait" if waited else "hit", cache="hit")
+                return pickle.loads(blob)
+            annotate(shared="miss")
+            return _run_as_owner(backend, key, owner, fn, ttl, lease)
+        if time.monotonic() - start > wait:
+            annotate(shared="timeout")
+            return fn()
+        waited = True
+        time.sleep(delay * random.uniform(0.5, 1.0))
+        delay = min(delay * 2, MAX_POLL)
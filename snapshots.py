@@ -0,0 +1,103 @@
+import os
+import re
+import json
+import time
+import base64
+import hashlib
+import shutil
+import tempfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pandas.api.types import is_datetime64_any_dtype
+
+from market import parse_published
+from storage import DATA_DIR, data_path, append_jsonl, read_jsonl
+
+# ==========================================
+# SCAN SNAPSHOTS
+# ==========================================
+# Every completed scan is frozen as DATA_DIR/snapshots/<id>/ with a zstd
+# Parquet frame and a meta.json (query, region, timestamp, tag index). The
+# ID is a hash of the content, so a snapshot never changes once written.
+# AI answers produced later are appended to a sidecar ai.jsonl.
+SNAPSHOT_ID_RE = re.compile(r"^[a-z2-7]{10}$")
+DROP_COLUMNS = ['Preview']
+
+
+def _snapshot_dir(snap_id):
+    if not SNAPSHOT_ID_RE.match(snap_id or ""):
+        raise ValueError(f"invalid snapshot id: {snap_id!r}")
+    return os.path.join(DATA_DIR, "snapshots", snap_id)
+
+
+def _make_id(query, region, ts, video_ids):
+    h = hashlib.blake2b(f"{query}\x00{region}\x00{ts}\x00{','.join(video_ids)}".encode(), digest_size=8)
+    return base64.b32encode(h.digest()).decode("ascii").lower()[:10]
+
+
+def save_snapshot(query, region, df, all_tags, tag_index=None):
+    """Persist a finished scan; returns its short ID."""
+    ts = time.strftime("%Y-%m-%dT%H:%M:%S")
+    snap_id = _make_id(query, region, ts, df['Video ID'].tolist())
+    final = _snapshot_dir(snap_id)
+    if os.path.exists(final):
+        return snap_id
+    root = os.path.dirname(data_path("snapshots", "_"))
+    tmp = tempfile.mkdtemp(prefix=".tmp_", dir=root)
+    try:
+        table = pa.Table.from_pandas(df.drop(columns=[c for c in DROP_COLUMNS if c in df.columns]), preserve_index=False)
+        pq.write_table(table, os.path.join(tmp, "frame.parquet"), compression="zstd")
+        meta = {
+            "id": snap_id, "query": query, "region": region, "created": ts, "rows": len(df),
+            "all_tags": list(all_tags), "tag_index": tag_index or [],
+        }
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.rename(tmp, final)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return snap_id
+
+
+def load_snapshot(snap_id):
+    """(meta dict, DataFrame, ai output records) for a snapshot ID. No network calls."""
+    path = _snapshot_dir(snap_id)
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    df = pq.read_table(os.path.join(path, "frame.parquet")).to_pandas()
+    for col in ('Tags', 'Found By'):
+        if col in df.columns:
+            df[col] = df[col].map(lambda t: list(t) if t is not None else [])
+    if 'Published' in df.columns and not is_datetime64_any_dtype(df['Published']):
+        # Snapshots from before publish times were typed hold 'YYYY-MM-DD' strings.
+        df['Published'] = parse_published(df['Published'])
+    return meta, df, list(read_jsonl(os.path.join(path, "ai.jsonl")))
+
+
+def append_ai_output(snap_id, kind, content, **extra):
+    """Record an AI answer (strategy, chat turn, ...) against a snapshot."""
+    if not snap_id:
+        return
+    append_jsonl(os.path.join(_snapshot_dir(snap_id), "ai.jsonl"),
+                 [{"ts": time.strftime("%Y-%m-%dT%H:%M:%S"), "kind": kind, "content": content, **extra}])
+
+
+def list_snapshots(limit=20):
+    """Most recent snapshots' meta, newest first."""
+    root = os.path.join(DATA_DIR, "snapshots")
+    if not os.path.isdir(root):
+        return []
+    ids = [d for d in os.listdir(root) if SNAPSHOT_ID_RE.match(d)]
+    ids.sort(key=lambda d: os.path.getmtime(os.path.join(root, d)), reverse=True)
+    out = []
+    for d in ids[:limit]:
+        try:
+            with open(os.path.join(root, d, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            meta.pop("all_tags", None)
+            out.append(meta)
+        except (OSError, ValueError):
+            continue
+    return out
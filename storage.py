@@ -0,0 +1,61 @@
+import os
+import json
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+# ==========================================
+# LOCAL DATA DIRECTORY
+# ==========================================
+# Everything the dashboard keeps between reruns (label caches, thumbnails,
+# snapshots, indexes...) lives under one folder so it can be mounted or wiped.
+DATA_DIR = os.environ.get("AXE_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".axe_data"))
+
+
+def data_path(*parts):
+    """Return a path inside DATA_DIR, creating the parent folder if needed."""
+    path = os.path.join(DATA_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+class FileLock:
+    """Exclusive advisory lock on ``<path>.lock`` shared across processes."""
+
+    def __init__(self, path):
+        self.path = path + ".lock"
+
+    def __enter__(self):
+        self.f = open(self.path, "w")
+        if fcntl:
+            fcntl.flock(self.f, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl:
+            fcntl.flock(self.f, fcntl.LOCK_UN)
+        self.f.close()
+
+
+def append_jsonl(path, records):
+    """Append dict records to a JSON-lines file."""
+    with open(path, "a", encoding="utf-8") as f:
+        for rec in records:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+
+def read_jsonl(path):
+    """Yield dict records from a JSON-lines file, skipping torn lines."""
+    if not os.path.exists(path):
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+from virality import DURATION_BUCKETS, duration_bucket
+
+# ==========================================
+# SERVER-SIDE TABLE ENGINE
+# ==========================================
+# Sort orders for every metric column are computed once per scan; each
+# sort / filter / page request is then a boolean mask plus a gather over
+# those precomputed orders, so only the visible page is sent to the browser.
+SORTABLE = ['Views', 'Virality Score', 'Views / Sub', 'Outperformance', 'Engagement', 'Duration', 'Likes', 'Comments',
+            'Earnings', 'Hook Score', 'Pacing Score']
+DURATION_BANDS = [name for _, name in DURATION_BUCKETS]
+
+
+class TableIndex:
+    """Precomputed sort orders and filter columns for one market DataFrame."""
+
+    def __init__(self, df):
+        self.df = df
+        self.n = len(df)
+        self.orders = {
+            # Missing values (e.g. hidden subscriber counts) sort as the smallest.
+            col: np.argsort(np.nan_to_num(df[col].to_numpy(dtype=np.float64), nan=-np.inf), kind='stable')
+            for col in SORTABLE if col in df.columns
+        }
+        self.views = df['Views'].to_numpy()
+        self.band = duration_bucket(df['Duration'])
+        self.sentiment = (
+            df['Sentiment Label'].astype(str).to_numpy() if 'Sentiment Label' in df.columns
+            else np.full(self.n, "", dtype=object)
+        )
+        tags = df['Tags'] if 'Tags' in df.columns else pd.Series([[]] * self.n, index=df.index)
+        # One lower-cased haystack per row: "|"-joined tags followed by the title.
+        self.haystack = pd.Series(
+            ["|".join(t).lower() if isinstance(t, list) else "" for t in tags], index=df.index
+        ).str.cat(df['Title'].str.lower(), sep="|").to_numpy(dtype=object)
+        self._contains_cache = {}
+
+    def _contains(self, needle):
+        needle = needle.strip().lower()
+        if needle not in self._contains_cache:
+            if len(self._contains_cache) > 32:
+                self._contains_cache.clear()
+            self._contains_cache[needle] = pd.Series(self.haystack).str.contains(needle, regex=False).to_numpy()
+        return self._contains_cache[needle]
+
+    def mask(self, min_views=None, max_views=None, bands=None, sentiments=None, contains=""):
+        """Vectorized AND of every active predicate."""
+        m = np.ones(self.n, dtype=bool)
+        if min_views:
+            m &= self.views >= min_views
+        if max_views:
+            m &= self.views <= max_views
+        if bands:
+            m &= np.isin(self.band, list(bands))
+        if sentiments:
+            m &= np.isin(self.sentiment, list(sentiments))
+        if contains and contains.strip():
+            m &= self._contains(contains)
+        return m
+
+    def count(self, **filters):
+        return int(self.mask(**filters).sum())
+
+    def matching(self, sort_by='Views', ascending=False, **filters):
+        """Positional row indices that pass the filters, in sort order."""
+        order = self.orders.get(sort_by, np.arange(self.n))
+        if not ascending:
+            order = order[::-1]
+        m = self.mask(**filters)
+        return order[m[order]]
+
+    def query(self, sort_by='Views', ascending=False, page=1, page_size=50, **filters):
+        """Return (page DataFrame, total matching rows)."""
+        hits = self.matching(sort_by, ascending, **filters)
+        start = (max(page, 1) - 1) * page_size
+        return self.df.iloc[hits[start:start + page_size]], len(hits)
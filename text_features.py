@@ -0,0 +1,73 @@
+import re
+import zlib
+import numpy as np
+
+# ==========================================
+# HASHED TEXT FEATURES
+# ==========================================
+# Titles, tags and descriptions are turned into hashed bag-of-words triplets
+# (row, column, weight) so every downstream model can work on the whole scan
+# with a handful of NumPy calls instead of a Python loop per video.
+N_FEATURES = 2 ** 14
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+STOPWORDS = frozenset("""
+a an the and or but if of to in on at for with by from as is are was were be been being it its this that
+these those i you he she we they me my your our their his her them us do does did doing have has had not
+no so too very can will just than then there here what which who whom how why when where all any both each
+few more most other some such own same into over under again out up down off about vs ft feat official video
+""".split())
+
+_hash_cache = {}
+
+
+def tokenize(text):
+    """Lower-case word tokens without stopwords or 1-char noise."""
+    if not text:
+        return []
+    return [t for t in TOKEN_RE.findall(str(text).lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def token_hash(token):
+    h = _hash_cache.get(token)
+    if h is None:
+        h = zlib.crc32(token.encode("utf-8")) % N_FEATURES
+        _hash_cache[token] = h
+    return h
+
+
+def video_tokens(title, tags=None, description="", title_weight=2.0, tag_weight=1.5, desc_weight=1.0):
+    """Weighted tokens for one video; whole tags are kept as an extra 'tag:' token."""
+    out = [(t, title_weight) for t in tokenize(title)]
+    for tag in tags or []:
+        tag = str(tag).strip().lower()
+        if not tag:
+            continue
+        out.append(("tag:" + tag, tag_weight))
+        out.extend((t, tag_weight * 0.5) for t in tokenize(tag))
+    out.extend((t, desc_weight) for t in tokenize(str(description or "")[:1000]))
+    return out
+
+
+def hashed_triplets(token_lists):
+    """Flatten per-document (token, weight) lists into (rows, cols, weights) arrays."""
+    rows, cols, weights = [], [], []
+    for i, toks in enumerate(token_lists):
+        for tok, w in toks:
+            rows.append(i)
+            cols.append(token_hash(tok))
+            weights.append(w)
+    return (
+        np.asarray(rows, dtype=np.int64),
+        np.asarray(cols, dtype=np.int64),
+        np.asarray(weights, dtype=np.float32),
+    )
+
+
+def frame_token_lists(df):
+    """Token lists for every row of a market DataFrame."""
+    titles = df['Title'].tolist()
+    tags = df['Tags'].tolist() if 'Tags' in df.columns else [[]] * len(df)
+    descs = df['Description'].tolist() if 'Description' in df.columns else [""] * len(df)
+    return [video_tokens(t, g if isinstance(g, (list, tuple)) else [], d) for t, g, d in zip(titles, tags, descs)]
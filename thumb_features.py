@@ -0,0 +1,124 @@
+import os
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+from thumbnails import thumb_path
+
+# ==========================================
+# THUMBNAIL VISUAL FEATURES
+# ==========================================
+# Cached thumbnails are decoded into fixed-size uint8 stacks and every
+# feature is computed for a whole chunk at once. Face and text areas are
+# cheap proxies (skin-tone pixels, dense high-contrast edge blocks), not
+# detectors, but they are CPU-only and run at thousands of images a minute.
+FEATURE_SIZE = (128, 72)
+CHUNK = 256
+BLOCK = 8
+
+FEATURE_COLUMNS = [
+    'Thumb Brightness', 'Thumb Contrast', 'Thumb Saturation', 'Thumb Colourfulness',
+    'Thumb Face Area', 'Thumb Text Area',
+]
+
+
+def _load_stack(video_ids, variant):
+    imgs, ok = [], []
+    for vid in video_ids:
+        path = thumb_path(vid, variant)
+        if not os.path.exists(path):
+            ok.append(False)
+            continue
+        with Image.open(path) as img:
+            # Let the JPEG decoder scale down during decode instead of after.
+            img.draft("RGB", FEATURE_SIZE)
+            imgs.append(np.asarray(img.convert("RGB").resize(FEATURE_SIZE, Image.BILINEAR)))
+        ok.append(True)
+    stack = np.stack(imgs) if imgs else np.zeros((0, FEATURE_SIZE[1], FEATURE_SIZE[0], 3), np.uint8)
+    return stack, np.array(ok, dtype=bool)
+
+
+def _chunk_features(stack):
+    rgb = stack.astype(np.float32) / 255.0
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    luma = 0.299 * r + 0.587 * g + 0.114 * b
+    flat = (stack.shape[0], -1)
+
+    cmax, cmin = rgb.max(axis=-1), rgb.min(axis=-1)
+    saturation = np.where(cmax > 0, (cmax - cmin) / np.maximum(cmax, 1e-6), 0.0)
+
+    # Hasler & Suesstrunk colourfulness.
+    rg, yb = r - g, 0.5 * (r + g) - b
+    colourful = (
+        np.sqrt(rg.reshape(flat).std(axis=1) ** 2 + yb.reshape(flat).std(axis=1) ** 2)
+        + 0.3 * np.sqrt(rg.reshape(flat).mean(axis=1) ** 2 + yb.reshape(flat).mean(axis=1) ** 2)
+    )
+
+    # Skin-tone share in YCbCr space as a face-area proxy.
+    cb = 128 - 37.797 * r - 74.203 * g + 112.0 * b
+    cr = 128 + 112.0 * r - 93.786 * g - 18.214 * b
+    skin = (cb >= 77) & (cb <= 127) & (cr >= 133) & (cr <= 173)
+
+    # Text proxy: blocks where a large share of pixels sit on strong luma edges.
+    gx = np.abs(np.diff(luma, axis=2, append=luma[:, :, -1:]))
+    gy = np.abs(np.diff(luma, axis=1, append=luma[:, -1:, :]))
+    edges = (gx + gy) > 0.25
+    h, w = edges.shape[1] // BLOCK * BLOCK, edges.shape[2] // BLOCK * BLOCK
+    blocks = edges[:, :h, :w].reshape(len(stack), h // BLOCK, BLOCK, w // BLOCK, BLOCK).mean(axis=(2, 4))
+    text = (blocks > 0.2).reshape(flat).mean(axis=1)
+
+    # Dominant colour: most common 3-bit-per-channel bin, reported as its centre.
+    q = (stack >> 5).astype(np.int64)
+    bins = (q[..., 0] << 6) | (q[..., 1] << 3) | q[..., 2]
+    offsets = np.arange(len(stack))[:, None] * 512
+    hist = np.bincount((bins.reshape(flat) + offsets).ravel(), minlength=len(stack) * 512).reshape(-1, 512)
+    top = hist.argmax(axis=1)
+    centre = np.column_stack([(top >> 6) & 7, (top >> 3) & 7, top & 7]) * 32 + 16
+    dominant = ["#%02x%02x%02x" % tuple(c) for c in centre]
+
+    feats = np.column_stack([
+        luma.reshape(flat).mean(axis=1),
+        luma.reshape(flat).std(axis=1),
+        saturation.reshape(flat).mean(axis=1),
+        colourful,
+        skin.reshape(flat).mean(axis=1),
+        text,
+    ])
+    return feats, dominant
+
+
+def thumbnail_features(video_ids, variant="full"):
+    """DataFrame of visual features indexed like video_ids (NaN where no cached image)."""
+    video_ids = list(video_ids)
+    feats = np.full((len(video_ids), len(FEATURE_COLUMNS)), np.nan)
+    dominant = np.full(len(video_ids), None, dtype=object)
+    for start in range(0, len(video_ids), CHUNK):
+        chunk_ids = video_ids[start:start + CHUNK]
+        stack, ok = _load_stack(chunk_ids, variant)
+        if not len(stack):
+            continue
+        chunk_feats, chunk_dom = _chunk_features(stack)
+        idx = start + np.flatnonzero(ok)
+        feats[idx] = chunk_feats
+        dominant[idx] = chunk_dom
+    out = pd.DataFrame(np.round(feats, 3), columns=FEATURE_COLUMNS)
+    out['Thumb Dominant'] = dominant
+    return out
+
+
+def attach_thumbnail_features(df):
+    """Join thumbnail features onto a market DataFrame as extra columns."""
+    if df.empty:
+        return df
+    feats = thumbnail_features(df['Video ID'])
+    feats.index = df.index
+    return pd.concat([df.drop(columns=[c for c in feats.columns if c in df.columns]), feats], axis=1)
+
+
+def feature_correlations(df, targets=('Views', 'Virality Score')):
+    """Spearman correlation of each thumbnail feature with the performance targets."""
+    cols = [c for c in FEATURE_COLUMNS if c in df.columns]
+    sub = df[cols + list(targets)].dropna()
+    if len(sub) < 5:
+        return pd.DataFrame()
+    return sub.corr(method='spearman').loc[cols, list(targets)].round(2)
@@ -0,0 +1,100 @@
+import io
+import os
+import base64
+import tempfile
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from PIL import Image
+
+from storage import data_path
+
+# ==========================================
+# THUMBNAIL CACHE
+# ==========================================
+# Thumbnails are downloaded once per video ID into DATA_DIR/thumbs. Each one
+# is stored at "full" size (capped at FULL_SIZE) for the EDITING LAB and as a
+# tiny "small" JPEG that the DATABASE table embeds as a data URI, so browsers
+# never pull 1280x720 images straight from YouTube. Both variants are written
+# to a unique temp file and renamed into place, so sessions fetching the same
+# thumbnail at once can't interleave writes.
+FULL_SIZE = (480, 270)
+SMALL_SIZE = (160, 90)
+FETCH_WORKERS = 16
+FETCH_TIMEOUT = 10
+# Small variants are ~5 KB as data URIs; the files are on disk, this only saves re-encoding the visible rows.
+URI_CACHE_SIZE = 500
+
+
+def thumb_path(video_id, variant="small"):
+    return data_path("thumbs", variant, f"{video_id}.jpg")
+
+
+def _fetch_one(video_id, url):
+    full, small = thumb_path(video_id, "full"), thumb_path(video_id, "small")
+    if os.path.exists(full) and os.path.exists(small):
+        return video_id, True
+    try:
+        with urllib.request.urlopen(url, timeout=FETCH_TIMEOUT) as resp:
+            raw = resp.read()
+        with Image.open(io.BytesIO(raw)) as img:
+            img = img.convert("RGB")
+            img.thumbnail(FULL_SIZE)
+            _save_jpeg(img, full, 85)
+            img.thumbnail(SMALL_SIZE)
+            _save_jpeg(img, small, 70)
+        return video_id, True
+    except Exception:
+        return video_id, False
+
+
+def _save_jpeg(img, path, quality):
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix=".part", delete=False) as f:
+        tmp = f.name
+        try:
+            img.save(f, "JPEG", quality=quality)
+        except Exception:
+            f.close()
+            os.remove(tmp)
+            raise
+    os.chmod(tmp, 0o644)  # mkstemp creates 0600; keep the cache readable like the other data files
+    os.replace(tmp, path)
+
+
+def cache_thumbnails(df, workers=FETCH_WORKERS):
+    """Download + downscale every thumbnail in the frame concurrently; returns {video_id: ok}."""
+    if df.empty:
+        return {}
+    jobs = list(zip(df['Video ID'], df['Thumbnail']))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(pool.map(lambda job: _fetch_one(*job), jobs))
+
+
+@lru_cache(maxsize=URI_CACHE_SIZE)
+def _data_uri(path, mtime):
+    with open(path, "rb") as f:
+        return "data:image/jpeg;base64," + base64.b64encode(f.read()).decode("ascii")
+
+
+def preview_uri(video_id, fallback_url=None):
+    """Inline data URI of the small cached variant, or the remote URL if not cached."""
+    path = thumb_path(video_id, "small")
+    if os.path.exists(path):
+        return _data_uri(path, os.path.getmtime(path))
+    return fallback_url
+
+
+def local_thumb(video_id, fallback_url=None):
+    """Path of the cached full-size variant for st.image, or the remote URL."""
+    path = thumb_path(video_id, "full")
+    return path if os.path.exists(path) else fallback_url
+
+
+def attach_previews(df):
+    """Add a 'Preview' column of cached data URIs for the DATABASE table."""
+    if df.empty:
+        return df
+    df = df.copy()
+    df['Preview'] = [preview_uri(v, u) for v, u in zip(df['Video ID'], df['Thumbnail'])]
+    return df
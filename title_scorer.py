@@ -0,0 +1,192 @@
+import os
+import re
+import zlib
+
+import numpy as np
+import pandas as pd
+from textblob.en import sentiment as textblob_lexicon
+
+from market import STATUS_OK
+from storage import append_jsonl, data_path, read_jsonl
+from text_features import tokenize
+
+# ==========================================
+# LOCAL TITLE SCORING
+# ==========================================
+# Predicts how a title would rank (views percentile against the corpus) from
+# cheap features: smoothed unigram/bigram lift, length, numbers, punctuation,
+# caps, emotional words and lexicon sentiment. Trained with a weighted ridge fit on
+# every title ever scanned (title_corpus.jsonl), with the current scan's rows
+# weighted up so the lifts reflect this niche. Token lifts live in a hashed
+# array, so scoring a title is a few array lookups and a dot product; no LLM.
+CORPUS_FILE = "title_corpus.jsonl"
+BUCKETS = 2 ** 18
+SMOOTHING = 5.0
+RIDGE = 1.0
+SCAN_WEIGHT = 3.0
+FEATURES = ['Token Lift', 'Length', 'Length²', 'Words', 'Numbers', 'Question', 'Exclamation', 'Caps Words',
+            'Emotion Words', 'Sentiment']
+EMOTION_WORDS = frozenset("""
+insane crazy shocking secret secrets never ever best worst ultimate amazing unbelievable terrifying scary
+impossible epic extreme destroyed brutal honest truth finally hidden banned dangerous perfect biggest
+broke rich million billion cheap free win lost failed quit regret mistake mistakes warning
+""".split())
+NUMBER_RE = re.compile(r"\d+")
+CAPS_RE = re.compile(r"\b[A-Z]{3,}\b")
+
+_model_cache = {}
+
+
+def _corpus_path():
+    return data_path(CORPUS_FILE)
+
+
+def record_titles(df, region_code):
+    """Append a scan's titles with their corpus views percentile to the title corpus."""
+    if df.empty or 'Views Percentile' not in df.columns:
+        return
+    ok = df['Fetch Status'].eq(STATUS_OK) if 'Fetch Status' in df.columns else pd.Series(True, index=df.index)
+    rows = df[ok]
+    append_jsonl(_corpus_path(), [
+        {"video_id": v, "title": t, "pct": float(p), "region": region_code}
+        for v, t, p in zip(rows['Video ID'], rows['Title'], rows['Views Percentile'])
+    ])
+
+
+def load_corpus():
+    """Title corpus as a DataFrame, one row per video (latest record wins)."""
+    recs = list(read_jsonl(_corpus_path()))
+    if not recs:
+        return pd.DataFrame(columns=['video_id', 'title', 'pct'])
+    return pd.DataFrame(recs).drop_duplicates('video_id', keep='last')
+
+
+def title_terms(title):
+    """Unigrams plus adjacent-pair bigrams of the stopword-free tokens."""
+    toks = tokenize(title)
+    return toks + [f"{a} {b}" for a, b in zip(toks, toks[1:])]
+
+
+def _bucket(term):
+    return zlib.crc32(term.encode("utf-8")) % BUCKETS
+
+
+def _polarity_table():
+    if "polarity" not in _model_cache:
+        # TextBlob's word lexicon without its negation/intensifier rules: close enough for
+        # a ranking feature and ~100x cheaper than TextBlob(title).sentiment.
+        _model_cache["polarity"] = {
+            w: senses[None][0] for w, senses in textblob_lexicon.items() if None in senses and senses[None][0]
+        }
+    return _model_cache["polarity"]
+
+
+def surface_features(titles):
+    """(n, len(FEATURES) - 1) matrix of everything except token lift."""
+    polarity = _polarity_table()
+    out = np.empty((len(titles), len(FEATURES) - 1))
+    for i, t in enumerate(titles):
+        words = [w.strip(".,!?:;\"'()").lower() for w in t.split()]
+        scores = [polarity[w] for w in words if w in polarity]
+        out[i] = (
+            len(t), len(t) ** 2, len(words), len(NUMBER_RE.findall(t)), t.count("?"), t.count("!"),
+            len(CAPS_RE.findall(t)), sum(w in EMOTION_WORDS for w in words),
+            sum(scores) / len(scores) if scores else 0.0,
+        )
+    return out
+
+
+class TitleScorer:
+    """Weighted ridge over title features; score() returns predicted percentile and per-feature contributions."""
+
+    def fit(self, titles, target, weights):
+        target, weights = np.asarray(target, dtype=np.float64), np.asarray(weights, dtype=np.float64)
+        self.prior = float(np.average(target, weights=weights))
+        terms = [[_bucket(t) for t in set(title_terms(title))] for title in titles]
+        rows = np.repeat(np.arange(len(titles)), [len(t) for t in terms])
+        cols = np.fromiter((b for t in terms for b in t), dtype=np.int64, count=len(rows))
+        w = weights[rows]
+        self.term_count = np.bincount(cols, weights=w, minlength=BUCKETS)
+        self.term_sum = np.bincount(cols, weights=w * target[rows], minlength=BUCKETS)
+        # Leave-one-out lift for the training titles, so a title's own views don't leak into its feature.
+        loo = (self.term_sum[cols] - w * target[rows] + SMOOTHING * self.prior) / \
+              (self.term_count[cols] - w + SMOOTHING) - self.prior
+        lift = np.bincount(rows, weights=loo, minlength=len(titles)) / np.maximum(
+            np.bincount(rows, minlength=len(titles)), 1)
+
+        x = np.column_stack([lift, surface_features(titles)])
+        self.mean = np.average(x, axis=0, weights=weights)
+        self.std = x.std(axis=0) + 1e-9
+        z = (x - self.mean) / self.std
+        zw = z * weights[:, None]
+        self.coef = np.linalg.solve(z.T @ zw + RIDGE * np.eye(z.shape[1]), zw.T @ (target - self.prior))
+        self.train_scores = np.sort(z @ self.coef + self.prior)
+        self.n = len(titles)
+        return self
+
+    def lift(self, term):
+        b = _bucket(term)
+        return (self.term_sum[b] + SMOOTHING * self.prior) / (self.term_count[b] + SMOOTHING) - self.prior
+
+    def score(self, titles):
+        """Predicted percentile, score and signed feature contributions (in percentile points) per title."""
+        titles = [t.strip() for t in titles if t and t.strip()]
+        if not titles:
+            return pd.DataFrame(columns=['Title', 'Predicted Percentile', 'Top Terms'] + FEATURES)
+        term_lists = [[t for t in dict.fromkeys(title_terms(title))] for title in titles]
+        lifts = [np.array([self.lift(t) for t in terms]) for terms in term_lists]
+        x = np.column_stack([
+            [lf.mean() if len(lf) else 0.0 for lf in lifts],
+            surface_features(titles),
+        ])
+        contrib = (x - self.mean) / self.std * self.coef
+        raw = contrib.sum(axis=1) + self.prior
+        pct = np.searchsorted(self.train_scores, raw) / max(self.n, 1) * 100
+        out = pd.DataFrame(np.round(contrib * 100, 1), columns=FEATURES)
+        out['Length'] = out.pop('Length') + out.pop('Length²')
+        out.insert(0, 'Title', titles)
+        out.insert(1, 'Predicted Percentile', np.round(pct, 0))
+        out.insert(2, 'Top Terms', [
+            ", ".join(f"{t} {lf * 100:+.0f}" for t, lf in sorted(zip(terms, lf_arr), key=lambda p: -abs(p[1]))[:3])
+            for terms, lf_arr in zip(term_lists, lifts)
+        ])
+        return out.sort_values('Predicted Percentile', ascending=False, ignore_index=True)
+
+
+def build_scorer(scan_df):
+    """Scorer fitted on the title corpus plus the current scan (memoised on both)."""
+    path = _corpus_path()
+    mtime = os.path.getmtime(path) if os.path.exists(path) else 0
+    if 'Views Percentile' not in scan_df.columns:
+        scan = scan_df.iloc[0:0]
+    else:
+        ok = scan_df['Fetch Status'].eq(STATUS_OK) if 'Fetch Status' in scan_df.columns else True
+        scan = scan_df[scan_df['Views Percentile'].notna() & ok]
+    key = (mtime, tuple(scan['Video ID']))
+    if _model_cache.get("key") == key:
+        return _model_cache["scorer"]
+
+    corpus = load_corpus()
+    corpus = corpus[~corpus['video_id'].isin(scan['Video ID'])]
+    titles = corpus['title'].tolist() + scan['Title'].tolist()
+    if len(titles) < 10:
+        return None
+    target = np.concatenate([corpus['pct'].to_numpy(dtype=np.float64), scan['Views Percentile'].to_numpy()]) / 100
+    weights = np.concatenate([np.ones(len(corpus)), np.full(len(scan), SCAN_WEIGHT)])
+    scorer = TitleScorer().fit(titles, target, weights)
+    _model_cache.update(key=key, scorer=scorer)
+    return scorer
+
+
+def extract_titles(markdown):
+    """Numbered / bulleted title lines from the ai_title_ideas markdown."""
+    titles = []
+    for line in (markdown or "").splitlines():
+        m = re.match(r"^\s{0,1}(?:\d+[.)]|[-*])\s+(.*)$", line)
+        if not m:
+            continue
+        title = re.sub(r"[*_`#]", "", m.group(1)).strip().strip('"“”').strip()
+        title = re.sub(r"^(?:Title\s*\d*\s*:\s*)", "", title, flags=re.I).strip('"“” ')
+        if 10 <= len(title) <= 120:
+            titles.append(title)
+    return titles
@@ -0,0 +1,202 @@
+import os
+import re
+import json
+import zlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from storage import FileLock, data_path
+from text_features import TOKEN_RE
+
+# ==========================================
+# POSITIONAL TRANSCRIPT INDEX
+# ==========================================
+# Every fetched transcript is appended to an on-disk inverted index. Postings
+# are fixed-width records (term hash, doc, word position, start ms, segment)
+# sharded by term hash into append-only binary files, so a query reads one
+# shard per term with np.fromfile and phrase matching is a handful of
+# vectorised set operations. Stopwords are kept so phrases like "how to"
+# match exactly.
+INDEX_DIR = "transcript_index"
+N_SHARDS = 256
+POSTING = np.dtype([("term", "<u4"), ("doc", "<u4"), ("pos", "<u4"), ("ms", "<u4"), ("seg", "<u4")])
+HIT_COLUMNS = ['Video ID', 'Start (ms)', 'Segment', 'Hits']
+QUERY_RE = re.compile(r'"([^"]+)"|(\S+)')
+# Shards kept in memory, least recently read evicted first.
+SHARD_CACHE_BYTES = 64 * 2 ** 20
+
+_docs_cache = {"size": 0, "by_video": {}, "by_doc": []}
+_docs_lock = threading.Lock()
+_shard_cache = OrderedDict()
+_shard_lock = threading.Lock()
+_hash_cache = {}
+
+
+def _docs_path():
+    return data_path(INDEX_DIR, "docs.jsonl")
+
+
+def _shard_path(shard):
+    return os.path.join(os.path.dirname(_docs_path()), f"shard_{shard:03d}.bin")
+
+
+def _term_hash(token):
+    h = _hash_cache.get(token)
+    if h is None:
+        h = _hash_cache[token] = zlib.crc32(token.encode("utf-8"))
+    return h
+
+
+def _docs():
+    """(video_id -> doc, doc -> video_id), reading only the lines appended since the last call."""
+    path = _docs_path()
+    with _docs_lock:
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size < _docs_cache["size"]:  # index was wiped
+            _docs_cache.update(size=0, by_video={}, by_doc=[])
+        if size > _docs_cache["size"]:
+            by_video, by_doc = _docs_cache["by_video"], _docs_cache["by_doc"]
+            with open(path, "rb") as f:
+                f.seek(_docs_cache["size"])
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # torn write still in progress
+                    rec = json.loads(line)
+                    # Doc numbers come from the record, so a line is never counted twice.
+                    if rec["doc"] >= len(by_doc):
+                        by_doc.extend([None] * (rec["doc"] + 1 - len(by_doc)))
+                    by_doc[rec["doc"]] = rec["video_id"]
+                    by_video[rec["video_id"]] = rec["doc"]
+                    _docs_cache["size"] += len(line)
+        return _docs_cache["by_video"], _docs_cache["by_doc"]
+
+
+def _postings_for(segments, doc):
+    tokens = [TOKEN_RE.findall(str(s["text"]).lower()) for s in segments]
+    n = np.array([len(t) for t in tokens])
+    seg = np.repeat(np.arange(len(segments)), n)
+    start = np.array([s["start"] for s in segments])[seg]
+    dur = np.array([s.get("duration", 0.0) for s in segments])[seg]
+    # Spread each segment's duration over its words so hits land near the spoken word.
+    within = np.arange(len(seg)) - np.repeat(np.cumsum(n) - n, n)
+    rec = np.empty(len(seg), dtype=POSTING)
+    rec["term"] = [_term_hash(t) for toks in tokens for t in toks]
+    rec["doc"] = doc
+    rec["pos"] = np.arange(len(seg))
+    rec["ms"] = (start + within / np.maximum(n[seg], 1) * dur) * 1000
+    rec["seg"] = seg
+    return rec
+
+
+def add_document(video_id, segments):
+    """Index one transcript's segments; returns False if the video is already indexed."""
+    if not segments:
+        return False
+    path = _docs_path()
+    with FileLock(path):
+        by_video, by_doc = _docs()
+        if video_id in by_video:
+            return False
+        doc = len(by_doc)
+        rec = _postings_for(segments, doc)
+        # Register the doc first: a crash mid-write leaves a partly indexed
+        # transcript rather than orphan postings a later doc would inherit.
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"doc": doc, "video_id": video_id, "postings": len(rec)}) + "\n")
+        if len(rec):
+            shards = rec["term"] % N_SHARDS
+            order = np.argsort(shards, kind="stable")
+            rec, shards = rec[order], shards[order]
+            for chunk in np.split(rec, np.flatnonzero(np.diff(shards)) + 1):
+                with open(_shard_path(int(chunk["term"][0] % N_SHARDS)), "ab") as f:
+                    f.write(chunk.tobytes())
+    return True
+
+
+def _shard(shard):
+    path = _shard_path(shard)
+    size = os.path.getsize(path) if os.path.exists(path) else 0
+    with _shard_lock:
+        cached = _shard_cache.get(shard)
+        if cached is not None and cached[0] == size:
+            _shard_cache.move_to_end(shard)
+            return cached[1]
+    arr = np.fromfile(path, dtype=POSTING, count=size // POSTING.itemsize) if size else np.empty(0, POSTING)
+    with _shard_lock:
+        _shard_cache[shard] = (size, arr)
+        _shard_cache.move_to_end(shard)
+        total = sum(a.nbytes for _, a in _shard_cache.values())
+        while total > SHARD_CACHE_BYTES and len(_shard_cache) > 1:
+            _, (_, old) = _shard_cache.popitem(last=False)
+            total -= old.nbytes
+    return arr
+
+
+def term_postings(token):
+    h = _term_hash(token)
+    arr = _shard(h % N_SHARDS)
+    return arr[arr["term"] == h]
+
+
+def _keys(postings):
+    return (postings["doc"].astype(np.uint64) << np.uint64(32)) | postings["pos"].astype(np.uint64)
+
+
+def phrase_postings(tokens):
+    """Postings of the first token wherever the whole token sequence occurs consecutively."""
+    first = term_postings(tokens[0])
+    keys = _keys(first)
+    for offset, token in enumerate(tokens[1:], start=1):
+        if not len(first):
+            break
+        nxt = _keys(term_postings(token)) - np.uint64(offset)
+        hit = np.isin(keys, nxt)
+        first, keys = first[hit], keys[hit]
+    return first
+
+
+def parse_query(query):
+    """Split a query into clauses: quoted phrases stay together, bare words stand alone."""
+    clauses = []
+    for phrase, word in QUERY_RE.findall(query or ""):
+        tokens = TOKEN_RE.findall((phrase or word).lower())
+        if tokens:
+            clauses.append(tokens)
+    return clauses
+
+
+def search(query, limit=200):
+    """Videos containing every clause, one row per hit with its jump-to timestamp."""
+    clauses = parse_query(query)
+    if not clauses:
+        return pd.DataFrame(columns=HIT_COLUMNS)
+    hits = [phrase_postings(c) for c in clauses]
+    docs = hits[0]["doc"]
+    for h in hits[1:]:
+        docs = np.intersect1d(docs, h["doc"])
+    hits = np.concatenate(hits)
+    hits = hits[np.isin(hits["doc"], docs)]
+    if not len(hits):
+        return pd.DataFrame(columns=HIT_COLUMNS)
+
+    _, by_doc = _docs()
+    counts = np.bincount(hits["doc"])
+    order = np.lexsort((hits["ms"], hits["doc"], -counts[hits["doc"]]))[:limit]
+    hits = hits[order]
+    return pd.DataFrame({
+        'Video ID': [by_doc[d] for d in hits["doc"]],
+        'Start (ms)': hits["ms"].astype(np.int64),
+        'Segment': hits["seg"].astype(np.int64),
+        'Hits': counts[hits["doc"]],
+    })
+
+
+def index_stats():
+    _, by_doc = _docs()
+    postings = sum(
+        os.path.getsize(_shard_path(s)) for s in range(N_SHARDS) if os.path.exists(_shard_path(s))
+    ) // POSTING.itemsize
+    return {"videos": len(by_doc), "postings": postings}
@@ -0,0 +1,207 @@
+import os
+import re
+import json
+import time
+
+import numpy as np
+from youtube_transcript_api import YouTubeTranscriptApi
+
+from perf import span
+from resilience import call_with_retry
+from storage import data_path
+from transcript_index import add_document, search
+
+# ==========================================
+# TIMESTAMPED TRANSCRIPTS & PACING
+# ==========================================
+# Caption segments keep their start/duration and are cached on disk per
+# video. Pacing metrics are computed with NumPy over the segment arrays and
+# replace the raw script in the forensic audit prompt. Every fetched
+# transcript is also added to the positional index in transcript_index.
+HOOK_SECONDS = 30
+PAUSE_SECONDS = 0.3
+SILENCE_SECONDS = 1.5
+TIMELINE_BIN = 30
+# youtube-transcript-api errors that mean "this video has no usable captions";
+# anything else (throttling, network) is retried and never cached as a miss.
+NO_TRANSCRIPT_ERRORS = {
+    "TranscriptsDisabled", "NoTranscriptFound", "NoTranscriptAvailable", "VideoUnavailable", "InvalidVideoId",
+    "AgeRestricted", "VideoUnplayable", "NotTranslatable",
+}
+# Blocked by YouTube: not cached either, but retrying straight away won't help.
+BLOCKED_ERRORS = {"RequestBlocked", "IpBlocked", "PoTokenRequired"}
+# A failed fetch leaves a <id>.failed marker; reruns inside this window skip the
+# request instead of retrying (and deepening a block) on every widget click.
+RETRY_AFTER_SECONDS = 300
+BLOCKED_RETRY_AFTER_SECONDS = 1800
+HOOK_WORDS = re.compile(r"\b(you|your|secret|never|why|how|what|this|today|watch|wait|insane|crazy)\b", re.I)
+
+
+def _cache_path(video_id):
+    return data_path("transcripts", f"{video_id}.json")
+
+
+def _failed_path(video_id):
+    return data_path("transcripts", f"{video_id}.failed")
+
+
+def _recently_failed(video_id):
+    try:
+        with open(_failed_path(video_id), encoding="utf-8") as f:
+            marker = json.load(f)
+    except (OSError, ValueError):
+        return False
+    wait = BLOCKED_RETRY_AFTER_SECONDS if marker.get("error") in BLOCKED_ERRORS else RETRY_AFTER_SECONDS
+    return time.time() - marker.get("ts", 0) < wait
+
+
+def _fetch_raw(video_id):
+    api = YouTubeTranscriptApi
+    if hasattr(api, "get_transcript"):  # youtube-transcript-api < 1.0
+        return api.get_transcript(video_id)
+    return api().fetch(video_id).to_raw_data()
+
+
+def _is_transient(exc):
+    return type(exc).__name__ not in NO_TRANSCRIPT_ERRORS
+
+
+def _should_retry(exc):
+    return _is_transient(exc) and type(exc).__name__ not in BLOCKED_ERRORS
+
+
+def fetch_segments(video_id):
+    """[{'text', 'start', 'duration'}, ...] for a video, or None if it has no transcript (or the fetch failed)."""
+    path = _cache_path(video_id)
+    if os.path.exists(path):
+        return cached_segments(video_id)
+    if _recently_failed(video_id):
+        return None
+    with span("transcript.fetch") as sp:
+        try:
+            segments = [
+                {"text": s["text"], "start": float(s["start"]), "duration": float(s.get("duration", 0.0))}
+                for s in call_with_retry("youtube.transcripts", lambda: _fetch_raw(video_id),
+                                         attempts=3, budget=10, retry_on=_should_retry)
+            ]
+        except Exception as e:
+            sp["found"] = False
+            if _is_transient(e):
+                sp["failed"] = type(e).__name__
+                with open(_failed_path(video_id), "w", encoding="utf-8") as f:
+                    json.dump({"ts": time.time(), "error": type(e).__name__}, f)
+                return None
+            segments = []
+    # Misses are cached too, so an uncaptioned video isn't re-requested every rerun.
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(segments, f)
+    if os.path.exists(_failed_path(video_id)):
+        os.remove(_failed_path(video_id))
+    if segments:
+        with span("transcript.index", segments=len(segments)):
+            add_document(video_id, segments)
+    return segments or None
+
+
+def transcript_status(video_id):
+    """'ok', 'none' (no captions) or 'unknown' (never fetched, or the last fetch failed)."""
+    if not os.path.exists(_cache_path(video_id)):
+        return "unknown"
+    return "ok" if cached_segments(video_id) else "none"
+
+
+def cached_segments(video_id):
+    path = _cache_path(video_id)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f) or None
+
+
+def backfill_index():
+    """Index transcripts cached before the index existed; returns how many were added."""
+    folder = os.path.dirname(_cache_path("x"))
+    added = 0
+    for name in sorted(os.listdir(folder)):
+        if name.endswith(".json"):
+            added += add_document(name[:-5], cached_segments(name[:-5]))
+    return added
+
+
+def search_transcripts(query, limit=200):
+    """Index hits with a readable timestamp and the caption line they land in."""
+    with span("transcript.search", query_terms=len(query.split())) as sp:
+        hits = search(query, limit)
+        sp["hits"] = len(hits)
+    if hits.empty:
+        return hits.assign(Time=[], Snippet=[])
+    segments = {vid: cached_segments(vid) or [] for vid in hits['Video ID'].unique()}
+    secs = hits['Start (ms)'] // 1000
+    hits['Time'] = (secs // 60).astype(str) + ":" + (secs % 60).astype(str).str.zfill(2)
+    hits['Snippet'] = [
+        segments[v][i]['text'] if i < len(segments[v]) else ""
+        for v, i in zip(hits['Video ID'], hits['Segment'])
+    ]
+    return hits
+
+
+def segments_text(segments):
+    return " ".join(s["text"] for s in segments) if segments else None
+
+
+def pacing_metrics(segments):
+    """Words per minute, pauses, segment-length spread and hook density from timestamped captions."""
+    if not segments:
+        return None
+    start = np.array([s["start"] for s in segments])
+    dur = np.array([s["duration"] for s in segments])
+    words = np.array([len(s["text"].split()) for s in segments])
+    end = start + dur
+    total = max(float(end.max()), 1e-6)
+
+    gaps = np.clip(start[1:] - end[:-1], 0, None)
+    pauses = gaps >= PAUSE_SECONDS
+    silences = gaps >= SILENCE_SECONDS
+    speech = max(float(dur.sum() - np.clip(end[:-1] - start[1:], 0, None).sum()), 1e-6)
+
+    hook = start < HOOK_SECONDS
+    hook_text = " ".join(s["text"] for s, h in zip(segments, hook) if h)
+    hook_span = min(HOOK_SECONDS, total)
+
+    bins = (start // TIMELINE_BIN).astype(int)
+    timeline = np.bincount(bins, weights=words) * (60 / TIMELINE_BIN)
+
+    return {
+        "duration_min": round(total / 60, 2),
+        "words": int(words.sum()),
+        "wpm": round(words.sum() / (total / 60), 1),
+        "speech_wpm": round(words.sum() / (speech / 60), 1),
+        "segments_per_min": round(len(segments) / (total / 60), 1),
+        "pauses_per_min": round(pauses.sum() / (total / 60), 2),
+        "silence_sec": round(float(gaps[silences].sum()), 1),
+        "silence_pct": round(float(gaps[silences].sum()) / total * 100, 1),
+        "longest_gap_sec": round(float(gaps.max()) if len(gaps) else 0.0, 1),
+        "segment_sec_p10": round(float(np.percentile(dur, 10)), 2),
+        "segment_sec_p50": round(float(np.percentile(dur, 50)), 2),
+        "segment_sec_p90": round(float(np.percentile(dur, 90)), 2),
+        "hook_wpm": round(words[hook].sum() / (hook_span / 60), 1),
+        "hook_segments": int(hook.sum()),
+        "hook_trigger_words": len(HOOK_WORDS.findall(hook_text)),
+        "hook_questions": hook_text.count("?"),
+        "wpm_timeline": [round(float(v), 1) for v in timeline],
+    }
+
+
+def pacing_prompt_block(metrics):
+    """Compact, prompt-ready summary of pacing_metrics()."""
+    if not metrics:
+        return "No timestamped captions available."
+    m = {k: v for k, v in metrics.items() if k != "wpm_timeline"}
+    lines = [f"- {k}: {v}" for k, v in m.items()]
+    tl = metrics["wpm_timeline"]
+    lines.append(f"- wpm per {TIMELINE_BIN}s (first 20 bins): {tl[:20]}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    print(f"indexed {backfill_index()} cached transcript(s)")
@@ -0,0 +1,195 @@
+import os
+import zlib
+import numpy as np
+
+from market import STATUS_OK
+from storage import FileLock, data_path
+
+# ==========================================
+# CORPUS-WIDE VIRALITY SCORING
+# ==========================================
+# One log-bucketed quantile sketch (DDSketch style, ~1% relative error) per
+# region x duration bucket x metric, persisted under DATA_DIR. Updates are a
+# single bincount per batch, merging sketches of disjoint videos is
+# element-wise addition, and a fixed bloom filter stops the same video from
+# being counted twice. Scores are percentiles against everything ever
+# scanned, not against the current batch.
+METRICS = ['Views', 'Likes', 'Comments', 'Engagement']
+METRIC_WEIGHTS = np.array([0.4, 0.2, 0.15, 0.25])
+DURATION_BUCKETS = [(1, "shorts"), (4, "short"), (20, "mid"), (float("inf"), "long")]
+
+ALPHA = 0.01
+GAMMA_LOG = np.log((1 + ALPHA) / (1 - ALPHA))
+MIN_VALUE = 1e-3
+N_BINS = 2048
+BLOOM_BITS = 2 ** 23
+BLOOM_HASHES = 3
+SKETCH_FILE = "virality_sketch.npz"
+# Bloom estimates are approximate: this many shared videos (or 1% of the
+# smaller sketch) still count as disjoint.
+MERGE_OVERLAP_TOLERANCE = 5
+
+
+def duration_bucket(minutes):
+    minutes = np.asarray(minutes, dtype=np.float64)
+    edges = np.array([b[0] for b in DURATION_BUCKETS[:-1]])
+    names = np.array([b[1] for b in DURATION_BUCKETS], dtype=object)
+    return names[np.searchsorted(edges, minutes, side='right')]
+
+
+def value_bins(values):
+    """Map non-negative values to sketch bins; bin 0 holds everything below MIN_VALUE."""
+    values = np.asarray(values, dtype=np.float64)
+    idx = 1 + np.floor((np.log(np.maximum(values, MIN_VALUE)) - np.log(MIN_VALUE)) / GAMMA_LOG)
+    idx = np.where(values < MIN_VALUE, 0, idx)
+    return np.clip(idx, 0, N_BINS - 1).astype(np.int64)
+
+
+class CorpusSketch:
+    """Mergeable per-key quantile sketches plus a bloom filter of counted video IDs."""
+
+    def __init__(self, counts=None, bloom=None):
+        self.counts = counts or {}
+        self.bloom = bloom if bloom is not None else np.zeros(BLOOM_BITS // 8, dtype=np.uint8)
+
+    # ---------- persistence ----------
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        with np.load(path, allow_pickle=False) as z:
+            bloom = z['__bloom__']
+            counts = {k: z[k].astype(np.int64) for k in z.files if k != '__bloom__'}
+        return cls(counts, bloom)
+
+    def save(self, path):
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(tmp, __bloom__=self.bloom, **self.counts)
+        os.replace(tmp, path)
+
+    def merge(self, other):
+        for key, arr in other.counts.items():
+            if key in self.counts:
+                self.counts[key] += arr
+            else:
+                self.counts[key] = arr.copy()
+        self.bloom |= other.bloom
+        return self
+
+    # ---------- dedupe ----------
+    def _bloom_positions(self, video_ids):
+        return np.array(
+            [[zlib.crc32(f"{i}:{vid}".encode()) % BLOOM_BITS for i in range(BLOOM_HASHES)] for vid in video_ids],
+            dtype=np.int64
+        ).reshape(-1, BLOOM_HASHES)
+
+    def seen(self, video_ids):
+        pos = self._bloom_positions(video_ids)
+        bits = (self.bloom[pos >> 3] >> (pos & 7).astype(np.uint8)) & 1
+        return bits.all(axis=1)
+
+    def estimated_videos(self, bloom=None):
+        """Distinct videos marked in the bloom filter, from its fill ratio."""
+        bloom = self.bloom if bloom is None else bloom
+        filled = int(np.unpackbits(bloom).sum())
+        if filled >= BLOOM_BITS:
+            return float("inf")
+        return -BLOOM_BITS / BLOOM_HASHES * np.log1p(-filled / BLOOM_BITS)
+
+    def estimated_overlap(self, other):
+        """Roughly how many videos both sketches have counted."""
+        union = self.estimated_videos(self.bloom | other.bloom)
+        return max(0.0, self.estimated_videos() + other.estimated_videos() - union)
+
+    def _mark(self, video_ids):
+        pos = self._bloom_positions(video_ids).ravel()
+        np.bitwise_or.at(self.bloom, pos >> 3, (1 << (pos & 7)).astype(np.uint8))
+
+    # ---------- update / query ----------
+    def update(self, keys, values, video_ids):
+        """Add a batch: keys (n,), values (n, len(METRICS)). Already-seen IDs are skipped."""
+        fresh = ~self.seen(video_ids)
+        keys, values = np.asarray(keys, dtype=object)[fresh], np.asarray(values)[fresh]
+        for key in np.unique(keys):
+            rows = values[keys == key]
+            bins = value_bins(rows) + np.arange(len(METRICS)) * N_BINS
+            add = np.bincount(bins.ravel(), minlength=len(METRICS) * N_BINS).reshape(len(METRICS), N_BINS)
+            if key in self.counts:
+                self.counts[key] += add
+            else:
+                self.counts[key] = add
+        self._mark([v for v, f in zip(video_ids, fresh) if f])
+        return int(fresh.sum())
+
+    def percentiles(self, keys, values):
+        """Mid-rank percentile (0-1) of each value within its key's sketch; NaN for unknown keys."""
+        keys, values = np.asarray(keys, dtype=object), np.asarray(values, dtype=np.float64)
+        out = np.full(values.shape, np.nan)
+        bins = value_bins(values)
+        for key in np.unique(keys):
+            if key not in self.counts:
+                continue
+            counts = self.counts[key]
+            total = counts.sum(axis=1)
+            below = np.cumsum(counts, axis=1) - counts
+            mask = keys == key
+            b = bins[mask]
+            m = np.arange(len(METRICS))
+            out[mask] = (below[m, b] + 0.5 * counts[m, b]) / np.maximum(total[m], 1)
+        return out
+
+    def total(self):
+        return int(sum(arr[0].sum() for arr in self.counts.values()))
+
+
+def _sketch_keys(df, region_code):
+    return np.array([f"{region_code}|{b}" for b in duration_bucket(df['Duration'])], dtype=object)
+
+
+def score_with_corpus(df, region_code, path=None):
+    """Fold the batch into the on-disk corpus sketch, then score every row as a corpus percentile."""
+    if df.empty:
+        return df
+    path = path or data_path(SKETCH_FILE)
+    keys = _sketch_keys(df, region_code)
+    values = df[METRICS].to_numpy(dtype=np.float64)
+    # Placeholder rows (details failed) are scored but never folded into the corpus.
+    ok = df['Fetch Status'].eq(STATUS_OK).to_numpy() if 'Fetch Status' in df.columns else np.ones(len(df), bool)
+    with FileLock(path):
+        sketch = CorpusSketch.load(path)
+        sketch.update(keys[ok], values[ok], df['Video ID'][ok].tolist())
+        sketch.save(path)
+    # A bucket can still be empty if every row in it was a placeholder.
+    pct = np.nan_to_num(sketch.percentiles(keys, values))
+    df = df.copy()
+    df['Corpus Size'] = sketch.total()
+    df['Views Percentile'] = np.round(pct[:, 0] * 100, 1)
+    df['Virality Score'] = np.round((pct * METRIC_WEIGHTS).sum(axis=1) * 100, 0)
+    return df
+
+
+def _merge_disjoint(merged, other, name):
+    overlap = merged.estimated_overlap(other)
+    smaller = min(merged.estimated_videos(), other.estimated_videos())
+    if overlap > max(MERGE_OVERLAP_TOLERANCE, 0.01 * smaller):
+        raise ValueError(f"{name} shares ~{overlap:.0f} videos with the sketches merged before it; "
+                         f"histograms can't be de-duplicated, so only disjoint worker outputs can be merged")
+    merged.merge(other)
+
+
+def merge_sketch_files(paths, out_path=None):
+    """Combine sketches written by separate worker processes into one.
+
+    The inputs (and the existing out_path) must have counted disjoint sets of
+    videos: a merged histogram no longer knows which bins a video added, so a
+    shared video would be counted twice. Overlap is detected from the bloom
+    filters and raises ValueError before anything is written.
+    """
+    merged = CorpusSketch()
+    for p in paths:
+        _merge_disjoint(merged, CorpusSketch.load(p), p)
+    out_path = out_path or data_path(SKETCH_FILE)
+    with FileLock(out_path):
+        _merge_disjoint(merged, CorpusSketch.load(out_path), out_path)
+        merged.save(out_path)
+    return merged
@@ -0,0 +1,237 @@
+"""Headless watch mode: re-poll queries and videos on a schedule, alert on view velocity.
+
+    YOUTUBE_API_KEY=... python watch.py --config watch.json          # loop forever
+    YOUTUBE_API_KEY=... python watch.py --config watch.json --once   # one poll (cron)
+
+watch.json:
+    {"queries": [{"query": "AI News", "region": "US"}], "video_ids": ["dQw4w9WgXcQ"],
+     "poll_minutes": 30, "search_hours": 12, "top_per_query": 25,
+     "velocity_alert": 5000, "alert_cooldown_hours": 6, "daily_quota": 10000}
+"""
+import os
+import sys
+import json
+import math
+import time
+import argparse
+
+from googleapiclient.errors import HttpError
+
+from perf import span
+from resilience import call_with_retry
+from storage import data_path, append_jsonl, read_jsonl
+from yt_client import youtube_client
+
+# ==========================================
+# WATCH MODE
+# ==========================================
+# search().list costs 100 units, videos().list 1 unit per 50 IDs, so queries
+# are re-searched rarely and tracked videos are polled in stable 50-ID
+# batches. Every request carries the ETag of its previous response
+# (If-None-Match); a 304 means nothing changed and the batch is skipped.
+# State for queries and videos no longer in the config is dropped each poll.
+# Alerts land in watch/alerts.jsonl, which the dashboard sidebar reads; a
+# video alerts again only after alert_cooldown_hours.
+SEARCH_COST = 100
+VIDEOS_COST = 1
+DEFAULTS = {
+    "queries": [], "video_ids": [], "poll_minutes": 30, "search_hours": 12, "top_per_query": 25,
+    "velocity_alert": 5000, "alert_cooldown_hours": 6, "daily_quota": 10000,
+}
+POSITIVE = ["poll_minutes", "search_hours", "top_per_query", "daily_quota"]
+# Each stretch is x1.25, so 40 of them is ~7500x the configured intervals.
+MAX_STRETCH = 40
+
+
+def _state_path():
+    return data_path("watch", "state.json")
+
+
+def alerts_path():
+    return data_path("watch", "alerts.jsonl")
+
+
+def load_state():
+    try:
+        with open(_state_path(), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"etags": {}, "videos": {}, "searched": {}, "query_videos": {}}
+
+
+def save_state(state):
+    path = _state_path()
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(path + ".tmp", path)
+
+
+def daily_cost(cfg, n_videos):
+    """Quota units per day for this config with n_videos tracked."""
+    searches = len(cfg["queries"]) * SEARCH_COST * 24 / cfg["search_hours"]
+    polls = math.ceil(n_videos / 50) * VIDEOS_COST * 24 * 60 / cfg["poll_minutes"]
+    return searches + polls
+
+
+def validate_config(cfg):
+    """Raise ValueError for settings the scheduler can't run with."""
+    bad = [k for k in POSITIVE if not isinstance(cfg[k], (int, float)) or cfg[k] <= 0]
+    if bad:
+        raise ValueError(f"{', '.join(bad)} must be > 0")
+
+
+def fit_to_quota(cfg, n_videos):
+    """Stretch poll and search intervals until the plan fits the daily quota."""
+    cfg = dict(cfg)
+    for _ in range(MAX_STRETCH):
+        if daily_cost(cfg, n_videos) <= cfg["daily_quota"] * 0.9:
+            return cfg
+        cfg["poll_minutes"] *= 1.25
+        cfg["search_hours"] *= 1.25
+    raise ValueError(f"daily_quota {cfg['daily_quota']} can't cover {len(cfg['queries'])} queries and "
+                     f"{n_videos} videos even at one poll every {cfg['poll_minutes'] / 60:.0f} h")
+
+
+def conditional_execute(request, state, key):
+    """Execute with If-None-Match; returns the response, or None on 304 Not Modified."""
+    etag = state["etags"].get(key)
+    if etag:
+        request.headers["If-None-Match"] = etag
+    try:
+        resp = call_with_retry("youtube.watch", request.execute)
+    except HttpError as e:
+        if e.resp.status == 304:
+            return None
+        raise
+    if resp.get("etag"):
+        state["etags"][key] = resp["etag"]
+    return resp
+
+
+def _search_key(q):
+    return f"search:{q['query']}|{q.get('region', 'US')}"
+
+
+def _batches(ids):
+    return [ids[start:start + 50] for start in range(0, len(ids), 50)]
+
+
+def prune_state(cfg, state):
+    """Forget searches, results, ETags and videos the current config no longer asks for."""
+    keys = {_search_key(q) for q in cfg["queries"]}
+    state["query_videos"] = {k: v for k, v in state["query_videos"].items() if k in keys}
+    state["searched"] = {k: v for k, v in state["searched"].items() if k in keys}
+    ids = tracked_ids(cfg, state)
+    live = keys | {"videos:" + ",".join(batch) for batch in _batches(ids)}
+    state["etags"] = {k: v for k, v in state["etags"].items() if k in live}
+    tracked = set(ids)
+    state["videos"] = {v: rec for v, rec in state["videos"].items() if v in tracked}
+
+
+def refresh_searches(youtube, cfg, state, now):
+    for q in cfg["queries"]:
+        key = _search_key(q)
+        if now - state["searched"].get(key, 0) < cfg["search_hours"] * 3600:
+            continue
+        with span("watch.search", query=q['query']) as sp:
+            resp = conditional_execute(youtube.search().list(
+                part="snippet", q=q['query'], type="video", regionCode=q.get('region', 'US'),
+                maxResults=cfg["top_per_query"], order="viewCount"
+            ), state, key)
+            sp["changed"] = resp is not None
+        state["searched"][key] = now
+        if resp is not None:
+            state["query_videos"][key] = [it['id']['videoId'] for it in resp.get('items', [])]
+
+
+def tracked_ids(cfg, state):
+    ids = set(cfg["video_ids"])
+    for q in cfg["queries"]:
+        ids.update(state["query_videos"].get(_search_key(q), []))
+    return sorted(ids)
+
+
+def poll_videos(youtube, cfg, state, now):
+    """Poll tracked videos in 50-ID batches; returns alert records for fast movers."""
+    alerts = []
+    for batch in _batches(tracked_ids(cfg, state)):
+        key = "videos:" + ",".join(batch)
+        with span("watch.videos", ids=len(batch)) as sp:
+            resp = conditional_execute(
+                youtube.videos().list(part="snippet,statistics", id=",".join(batch)), state, key
+            )
+            sp["changed"] = resp is not None
+        if resp is None:
+            continue
+        for item in resp.get('items', []):
+            vid, views = item['id'], int(item['statistics'].get('viewCount', 0))
+            prev = state["videos"].get(vid)
+            last_alert = prev.get("last_alert", 0) if prev else 0
+            state["videos"][vid] = {"views": views, "ts": now, "title": item['snippet']['title'],
+                                    "last_alert": last_alert}
+            if not prev or now <= prev["ts"]:
+                continue
+            velocity = (views - prev["views"]) / ((now - prev["ts"]) / 3600)
+            cooled = now - last_alert >= cfg["alert_cooldown_hours"] * 3600
+            if velocity >= cfg["velocity_alert"] and cooled:
+                state["videos"][vid]["last_alert"] = now
+                alerts.append({
+                    "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(now)), "video_id": vid,
+                    "title": item['snippet']['title'], "views": views, "views_per_hour": round(velocity),
+                })
+    return alerts
+
+
+def poll_once(api_key, cfg):
+    state = load_state()
+    now = time.time()
+    prune_state(cfg, state)
+    with youtube_client(api_key) as youtube:
+        refresh_searches(youtube, cfg, state, now)
+        alerts = poll_videos(youtube, cfg, state, now)
+    save_state(state)
+    if alerts:
+        append_jsonl(alerts_path(), alerts)
+    return alerts
+
+
+def recent_alerts(limit=20):
+    """Newest alerts first, for the dashboard."""
+    return list(read_jsonl(alerts_path()))[-limit:][::-1]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--config", required=True)
+    ap.add_argument("--once", action="store_true")
+    args = ap.parse_args()
+    with open(args.config, encoding="utf-8") as f:
+        cfg = {**DEFAULTS, **json.load(f)}
+    api_key = os.environ["YOUTUBE_API_KEY"]
+
+    while True:
+        n_videos = len(tracked_ids(cfg, load_state())) or len(cfg["queries"]) * cfg["top_per_query"]
+        try:
+            validate_config(cfg)
+            plan = fit_to_quota(cfg, n_videos)
+        except ValueError as e:
+            print(f"config: {e}", file=sys.stderr)
+            return 2
+        if plan["poll_minutes"] != cfg["poll_minutes"]:
+            print(f"quota: stretched polling to every {plan['poll_minutes']:.0f} min, "
+                  f"searches every {plan['search_hours']:.1f} h ({daily_cost(plan, n_videos):.0f} units/day)")
+        try:
+            for alert in poll_once(api_key, plan):
+                print(f"ALERT {alert['video_id']} {alert['views_per_hour']:,} views/h  {alert['title']}")
+        except Exception as e:
+            # Retries and breakers already gave up on this cycle; the next one starts fresh.
+            print(f"{time.strftime('%Y-%m-%dT%H:%M:%S')} poll failed: {type(e).__name__}: {e}", file=sys.stderr)
+            if args.once:
+                return 1
+        if args.once:
+            return 0
+        time.sleep(plan["poll_minutes"] * 60)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
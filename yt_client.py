@@ -0,0 +1,92 @@
+import os
+import json
+import queue
+import threading
+from contextlib import contextmanager
+
+import httplib2
+from googleapiclient.discovery import build, build_from_document
+
+# ==========================================
+# POOLED YOUTUBE CLIENTS
+# ==========================================
+# One pool per API key for the whole process. Clients are built once from the
+# discovery document bundled with google-api-python-client (parsed a single
+# time) and each owns a keep-alive httplib2.Http. httplib2 is not
+# thread-safe, so a client is leased to one thread at a time; the pool size
+# is also the concurrency limit per key (AXE_YOUTUBE_POOL_SIZE).
+# AXE_YOUTUBE_ENDPOINT points the clients at a local stub such as
+# bench/youtube_stub.py.
+POOL_SIZE = int(os.environ.get("AXE_YOUTUBE_POOL_SIZE", "8"))
+HTTP_TIMEOUT = 30
+
+_discovery_doc = None
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _discovery():
+    global _discovery_doc
+    if _discovery_doc is None:
+        from googleapiclient.discovery_cache import get_static_doc
+        doc = get_static_doc('youtube', 'v3')
+        _discovery_doc = json.loads(doc) if doc else False
+    return _discovery_doc
+
+
+def _client_options():
+    endpoint = os.environ.get("AXE_YOUTUBE_ENDPOINT")
+    return {"api_endpoint": endpoint.rstrip("/") + "/youtube/v3/"} if endpoint else None
+
+
+def _new_client(api_key):
+    http = httplib2.Http(timeout=HTTP_TIMEOUT)
+    doc = _discovery()
+    if doc:
+        return build_from_document(doc, developerKey=api_key, http=http, client_options=_client_options())
+    return build('youtube', 'v3', developerKey=api_key, http=http, client_options=_client_options())
+
+
+class ClientPool:
+    """Bounded set of reusable clients for one API key, built lazily up to size."""
+
+    def __init__(self, api_key, size=POOL_SIZE):
+        self.api_key = api_key
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._built = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def lease(self):
+        self._slots.acquire()
+        try:
+            try:
+                client = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    self._built += 1
+                client = _new_client(self.api_key)
+            try:
+                yield client
+            finally:
+                self._idle.put(client)
+        finally:
+            self._slots.release()
+
+    def stats(self):
+        return {"size": self.size, "built": self._built, "idle": self._idle.qsize()}
+
+
+def get_pool(api_key):
+    with _pools_lock:
+        pool = _pools.get(api_key)
+        if pool is None:
+            pool = _pools[api_key] = ClientPool(api_key)
+        return pool
+
+
+def youtube_client(api_key):
+    """Lease a pooled client: `with youtube_client(key) as youtube: ...`."""
+    return get_pool(api_key).lease()